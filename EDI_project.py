@@ -649,16 +649,22 @@ import cohere
 from argostranslate import package, translate
 from dotenv import load_dotenv
 import os
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import werkzeug
 from werkzeug.utils import secure_filename
 import os
-import subprocess
-import requests
+import uuid
 
 # Import our custom modules
-from pdf_parser import EnhancedCollegeParser
+from pdf_parser import EnhancedCollegeParser, clamp_workers
+from parse_cache import ParseCache
+from ingest_jobs import IngestJobQueue
+from http_cache import HTTPCache
+from college_api import MAX_BATCH_ITEMS, CollegeAPI
+from response_cache import ResponseCache, normalize_query
+from query_parser import QueryParser
+from llm_gateway import CohereProvider, LLMGateway, OllamaProvider
 from database import CollegeDatabase
 
 load_dotenv()
@@ -669,7 +675,39 @@ co = cohere.Client(cohere_api_key) if cohere_api_key else None
 
 # Initialize database and parser
 db = CollegeDatabase()
-pdf_parser = EnhancedCollegeParser()
+pdf_parser = EnhancedCollegeParser(cache=ParseCache(
+    os.getenv('PARSE_CACHE_DIR', 'parse_cache'),
+    max_bytes=int(os.getenv('PARSE_CACHE_MAX_MB', '200')) * 1024 * 1024
+))
+ingest_jobs = IngestJobQueue(db, pdf_parser, workers=int(os.getenv('INGEST_JOB_WORKERS', '1')))
+
+# ETags and serialized (and gzip-compressed) bodies of the read endpoints, keyed on db.data_version
+http_cache = HTTPCache(
+    db,
+    max_entries=int(os.getenv('HTTP_CACHE_MAX_ENTRIES', '2048')),
+    ttl_seconds=float(os.getenv('HTTP_CACHE_TTL_SECONDS', '3600')),
+    max_bytes=int(os.getenv('HTTP_CACHE_MAX_MB', '64')) * 1024 * 1024 or None
+)
+
+# Chat answers keyed on the normalized query and db.generation, so every ingest invalidates them
+response_cache = ResponseCache(
+    max_entries=int(os.getenv('CHAT_CACHE_MAX_ENTRIES', '1024')),
+    ttl_seconds=float(os.getenv('CHAT_CACHE_TTL_SECONDS', '600')),
+    max_bytes=int(os.getenv('CHAT_CACHE_MAX_KB', '0')) * 1024 or None
+)
+
+# Intent, branch, category, stage and rank come out of one precompiled pass over the query
+query_parser = QueryParser()
+
+# LLM calls for general questions: local Ollama first, hedged to Cohere, each behind a circuit breaker
+llm_gateway = LLMGateway(
+    [OllamaProvider(os.getenv('OLLAMA_URL', 'http://localhost:11434'), os.getenv('OLLAMA_MODEL', 'deepseek-r1:1.5b'))]
+    + ([CohereProvider(co)] if co else []),
+    deadline=float(os.getenv('LLM_DEADLINE_SECONDS', '20')),
+    hedge_delay=float(os.getenv('LLM_HEDGE_DELAY_SECONDS', '3'))
+)
+# College names are matched locally; Cohere is only asked when the gazetteer finds none
+LLM_COLLEGE_EXTRACTION = os.getenv('LLM_COLLEGE_EXTRACTION', 'true').lower() == 'true'
 
 # Configure upload settings
 UPLOAD_FOLDER = 'uploads'
@@ -684,11 +722,17 @@ CORS(app)
 # Configure upload folder
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['PDF_PARSE_WORKERS'] = int(os.getenv('PDF_PARSE_WORKERS', '1'))  # >1 parses page ranges in parallel; caps ?workers=
 
 def allowed_file(filename):
     """Check if file extension is allowed."""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+@app.before_request
+def start_ingest_workers():
+    """Start the ingest workers, resuming unfinished jobs, on the first request."""
+    ingest_jobs.start()
+
 # Load dataset
 def load_data(file_path='dataset1.json'):
     try:
@@ -710,122 +754,101 @@ def detect_language(sentence):
 def search_colleges_from_database(query, limit=10):
     """Search colleges from the database using the existing search function."""
     try:
-        colleges = db.search_colleges(query)
-        return colleges[:limit] if colleges else []
+        colleges = db.search_colleges(query, limit=limit)
+        return colleges if colleges else []
     except Exception as e:
         print(f"Error searching colleges: {e}")
         return []
 
+def find_colleges_by_name(college_name, limit=10):
+    """Colleges for an extracted name: the one college a known name or alias
+    refers to, otherwise a search on the name."""
+    gazetteer = db.get_college_gazetteer()
+    colleges = gazetteer.lookup(college_name) if gazetteer else ()
+    if len(colleges) == 1:
+        college_code, official_name = colleges[0]
+        return [{'college_code': college_code, 'college_name': official_name}]
+    
+    colleges = search_colleges_from_database(college_name, limit=limit)
+    if colleges or gazetteer is None:
+        return colleges
+    # A misspelt name finds nothing in the search index; fall back to trigram matching
+    return [{'college_code': college_code, 'college_name': official_name}
+            for college_code, official_name, _ in gazetteer.fuzzy_colleges(college_name, limit)]
+
 # Get college details from database
-def get_college_details_from_database(college_code):
-    """Get detailed college information from database."""
+def get_college_details_from_database(college_code, **projection):
+    """Get detailed college information from database.
+
+    projection is passed through to db.get_college_data (include_cutoffs,
+    stages, categories, academic_year, cap_round) so callers only fetch what
+    they render.
+    """
     try:
-        college_data = db.get_college_data(college_code=college_code)
+        college_data = db.get_college_data(college_code=college_code, **projection)
         return college_data
     except Exception as e:
         print(f"Error getting college details: {e}")
         return None
 
+# Get per-branch cutoff summaries from database
+def get_branch_summaries_from_database(college_codes, academic_year=None, cap_round=None):
+    """Closing ranks, percentage range and counts per branch, keyed by college code.
+
+    Read from the precomputed branch_cutoff_summary rows, one per branch,
+    for the latest CAP round unless academic_year/cap_round name another.
+    """
+    try:
+        return db.get_branch_summaries(college_codes, academic_year=academic_year, cap_round=cap_round)
+    except Exception as e:
+        print(f"Error getting branch summaries: {e}")
+        return {}
+
 # Enhanced intent classification for college queries
 def classify_college_query(user_query):
     """Classify the type of college-related query."""
-    query_lower = user_query.lower()
-    
-    # College search patterns
-    if any(word in query_lower for word in ['find', 'search', 'which', 'what colleges', 'colleges in', 'colleges near']):
-        return 'college_search'
-    
-    # Cutoff patterns
-    if any(word in query_lower for word in ['cutoff', 'rank', 'percentage', 'admission', 'eligibility']):
-        return 'cutoff_query'
-    
-    # Branch patterns
-    if any(word in query_lower for word in ['branch', 'course', 'stream', 'department']):
-        return 'branch_query'
-    
-    # College info patterns
-    if any(word in query_lower for word in ['info', 'details', 'about', 'tell me about']):
-        return 'college_info'
-    
-    # Comparison patterns
-    if any(word in query_lower for word in ['compare', 'vs', 'versus', 'difference']):
-        return 'comparison_query'
-    
-    return 'general_query'
+    return query_parser.parse(user_query).intent
+
+def parse_user_query(user_query):
+    """Intent, college, branch, category, stage and rank of a query, extracted together."""
+    return query_parser.parse(user_query, db.get_college_gazetteer())
 
 # Extract college name from query
 def extract_college_name(query):
     """Extract college name from user query."""
-    # Common college name patterns
-    college_patterns = [
-        r'COEP',
-        r'PICT',
-        r'VIT',
-        r'SPIT',
-        r'DJ Sanghvi',
-        r'Thadomal Shahani',
-        r'Government College of Engineering',
-        r'Walchand College',
-        r'MIT',
-        r'Pune University',
-        r'University of Mumbai'
-    ]
-    
-    for pattern in college_patterns:
-        match = re.search(pattern, query, re.IGNORECASE)
-        if match:
-            return match.group(0)
-    
-    # Try to extract using Cohere if available
-    if co:
-        try:
-            response = co.chat(
-                model="command-r-plus",
-                message=f"Extract the college name from this query: '{query}'. Return only the college name or 'None' if not found.",
-                max_tokens=20,
-                temperature=0.1
-            )
-            college_name = response.text.strip()
-            if college_name.lower() != 'none':
-                return college_name
-        except:
-            pass
+    # Names, acronyms and aliases of every college in the database
+    gazetteer = db.get_college_gazetteer()
+    match = gazetteer.find(query) if gazetteer else None
+    if match is not None:
+        return match.college[1] if match.college else match.alias
+    if not LLM_COLLEGE_EXTRACTION:
+        return None
+    return extract_college_name_with_llm(query)
+
+def extract_college_name_with_llm(query):
+    """Ask Cohere for the college name; None if it finds none or is unavailable."""
+    college_name = llm_gateway.generate(
+        f"Extract the college name from this query: '{query}'. Return only the college name or 'None' if not found.",
+        max_tokens=20,
+        temperature=0.1,
+        providers=['cohere']
+    )
+    if college_name and college_name.strip().lower() != 'none':
+        return college_name.strip()
     
     return None
 
 # Extract branch name from query
 def extract_branch_name(query):
     """Extract branch/course name from user query."""
-    branch_patterns = [
-        r'Computer Science',
-        r'Information Technology',
-        r'Mechanical Engineering',
-        r'Electrical Engineering',
-        r'Electronics',
-        r'Civil Engineering',
-        r'Chemical Engineering',
-        r'Biotechnology',
-        r'AI/ML',
-        r'Data Science'
-    ]
-    
-    for pattern in branch_patterns:
-        match = re.search(pattern, query, re.IGNORECASE)
-        if match:
-            return match.group(0)
-    
-    return None
+    return query_parser.parse(query).branch
 
 # Process college search queries
-def process_college_search(query):
+def process_college_search(query, search_terms=None):
     """Process queries asking to find/search colleges."""
-    # Extract search terms
-    search_terms = query.lower()
-    
-    # Remove common words
-    common_words = ['find', 'search', 'which', 'what', 'colleges', 'in', 'near', 'around', 'for']
-    for word in common_words:
-        search_terms = search_terms.replace(word, '').strip()
+    # Extract search terms: the query without its intent words and common words
+    if search_terms is None:
+        search_terms = query_parser.parse(query).search_terms
     
     # Search in database
     colleges = search_colleges_from_database(search_terms, limit=15)
@@ -834,11 +857,13 @@ def process_college_search(query):
         return "I couldn't find any colleges matching your search. Could you please provide more specific details?"
     
     response = f"I found {len(colleges)} colleges matching your search:\n\n"
+    summaries = get_branch_summaries_from_database([college['college_code'] for college in colleges[:10]])
     
     for i, college in enumerate(colleges[:10], 1):
         response += f"{i}. {college['college_name']} ({college['college_code']})\n"
-        if college.get('branches'):
-            response += f"   Branches: {len(college['branches'])}\n"
+        summary = summaries.get(college['college_code'])
+        if summary and summary['branches']:
+            response += f"   Branches: {len(summary['branches'])}\n"
         response += "\n"
     
     if len(colleges) > 10:
@@ -848,31 +873,60 @@ def process_college_search(query):
     return response
 
 # Process cutoff queries
-def process_cutoff_query(query, college_name=None, branch_name=None):
-    """Process queries about cutoffs, ranks, and eligibility."""
-    if not college_name:
+def format_admission_round(academic_year=None, cap_round=None):
+    """Names the CAP round a reply shows: the one asked for, or the latest stored."""
+    academic_year, cap_round = db.resolve_admission_round(academic_year, cap_round)
+    if cap_round is None:
+        return ""
+    return f"**CAP Round:** {cap_round} (A.Y. {academic_year}-{(academic_year + 1) % 100:02d})\n\n"
+
+def process_cutoff_query(query, college_name=None, branch_name=None, category=None, stage=None,
+                         academic_year=None, cap_round=None):
+    """Process queries about cutoffs, ranks, and eligibility.
+
+    category and stage (e.g. "GOPENS", "I") narrow the cutoffs shown;
+    academic_year and cap_round pick the round, the latest by default.
+    """
+    if college_name is None:
         college_name = extract_college_name(query)
     
-    if not branch_name:
+    if branch_name is None:
         branch_name = extract_branch_name(query)
     
     if not college_name:
         return "I'd be happy to help with cutoff information! Please mention the college name you're interested in."
     
     # Search for college in database
-    colleges = search_colleges_from_database(college_name, limit=5)
+    colleges = find_colleges_by_name(college_name, limit=5)
     
     if not colleges:
         return f"I couldn't find information about {college_name}. Could you please check the spelling or try a different college name?"
     
     # Get detailed information for the best match
     best_match = colleges[0]
-    college_details = get_college_details_from_database(best_match['college_code'])
+    if category or stage:
+        college_details = get_college_details_from_database(
+            best_match['college_code'],
+            stages=[stage] if stage else None,
+            categories=[category] if category else None,
+            academic_year=academic_year,
+            cap_round=cap_round
+        )
+    else:
+        # Without filters only closing ranks and counts are shown; read them from the branch summaries
+        college_details = get_branch_summaries_from_database(
+            [best_match['college_code']], academic_year, cap_round
+        ).get(best_match['college_code'])
     
     if not college_details:
         return f"I found {best_match['college_name']} but couldn't retrieve detailed cutoff information."
     
     response = f"📊 **Cutoff Information for {best_match['college_name']}**\n\n"
+    response += format_admission_round(academic_year, cap_round)
+    if category or stage:
+        filters = [category] if category else []
+        filters += [f"Stage {stage}"] if stage else []
+        response += f"**Cutoffs for:** {', '.join(filters)}\n\n"
     
     if college_details.get('branches'):
         response += f"**Total Branches:** {len(college_details['branches'])}\n\n"
@@ -891,7 +945,13 @@ def process_cutoff_query(query, college_name=None, branch_name=None):
             if branch.get('cutoff_data'):
                 response += f"   **Cutoff Data:**\n"
                 for cutoff in branch['cutoff_data'][:3]:  # Show first 3 cutoffs
-                    response += f"     • Stage {cutoff['stage']} - {cutoff['category']}: Rank {cutoff['rank']} ({cutoff['percentage']:.2f}%)\n"
+                    response += f"     • {cutoff['category']} (Stage {cutoff['stage']}): Rank {cutoff['rank']}, {cutoff['percentage']:.2f}%\n"
+            elif branch.get('closing_ranks'):
+                response += f"   **Closing Ranks:**\n"
+                for category_code, closing_rank in list(branch['closing_ranks'].items())[:3]:  # Show first 3 categories
+                    response += f"     • {category_code}: Rank {closing_rank}\n"
+                response += f"     Percentage {branch['worst_percentage']:.2f}% to {branch['best_percentage']:.2f}%, "
+                response += f"{branch['cutoff_count']} entries across {branch['stage_count']} stage(s)\n"
             else:
                 response += f"   No cutoff data available\n"
             response += "\n"
@@ -901,23 +961,50 @@ def process_cutoff_query(query, college_name=None, branch_name=None):
     response += "\n💡 **Tip:** You can ask me about specific branches, stages, or categories for more detailed information."
     return response
 
+def process_eligibility_query(category, rank=None, percentile=None, stage=None,
+                              academic_year=None, cap_round=None, limit=10):
+    """Branches a student's rank or percentile gets into, via db.find_eligible_branches."""
+    if not category:
+        return ("I can find the branches open to you! Please mention your category too, "
+                "e.g. \"rank 12000 GOPENS\" or \"92 percentile LOBCS\".")
+    
+    eligible = db.find_eligible_branches(category, rank=rank, percentile=percentile, stage=stage, limit=limit,
+                                         academic_year=academic_year, cap_round=cap_round)
+    student = f"rank {rank:,}" if rank is not None else f"{percentile:g} percentile"
+    response = f"🎯 **Branches open to {category} at {student}**\n\n"
+    if stage:
+        response += f"**Stage:** {stage}\n\n"
+    response += format_admission_round(academic_year, cap_round)
+    
+    if not eligible:
+        response += "No branch closed at or beyond that in this round."
+        return response
+    
+    for branch in eligible:
+        response += f"🏛️ **{branch['college_name']}** ({branch['college_code']})\n"
+        response += f"   {branch['branch_name']}\n"
+        response += f"   Closing Rank {branch['closing_rank']} (Stage {branch['stage']}), {branch['percentage']:.2f}%\n\n"
+    
+    response += "💡 **Tip:** Ask about one college, e.g. \"COEP GOPENS cutoff in round 2\", for its full cutoffs."
+    return response
+
 # Process college info queries
 def process_college_info_query(query, college_name=None):
     """Process queries asking for general college information."""
-    if not college_name:
+    if college_name is None:
         college_name = extract_college_name(query)
     
     if not college_name:
         return "I'd be happy to provide college information! Please mention the college name you're interested in."
     
     # Search for college
-    colleges = search_colleges_from_database(college_name, limit=3)
+    colleges = find_colleges_by_name(college_name, limit=3)
     
     if not colleges:
         return f"I couldn't find information about {college_name}. Could you please check the spelling?"
     
     best_match = colleges[0]
-    college_details = get_college_details_from_database(best_match['college_code'])
+    college_details = get_branch_summaries_from_database([best_match['college_code']]).get(best_match['college_code'])
     
     if not college_details:
         return f"I found {best_match['college_name']} but couldn't retrieve detailed information."
@@ -933,8 +1020,8 @@ def process_college_info_query(query, college_name=None):
             response += f"{i}. {branch['branch_name']}\n"
             if branch.get('status'):
                 response += f"   Status: {branch['status']}\n"
-            if branch.get('cutoff_data'):
-                response += f"   Cutoff entries: {len(branch['cutoff_data'])}\n"
+            if branch.get('cutoff_count'):
+                response += f"   Cutoff entries: {branch['cutoff_count']}\n"
             response += "\n"
         
         if len(college_details['branches']) > 8:
@@ -948,116 +1035,133 @@ def process_college_info_query(query, college_name=None):
     
     return response
 
-# Llama 3 local integration
-def query_llama_local(prompt, max_tokens=200):
-    """Query Llama 3 local model using ollama."""
-    try:
-        # Try using ollama if available
-        response = requests.post(
-            'http://localhost:11434/api/generate',
-            json={
-                'model': 'deepseek-r1:1.5b',  # Adjust model name as needed
-                'prompt': prompt,
-                'stream': False,
-                'options': {
-                    'num_predict': max_tokens,
-                    'temperature': 0.7
-                }
-            },
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            return result.get('response', '')
-        else:
-            return None
-            
-    except requests.exceptions.RequestException:
-        # Fallback to subprocess if ollama API is not available
-        try:
-            result = subprocess.run(
-                ['ollama', 'run', 'deepseek-r1:1.5b', prompt],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            if result.returncode == 0:
-                return result.stdout.strip()
-            else:
-                return None
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            return None
+# Enhanced main query processing function
+def process_user_query_enhanced(user_query):
+    """Enhanced main function that handles both college and general queries.
+
+    Answers are served from response_cache when the same normalized query
+    was answered since the last ingest; the generic fallback used when no
+    LLM is reachable is never cached.
+    """
+    cache_key = (normalize_query(user_query), db.generation)
+    response = response_cache.get(cache_key)
+    if response is not None:
+        print("Response served from cache")
+        return response
+    
+    response = answer_user_query(user_query)
+    if response is None:
+        return build_fallback_response(user_query)
+    
+    response_cache.put(cache_key, response)
+    return response
+
+def stream_user_query(user_query):
+    """Yield the answer to a query in pieces for /chat/stream.
+
+    Cached and database answers come out whole, straight away; LLM answers
+    are relayed token by token as the model produces them.
+    """
+    cache_key = (normalize_query(user_query), db.generation)
+    response = response_cache.get(cache_key)
+    if response is not None:
+        yield response
+        return
+    
+    response = answer_from_database(user_query)
+    if response is not None:
+        response_cache.put(cache_key, response)
+        yield response
+        return
+    
+    tokens = []
+    for token in llm_gateway.stream(build_general_prompt(user_query)):
+        tokens.append(token)
+        yield token
+    
+    if tokens:
+        response_cache.put(cache_key, ''.join(tokens))
+    else:
+        yield build_fallback_response(user_query)
+
+def answer_user_query(user_query):
+    """Route a query to the database handlers or the LLMs; None if no LLM answered."""
+    response = answer_from_database(user_query)
+    if response is not None:
+        return response
+    
+    # For general queries, try Llama 3 local first
+    print("Attempting to use Llama 3 local for general query...")
+    
+    # Ollama first; Cohere is started too if Ollama fails or is slow
+    llm_response = llm_gateway.generate(build_general_prompt(user_query))
+    
+    if llm_response:
+        print("LLM response generated successfully")
+        return llm_response
     
     return None
 
-# Enhanced main query processing function
-def process_user_query_enhanced(user_query):
-    """Enhanced main function that handles both college and general queries."""
+def answer_from_database(user_query):
+    """Answer college, cutoff and branch queries from the database; None for general questions."""
     detected_language = detect_language(user_query)
     
-    # First, classify the query type
-    query_type = classify_college_query(user_query)
+    # First, parse the query once: intent and every name and value in it
+    parsed = parse_user_query(user_query)
+    query_type = parsed.intent
     
     print(f"Query type: {query_type}")
     print(f"Language: {detected_language}")
     
+    # A student's rank or percentile with a category (or no college) asks which branches it gets into
+    if (parsed.rank is not None or parsed.percentile is not None) and (parsed.category or not parsed.college):
+        return process_eligibility_query(parsed.category, parsed.rank, parsed.percentile, parsed.stage,
+                                         parsed.academic_year, parsed.cap_round)
+    
     # Handle college-specific queries
     if query_type == 'college_search':
-        response = process_college_search(user_query)
+        response = process_college_search(user_query, parsed.search_terms)
         return response
     
-    elif query_type == 'cutoff_query':
-        college_name = extract_college_name(user_query)
-        branch_name = extract_branch_name(user_query)
-        response = process_cutoff_query(user_query, college_name, branch_name)
+    if query_type not in ('cutoff_query', 'college_info', 'branch_query'):
+        return None
+    
+    college_name = parsed.college
+    if not college_name and LLM_COLLEGE_EXTRACTION:
+        college_name = extract_college_name_with_llm(user_query)
+    # Missing names are passed on as '' so the handlers do not extract them again
+    college_name = college_name or ''
+    branch_name = parsed.branch or ''
+    
+    if query_type == 'cutoff_query':
+        response = process_cutoff_query(user_query, college_name, branch_name, parsed.category, parsed.stage,
+                                        parsed.academic_year, parsed.cap_round)
         return response
     
     elif query_type == 'college_info':
-        college_name = extract_college_name(user_query)
         response = process_college_info_query(user_query, college_name)
         return response
     
     elif query_type == 'branch_query':
-        college_name = extract_college_name(user_query)
-        branch_name = extract_branch_name(user_query)
         if college_name and branch_name:
-            response = process_cutoff_query(user_query, college_name, branch_name)
+            response = process_cutoff_query(user_query, college_name, branch_name, parsed.category, parsed.stage,
+                                            parsed.academic_year, parsed.cap_round)
         else:
             response = "I'd be happy to help with branch information! Please mention both the college and branch names."
         return response
     
-    # For general queries, try Llama 3 local first
-    print("Attempting to use Llama 3 local for general query...")
-    
-    # Create a context-aware prompt for Llama
-    context_prompt = f"""You are a helpful AI assistant. Answer this question directly without thinking out loud: "{user_query}"
+    return None
+
+def build_general_prompt(user_query):
+    """Prompt sent to the LLMs for general questions."""
+    return f"""You are a helpful AI assistant. Answer this question directly without thinking out loud: "{user_query}"
 
 If this is about engineering colleges in Maharashtra, mention I can help with specific college information from our database of 1,393+ colleges.
 
 Direct answer:"""
 
-    llama_response = query_llama_local(context_prompt)
-    
-    if llama_response:
-        print("Llama 3 local response generated successfully")
-        return llama_response
-    
-    # Fallback to Cohere if Llama is not available
-    if co:
-        print("Falling back to Cohere...")
-        try:
-            response = co.chat(
-                model="command-r-plus",
-                message=f"Answer this question helpfully: {user_query}",
-                max_tokens=150,
-                temperature=0.7
-            )
-            return response.text.strip()
-        except Exception as e:
-            print(f"Cohere error: {e}")
-    
-    # Final fallback
+def build_fallback_response(user_query):
+    """Final fallback."""
     return f"I understand you're asking about: {user_query}. I'm here to help! For college-specific questions, I can provide detailed information about 1,393+ colleges in Maharashtra. For general questions, I'm happy to assist as well."
 
 # Enhanced chat endpoint
@@ -1088,10 +1192,37 @@ def chat_enhanced():
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Chat answer as server-sent events.
+
+    Each "data:" event carries {"token": ...}; the stream ends with an
+    "event: done" message, or "event: error" if answering failed midway.
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "No data provided"}), 400
+
+    user_query = data.get('message', '')
+    if not user_query:
+        return jsonify({"error": "Please enter a valid query."}), 400
+
+    def events():
+        try:
+            for token in stream_user_query(user_query):
+                yield f"data: {json.dumps({'token': token})}\n\n"
+            yield "event: done\ndata: {}\n\n"
+        except Exception as e:
+            print(f"Error in chat stream: {e}")
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 # Keep existing endpoints for compatibility
 @app.route('/upload-pdf', methods=['POST'])
 def upload_pdf():
-    """Upload and parse PDF file."""
+    """Upload a PDF and queue it for background parsing and storage."""
     try:
         if 'file' not in request.files:
             return jsonify({"error": "No file provided"}), 400
@@ -1101,32 +1232,33 @@ def upload_pdf():
             return jsonify({"error": "No file selected"}), 400
         
         if file and allowed_file(file.filename):
+            # Unique name so concurrent uploads of the same file don't collide
             filename = secure_filename(file.filename)
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+            filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"{uuid.uuid4().hex}_{filename}")
             file.save(filepath)
             
-            # Parse the PDF
-            parsed_data = pdf_parser.parse_pdf(filepath)
-            
-            if parsed_data.get("parsing_success"):
-                # Store in database
-                success = db.store_parsed_data(parsed_data)
-                
-                # Clean up uploaded file
+            # Parse and store in the background; poll /jobs/<job_id> for progress
+            workers = clamp_workers(request.values.get('workers', app.config['PDF_PARSE_WORKERS'], type=int),
+                                    app.config['PDF_PARSE_WORKERS'])
+            # Re-uploads of an identical PDF replay the cached parse; ?cache=false forces a fresh parse
+            use_cache = request.values.get('cache', 'true').lower() != 'false'
+            cache_hit = use_cache and pdf_parser.cache.contains(filepath, pdf_parser.parser_version)
+            # ?year=2025&round=1 override the academic year and CAP round printed in the PDF;
+            # ?diff=true writes only the rows that changed since that round was last uploaded
+            job_id = ingest_jobs.submit(filepath, filename, workers=workers, use_cache=use_cache,
+                                        academic_year=request.values.get('year', type=int),
+                                        cap_round=request.values.get('round', type=int),
+                                        diff=request.values.get('diff', 'false').lower() == 'true')
+            if not job_id:
                 os.remove(filepath)
-                
-                if success:
-                    return jsonify({
-                        "message": "PDF parsed and stored successfully",
-                        "total_colleges": parsed_data.get("total_colleges"),
-                        "total_branches": parsed_data.get("total_branches"),
-                        "total_cutoffs": parsed_data.get("total_cutoffs"),
-                        "colleges": parsed_data.get("colleges", [])
-                    })
-                else:
-                    return jsonify({"error": "Failed to store data in database"}), 500
-            else:
-                return jsonify({"error": "Failed to parse PDF"}), 500
+                return jsonify({"error": "Failed to queue PDF for parsing"}), 500
+            
+            return jsonify({
+                "message": "PDF queued for parsing",
+                "job_id": job_id,
+                "status_url": f"/jobs/{job_id}",
+                "parse_cache_hit": cache_hit
+            }), 202
         else:
             return jsonify({"error": "Invalid file type. Only PDF files are allowed."}), 400
         
@@ -1134,42 +1266,32 @@ def upload_pdf():
         print(f"Error in PDF upload: {e}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/colleges', methods=['GET'])
-def get_colleges():
-    """Get list of all colleges in database."""
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_ingest_job(job_id):
+    """Get progress of a background PDF ingestion job."""
     try:
-        query = request.args.get('search', '')
-        if query:
-            colleges = db.search_colleges(query)
-        else:
-            colleges = db.search_colleges('')
-        
-        return jsonify({"colleges": colleges})
+        job = ingest_jobs.get(job_id)
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify(job)
         
     except Exception as e:
-        print(f"Error getting colleges: {e}")
+        print(f"Error getting ingest job: {e}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/college/<college_code>', methods=['GET'])
-def get_college_details(college_code):
-    """Get detailed information about a specific college."""
-    try:
-        college_data = db.get_college_data(college_code=college_code)
-        
-        if not college_data:
-            return jsonify({"error": "College not found"}), 404
-        
-        return jsonify(college_data)
-        
-    except Exception as e:
-        print(f"Error getting college details: {e}")
-        return jsonify({"error": str(e)}), 500
+# College lookups, listings and /batch (college_api.py); /batch also answers chat messages
+college_api = CollegeAPI(db, http_cache, answer_chat=process_user_query_enhanced, max_batch_items=MAX_BATCH_ITEMS)
+app.register_blueprint(college_api.blueprint)
 
 @app.route('/database-stats', methods=['GET'])
 def get_database_stats():
     """Get database statistics."""
     try:
         stats = db.get_database_stats()
+        stats['parse_cache'] = pdf_parser.cache.get_stats()
+        stats['http_cache'] = http_cache.get_stats()
+        stats['response_cache'] = response_cache.get_stats()
+        stats['llm'] = llm_gateway.get_stats()
         return jsonify(stats)
         
     except Exception as e:
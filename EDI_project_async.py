@@ -0,0 +1,222 @@
+"""
+ASGI variant of the enhanced chat server, for many concurrent chats per process.
+
+    uvicorn EDI_project_async:app --host 0.0.0.0 --port 5002
+
+/chat, /chat/stream and /database-stats are asyncio handlers: LLM calls go
+through AsyncLLMGateway (httpx for Ollama, cohere.AsyncClient for Cohere)
+and database work runs on a thread pool sized to the SQLite connection
+pool, so a chat waiting on a model holds no thread. Every other endpoint is
+the Flask app from EDI_project_enhanced.py, mounted unchanged, and both
+share its database, caches and ingest queue.
+"""
+
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+
+import cohere
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route
+
+import EDI_project_enhanced as flask_server
+from EDI_project_enhanced import (
+    ENTITY_QUERY_TYPES, LLM_COLLEGE_EXTRACTION, answer_entity_query, build_college_name_prompt,
+    build_fallback_response, build_general_prompt, db, detect_language, ingest_jobs, is_eligibility_query,
+    match_college_name, parse_user_query, pdf_parser, process_college_search, process_eligibility_query,
+    response_cache
+)
+from llm_gateway import AsyncLLMGateway, CohereProvider, OllamaProvider
+from response_cache import normalize_query
+
+cohere_api_key = os.getenv('COHERE_API_KEY')
+
+async_llm_gateway = AsyncLLMGateway(
+    [OllamaProvider(os.getenv('OLLAMA_URL', 'http://localhost:11434'), os.getenv('OLLAMA_MODEL', 'gemma3:1b'),
+                    pool_size=int(os.getenv('LLM_MAX_CONNECTIONS', '64')))]
+    + ([CohereProvider(cohere.AsyncClient(cohere_api_key))] if cohere_api_key else []),
+    deadline=float(os.getenv('LLM_DEADLINE_SECONDS', '20')),
+    hedge_delay=float(os.getenv('LLM_HEDGE_DELAY_SECONDS', '3'))
+)
+
+# SQLite work can only use as many threads as the pool has connections
+db_executor = ThreadPoolExecutor(max_workers=db.pool.pool_size, thread_name_prefix='db')
+
+async def run_db(func, *args, **kwargs):
+    """Run blocking database work on the database thread pool."""
+    return await asyncio.get_running_loop().run_in_executor(db_executor, partial(func, *args, **kwargs))
+
+async def extract_college_name_async(query):
+    """extract_college_name without blocking: gazetteer match on the DB pool, then Cohere through the async gateway."""
+    college_name = await run_db(match_college_name, query)
+    if college_name or not LLM_COLLEGE_EXTRACTION:
+        return college_name
+    return await extract_college_name_with_llm_async(query)
+
+async def extract_college_name_with_llm_async(query):
+    """extract_college_name_with_llm through the async gateway."""
+    college_name = await async_llm_gateway.agenerate(
+        build_college_name_prompt(query),
+        max_tokens=20,
+        temperature=0.1,
+        providers=['cohere']
+    )
+    if college_name and college_name.strip().lower() != 'none':
+        return college_name.strip()
+    return None
+
+async def answer_from_database_async(user_query):
+    """answer_from_database with the LLM extraction awaited and the parse and lookups on the DB pool.
+
+    Parsing reads the gazetteer, which is rebuilt from SQLite after an
+    ingest, so it never runs on the event loop.
+    """
+    parsed = await run_db(parse_user_query, user_query)
+    query_type = parsed.intent
+    print(f"Query type: {query_type}")
+    print(f"Language: {await run_db(detect_language, user_query)}")
+
+    if is_eligibility_query(parsed):
+        return await run_db(process_eligibility_query, parsed.category, parsed.rank, parsed.percentile,
+                            parsed.stage, parsed.academic_year, parsed.cap_round)
+
+    if query_type == 'college_search':
+        return await run_db(process_college_search, user_query, parsed.search_terms)
+
+    if query_type in ENTITY_QUERY_TYPES:
+        college_name = parsed.college
+        if not college_name and LLM_COLLEGE_EXTRACTION:
+            college_name = await extract_college_name_with_llm_async(user_query)
+        return await run_db(answer_entity_query, user_query, query_type, college_name, parsed.branch,
+                            parsed.category, parsed.stage, parsed.academic_year, parsed.cap_round)
+
+    return None
+
+async def process_user_query_async(user_query):
+    """process_user_query_enhanced for the event loop, sharing its response cache."""
+    cache_key = (normalize_query(user_query), db.generation)
+    response = response_cache.get(cache_key)
+    if response is not None:
+        return response
+
+    response = await answer_from_database_async(user_query)
+    if response is None:
+        response = await async_llm_gateway.agenerate(build_general_prompt(user_query))
+    if response is None:
+        return build_fallback_response(user_query)
+
+    response_cache.put(cache_key, response)
+    return response
+
+async def stream_user_query_async(user_query):
+    """stream_user_query for the event loop: whole cached/database answers, LLM answers token by token."""
+    cache_key = (normalize_query(user_query), db.generation)
+    response = response_cache.get(cache_key)
+    if response is not None:
+        yield response
+        return
+
+    response = await answer_from_database_async(user_query)
+    if response is not None:
+        response_cache.put(cache_key, response)
+        yield response
+        return
+
+    tokens = []
+    async for token in async_llm_gateway.astream(build_general_prompt(user_query)):
+        tokens.append(token)
+        yield token
+
+    if tokens:
+        response_cache.put(cache_key, ''.join(tokens))
+    else:
+        yield build_fallback_response(user_query)
+
+async def read_message(request):
+    """The chat message from a JSON body, or an error response."""
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if not data or not isinstance(data, dict):
+        return None, JSONResponse({"error": "No data provided"}, status_code=400)
+
+    user_query = data.get('message', '')
+    if not user_query:
+        return None, JSONResponse({"error": "Please enter a valid query."}, status_code=400)
+    return user_query, None
+
+async def chat(request):
+    user_query, error = await read_message(request)
+    if error:
+        return error
+
+    try:
+        response = await process_user_query_async(user_query)
+        return JSONResponse({"response": response})
+    except Exception as e:
+        print(f"Error in async chat endpoint: {e}")
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+async def chat_stream(request):
+    """Chat answer as server-sent events, in the same format as the Flask /chat/stream."""
+    user_query, error = await read_message(request)
+    if error:
+        return error
+
+    async def events():
+        try:
+            async for token in stream_user_query_async(user_query):
+                yield f"data: {json.dumps({'token': token})}\n\n"
+            yield "event: done\ndata: {}\n\n"
+        except Exception as e:
+            print(f"Error in async chat stream: {e}")
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+
+    return StreamingResponse(events(), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+async def database_stats(request):
+    try:
+        stats = await run_db(db.get_database_stats)
+        stats['parse_cache'] = pdf_parser.cache.get_stats()
+        stats['http_cache'] = flask_server.http_cache.get_stats()
+        stats['response_cache'] = response_cache.get_stats()
+        stats['llm'] = async_llm_gateway.get_stats()
+        return JSONResponse(stats)
+    except Exception as e:
+        print(f"Error getting database stats: {e}")
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+@asynccontextmanager
+async def lifespan(app):
+    ingest_jobs.start()
+    yield
+    await async_llm_gateway.aclose()
+    db_executor.shutdown(wait=False)
+
+app = Starlette(
+    routes=[
+        Route('/chat', chat, methods=['POST']),
+        Route('/chat/stream', chat_stream, methods=['POST']),
+        Route('/database-stats', database_stats, methods=['GET']),
+        # Uploads, jobs, colleges, eligibility, batch and health stay on Flask
+        Mount('/', app=WSGIMiddleware(flask_server.app))
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],
+    lifespan=lifespan
+)
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print("🌐 Async server will be available at: http://localhost:5002")
+    print("💬 Chat endpoints: POST /chat, POST /chat/stream")
+    uvicorn.run(app, host='0.0.0.0', port=5002)
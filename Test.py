@@ -165,12 +165,12 @@
 
 import re
 import json
-from fuzzywuzzy import process, fuzz
 from typing import Dict, List
 import cohere
 from argostranslate import package, translate
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from fuzzy_index import TrigramIndex
 app = Flask(__name__)
 CORS(app)  # Enable CORS for cross-origin requests
 
@@ -206,13 +206,23 @@ def match_college_name(college_name, dataset):
         return college_data
 
     # Use fuzzy matching as a fallback
-    college_names = [college['name'] for college in dataset]
-    best_match, score = process.extractOne(college_name, college_names, scorer=fuzz.token_set_ratio)
-    if score > 75:  # Match threshold
-        return next((college for college in dataset if college['name'] == best_match), None)
+    matches = college_name_index(dataset).search(college_name, limit=1, min_score=75)  # Match threshold
+    if matches:
+        return dataset[matches[0][0]]
 
     return None
 
+_name_index = (None, None)
+
+def college_name_index(dataset):
+    """Trigram index over the dataset's college names, built once per dataset."""
+    global _name_index
+    indexed_dataset, index = _name_index
+    if indexed_dataset is not dataset:
+        index = TrigramIndex((i, college['name']) for i, college in enumerate(dataset))
+        _name_index = (dataset, index)
+    return index
+
 # Setup translation languages for Argos Translate
 def setup_translation():
     package.update_package_index()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass college/branch segmenter against the previous
+line-splitting, re-scanning parser on cutoff.pdf, and check both give
+identical output.
+
+Text extraction is done once up front so only the parsing stage is timed.
+"""
+
+import logging
+import os
+import re
+import sys
+import time
+from typing import Dict, List
+
+from pdf_parser import EnhancedCollegeParser
+
+class LegacyCollegeParser(EnhancedCollegeParser):
+    """The segmentation code as it was before the single-pass rewrite."""
+
+    def extract_colleges(self, text: str) -> List[Dict]:
+        colleges = []
+        lines = text.split('\n')
+
+        college_lines = []
+        for i, line in enumerate(lines):
+            line = line.strip()
+            if not line:
+                continue
+            match = re.match(r'^(\d{5})\s*-\s*(.+)$', line)
+            if match:
+                college_lines.append((i, match.group(1), match.group(2).strip()))
+
+        for i, (line_index, college_code, college_name) in enumerate(college_lines):
+            try:
+                start_line = line_index
+                end_line = len(lines)
+                if i + 1 < len(college_lines):
+                    end_line = college_lines[i + 1][0]
+
+                college_section = '\n'.join(lines[start_line:end_line])
+                branches = self.extract_branches_for_college(college_section)
+
+                colleges.append({
+                    'college_code': college_code,
+                    'college_name': college_name,
+                    'branches': branches,
+                    'total_branches': len(branches)
+                })
+            except Exception:
+                continue
+
+        return colleges
+
+    def extract_branches_for_college(self, college_section: str, start: int = 0, end: int = None) -> List[Dict]:
+        branches = []
+
+        for match in re.finditer(self.branch_pattern, college_section):
+            try:
+                branch_code = match.group(1)
+                branch_name = match.group(2).strip()
+
+                start_pos = match.end()
+                next_match = re.search(self.branch_pattern, college_section[start_pos:])
+                if next_match:
+                    end_pos = start_pos + next_match.start()
+                else:
+                    end_pos = len(college_section)
+
+                branch_section = college_section[start_pos:end_pos]
+
+                status_match = re.search(self.status_pattern, branch_section)
+                status = status_match.group(1).strip() if status_match else "Unknown"
+
+                cutoff_data = self.extract_cutoff_data(branch_section)
+
+                branches.append({
+                    'branch_code': branch_code,
+                    'branch_name': branch_name,
+                    'status': status,
+                    'cutoff_data': cutoff_data
+                })
+            except Exception:
+                continue
+
+        return branches
+
+def time_parse(parser, text, runs):
+    """Return (best seconds, result) over several runs."""
+    best = None
+    result = None
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        result = parser.extract_colleges(text)
+        elapsed = time.perf_counter() - start_time
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def benchmark(pdf_path="cutoff.pdf", runs=5):
+    """Benchmark both segmenters on the extracted text of pdf_path."""
+    if not os.path.exists(pdf_path):
+        print(f"❌ PDF file not found: {pdf_path}")
+        return None
+
+    # Keep DEBUG logging out of the timings
+    logging.disable(logging.CRITICAL)
+
+    print(f"📄 Extracting text from {pdf_path}...")
+    start_time = time.perf_counter()
+    text = EnhancedCollegeParser().extract_text_from_pdf(pdf_path)
+    print(f"   Extraction: {time.perf_counter() - start_time:.2f} seconds, {len(text):,} characters")
+
+    legacy_time, legacy_result = time_parse(LegacyCollegeParser(), text, runs)
+    new_time, new_result = time_parse(EnhancedCollegeParser(), text, runs)
+
+    # A college with many branches shows the quadratic re-scan most clearly
+    wide_college = "01002 - Wide College\n" + "".join(
+        f"{1000000000 + i} - Branch {i}\nStatus: Test\nState Level\n" for i in range(3000)
+    )
+    wide_legacy_time, wide_legacy = time_parse(LegacyCollegeParser(), wide_college, 1)
+    wide_new_time, wide_new = time_parse(EnhancedCollegeParser(), wide_college, 1)
+
+    logging.disable(logging.NOTSET)
+
+    identical = legacy_result == new_result and wide_legacy == wide_new
+    print(f"\n📊 Parse stage on {pdf_path} (best of {runs}):")
+    print(f"  - Legacy segmenter:      {legacy_time * 1000:8.1f} ms")
+    print(f"  - Single-pass segmenter: {new_time * 1000:8.1f} ms")
+    print(f"  - Speedup:               {legacy_time / new_time:8.2f}x")
+    print(f"\n📊 One college with 3,000 branches:")
+    print(f"  - Legacy segmenter:      {wide_legacy_time * 1000:8.1f} ms")
+    print(f"  - Single-pass segmenter: {wide_new_time * 1000:8.1f} ms")
+    print(f"  - Speedup:               {wide_legacy_time / wide_new_time:8.2f}x")
+    print(f"\n{'✅' if identical else '❌'} Identical output: {identical} ({len(new_result)} colleges)")
+
+    return identical
+
+if __name__ == "__main__":
+    ok = benchmark(*sys.argv[1:2])
+    sys.exit(0 if ok else 1)
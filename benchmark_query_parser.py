@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass QueryParser against the previous keyword scans
+and regex lists on the labelled queries in query_corpus.json: field-by-field
+accuracy and parse throughput.
+
+Colleges are compared as resolved college codes. The legacy extractor's
+pattern text is resolved the way its chat handler did, with the first
+search result; Cohere extraction is left out of both sides.
+"""
+
+import json
+import logging
+import re
+import sys
+import time
+
+from database import CollegeDatabase
+from query_parser import QueryParser
+
+FIELDS = ('intent', 'college', 'branch', 'category', 'stage', 'cap_round', 'rank', 'percentile')
+
+class LegacyQueryClassifier:
+    """classify_college_query, extract_branch_name and the college pattern list as they were."""
+
+    def classify(self, user_query):
+        query_lower = user_query.lower()
+        if any(word in query_lower for word in ['find', 'search', 'which', 'what colleges', 'colleges in', 'colleges near']):
+            return 'college_search'
+        if any(word in query_lower for word in ['cutoff', 'rank', 'percentage', 'admission', 'eligibility']):
+            return 'cutoff_query'
+        if any(word in query_lower for word in ['branch', 'course', 'stream', 'department']):
+            return 'branch_query'
+        if any(word in query_lower for word in ['info', 'details', 'about', 'tell me about']):
+            return 'college_info'
+        if any(word in query_lower for word in ['compare', 'vs', 'versus', 'difference']):
+            return 'comparison_query'
+        return 'general_query'
+
+    def college(self, query):
+        college_patterns = [r'COEP', r'PICT', r'VIT', r'SPIT', r'DJ Sanghvi', r'Thadomal Shahani',
+                            r'Government College of Engineering', r'Walchand College', r'MIT',
+                            r'Pune University', r'University of Mumbai']
+        for pattern in college_patterns:
+            match = re.search(pattern, query, re.IGNORECASE)
+            if match:
+                return match.group(0)
+        return None
+
+    def branch(self, query):
+        branch_patterns = [r'Computer Science', r'Information Technology', r'Mechanical Engineering',
+                           r'Electrical Engineering', r'Electronics', r'Civil Engineering', r'Chemical Engineering',
+                           r'Biotechnology', r'AI/ML', r'Data Science']
+        for pattern in branch_patterns:
+            match = re.search(pattern, query, re.IGNORECASE)
+            if match:
+                return match.group(0)
+        return None
+
+    def parse(self, query):
+        return {'intent': self.classify(query), 'college': self.college(query), 'branch': self.branch(query)}
+
+def resolve_college(db, name):
+    """College code the chat handlers would answer about for an extracted name."""
+    if not name:
+        return None
+    colleges = db.search_colleges(name, limit=1)
+    return colleges[0]['college_code'] if colleges else None
+
+def load_corpus(path='query_corpus.json'):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def score(corpus, predictions):
+    """Share of queries where each field (and every field) matches the label."""
+    correct = {field: 0 for field in FIELDS}
+    all_correct = 0
+    for example, predicted in zip(corpus, predictions):
+        matches = [predicted.get(field) == example.get(field) for field in FIELDS]
+        for field, match in zip(FIELDS, matches):
+            correct[field] += match
+        all_correct += all(matches)
+    accuracy = {field: count / len(corpus) for field, count in correct.items()}
+    accuracy['all'] = all_correct / len(corpus)
+    return accuracy
+
+def predict_legacy(db, corpus):
+    legacy = LegacyQueryClassifier()
+    predictions = []
+    for example in corpus:
+        parsed = legacy.parse(example['query'])
+        if parsed['branch']:
+            parsed['branch'] = parsed['branch'].title()
+        parsed['college'] = resolve_college(db, parsed['college'])
+        predictions.append(parsed)
+    return predictions
+
+def predict_parser(db, corpus, parser, gazetteer):
+    predictions = []
+    for example in corpus:
+        parsed = parser.parse(example['query'], gazetteer)._asdict()
+        parsed['college'] = parsed['college_code'] or resolve_college(db, parsed['college'])
+        predictions.append(parsed)
+    return predictions
+
+def throughput(parse, queries, seconds=0.5):
+    """Queries parsed per second, over repeated passes through the corpus."""
+    count = 0
+    start_time = time.perf_counter()
+    while time.perf_counter() - start_time < seconds:
+        for query in queries:
+            parse(query)
+        count += len(queries)
+    return count / (time.perf_counter() - start_time)
+
+def benchmark(db_path='college_cutoffs.db', corpus_path='query_corpus.json'):
+    logging.disable(logging.CRITICAL)
+    db = CollegeDatabase(db_path)
+    corpus = load_corpus(corpus_path)
+    queries = [example['query'] for example in corpus]
+    parser = QueryParser()
+    gazetteer = db.get_college_gazetteer()
+
+    legacy_accuracy = score(corpus, predict_legacy(db, corpus))
+    parser_accuracy = score(corpus, predict_parser(db, corpus, parser, gazetteer))
+    legacy = LegacyQueryClassifier()
+    legacy_rate = throughput(legacy.parse, queries)
+    parser_rate = throughput(lambda query: parser.parse(query, gazetteer), queries)
+    db.close()
+    logging.disable(logging.NOTSET)
+
+    print(f"\n📊 Accuracy on {len(corpus)} labelled queries ({corpus_path}):")
+    print(f"  {'field':<12}{'legacy':>10}{'parser':>10}")
+    for field in FIELDS + ('all',):
+        print(f"  {field:<12}{legacy_accuracy[field]:>10.1%}{parser_accuracy[field]:>10.1%}")
+    print(f"\n📊 Throughput (intent, college, branch and values per query):")
+    print(f"  - Legacy scans and regex lists: {legacy_rate:>10,.0f} queries/s")
+    print(f"  - Single-pass parser:           {parser_rate:>10,.0f} queries/s")
+    return parser_accuracy
+
+if __name__ == "__main__":
+    accuracy = benchmark(*sys.argv[1:3])
+    sys.exit(0 if accuracy['intent'] >= 0.95 else 1)
@@ -0,0 +1,253 @@
+"""
+College read endpoints and /batch, shared by the Flask servers.
+
+CollegeAPI holds the views for /colleges, /colleges/match, /college/<code>
+(plus /summary and /history) and /batch on one Blueprint, so
+EDI_project.py, EDI_project_enhanced.py and simple_pdf_server.py register
+the same code instead of keeping copies:
+
+    college_api = CollegeAPI(db, http_cache, answer_chat=process_user_query_enhanced)
+    app.register_blueprint(college_api.blueprint)
+
+The read views go through the server's HTTPCache. answer_chat, when given,
+lets /batch answer chat messages as /chat would; servers without chat leave
+it out and /batch takes only colleges and searches.
+"""
+
+import os
+from typing import Callable, Dict, List, Optional
+
+from flask import Blueprint, jsonify, request
+
+from college_gazetteer import FUZZY_MIN_SCORE
+from database import DEFAULT_COLLEGE_FIELDS, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+MAX_BATCH_ITEMS = int(os.getenv('MAX_BATCH_ITEMS', '500'))  # per /batch request
+
+class CollegeAPI:
+    """The college lookup, listing and batch views of one server, on a Blueprint."""
+
+    def __init__(self, db, http_cache, answer_chat: Optional[Callable[[str], str]] = None,
+                 max_batch_items: int = MAX_BATCH_ITEMS):
+        self.db = db
+        self.answer_chat = answer_chat
+        self.max_batch_items = max_batch_items
+        self.blueprint = Blueprint('college_api', __name__)
+
+        routes = [
+            ('/colleges', self.get_colleges, ['GET'], True),
+            ('/colleges/match', self.match_names, ['GET'], False),
+            ('/college/<college_code>', self.get_college_details, ['GET'], True),
+            ('/college/<college_code>/summary', self.get_branch_summaries, ['GET'], True),
+            ('/college/<college_code>/history', self.get_cutoff_history, ['GET'], True),
+            ('/batch', self.batch_lookup, ['POST'], False)
+        ]
+        for rule, view, methods, cached in routes:
+            self.blueprint.add_url_rule(rule, view_func=http_cache.cached(view) if cached else view,
+                                        methods=methods)
+
+    def get_colleges(self):
+        """List or search colleges, one page at a time.
+
+        Without search, pages are keyset seeks: limit (default 50, at most 500),
+        cursor (the previous page's next_cursor) and sort (college_code or
+        college_name, prefixed with '-' for descending). With search (or an
+        offset), results are paged by limit/offset. fields=college_code,branch_count
+        picks the fields returned; summary=true adds branch_count and
+        cutoff_count. Served through http_cache, so If-None-Match is answered
+        with 304 until the next ingest.
+        """
+        try:
+            query = request.args.get('search', '').strip()
+            limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+            fields = [f for f in request.args.get('fields', '').split(',') if f] or list(DEFAULT_COLLEGE_FIELDS)
+            if request.args.get('summary', 'false').lower() == 'true':
+                fields += ['branch_count', 'cutoff_count']
+
+            if query or 'offset' in request.args:
+                colleges = self.db.search_colleges(query, limit=max(1, min(limit, MAX_PAGE_SIZE)),
+                                                   offset=max(0, request.args.get('offset', 0, type=int)))
+                page = {"colleges": self.db.select_college_fields(colleges, fields)}
+            else:
+                page = self.db.list_colleges(limit=limit, cursor=request.args.get('cursor') or None,
+                                             sort=request.args.get('sort', 'college_code'), fields=fields)
+
+            return jsonify(page)
+
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            print(f"Error getting colleges: {e}")
+            return jsonify({"error": str(e)}), 500
+
+    def match_names(self):
+        """Typo-tolerant college and branch name matches with scores.
+
+        Query args: name (required), limit (default 5), min_score (0-100,
+        default 60).
+        """
+        try:
+            name = request.args.get('name', '').strip()
+            if not name:
+                return jsonify({"error": "Please provide a name to match"}), 400
+
+            matches = self.db.match_names(
+                name,
+                limit=request.args.get('limit', 5, type=int),
+                min_score=request.args.get('min_score', FUZZY_MIN_SCORE, type=float)
+            )
+            return jsonify(matches)
+
+        except Exception as e:
+            print(f"Error matching names: {e}")
+            return jsonify({"error": str(e)}), 500
+
+    def get_college_details(self, college_code):
+        """Get detailed information about a specific college.
+
+        Optional query args: stages=I,II  categories=GOPENS,TFWS  cutoffs=false
+        year=2024 round=3 (default: the latest CAP round)
+        """
+        try:
+            stages = [s for s in request.args.get('stages', '').split(',') if s]
+            categories = [c for c in request.args.get('categories', '').split(',') if c]
+            include_cutoffs = request.args.get('cutoffs', 'true').lower() != 'false'
+
+            college_data = self.db.get_college_data(
+                college_code=college_code,
+                include_cutoffs=include_cutoffs,
+                stages=stages or None,
+                categories=categories or None,
+                academic_year=request.args.get('year', type=int),
+                cap_round=request.args.get('round', type=int)
+            )
+
+            if not college_data:
+                return jsonify({"error": "College not found"}), 404
+
+            return jsonify(college_data)
+
+        except Exception as e:
+            print(f"Error getting college details: {e}")
+            return jsonify({"error": str(e)}), 500
+
+    def get_branch_summaries(self, college_code):
+        """Closing rank per category, percentage range and cutoff/stage counts for each branch.
+
+        Optional query args: year=2024 round=3 (default: the latest CAP round)
+        """
+        try:
+            summary = self.db.get_branch_summaries(
+                [college_code],
+                academic_year=request.args.get('year', type=int),
+                cap_round=request.args.get('round', type=int)
+            ).get(college_code)
+
+            if not summary:
+                return jsonify({"error": "College not found"}), 404
+
+            return jsonify(summary)
+
+        except Exception as e:
+            print(f"Error getting branch summaries: {e}")
+            return jsonify({"error": str(e)}), 500
+
+    def get_cutoff_history(self, college_code):
+        """Cutoffs of a college across academic years and CAP rounds, oldest first.
+
+        Optional query args: branch=<branch code>  category=GOPENS  stage=I
+        """
+        try:
+            history = self.db.get_cutoff_history(
+                college_code,
+                branch_code=request.args.get('branch') or None,
+                category=request.args.get('category') or None,
+                stage=request.args.get('stage') or None
+            )
+            return jsonify({"college_code": college_code, "history": history})
+
+        except Exception as e:
+            print(f"Error getting cutoff history: {e}")
+            return jsonify({"error": str(e)}), 500
+
+    def batch_lookup(self):
+        """Resolve many college lookups, searches and chat messages in one call.
+
+        JSON body: {"colleges": ["16006", ...], "searches": ["pune", {"query": "coep", "limit": 5}, ...],
+        "messages": ["cutoff for COEP computer", ...]} plus the /college projection
+        options "stages", "categories" and "cutoffs". "messages" is only taken
+        by servers with chat. College lookups are resolved together; every
+        result list lines up with its input and a failed item carries an
+        "error" instead of failing the whole batch.
+        """
+        try:
+            data = request.get_json(silent=True)
+            if not isinstance(data, dict):
+                return jsonify({"error": "No data provided"}), 400
+
+            keys = ('colleges', 'searches', 'messages') if self.answer_chat else ('colleges', 'searches')
+            groups = {key: data.get(key) or [] for key in keys}
+            for key, items in groups.items():
+                if not isinstance(items, list):
+                    return jsonify({"error": f"'{key}' must be a list"}), 400
+            total_items = sum(len(items) for items in groups.values())
+            if total_items > self.max_batch_items:
+                return jsonify({"error": f"A batch may hold at most {self.max_batch_items} items"}), 400
+
+            results = {
+                "colleges": self.batch_college_details(groups['colleges'], data),
+                "searches": [self.batch_search(item) for item in groups['searches']]
+            }
+            if self.answer_chat:
+                results["messages"] = [self.batch_chat(item) for item in groups['messages']]
+            return jsonify(results)
+
+        except Exception as e:
+            print(f"Error in batch endpoint: {e}")
+            return jsonify({"error": str(e)}), 500
+
+    def batch_college_details(self, codes: List, options: Dict) -> List[Dict]:
+        """College details for /batch, fetched with one set-based lookup."""
+        stages, categories = options.get('stages') or None, options.get('categories') or None
+        # Same comma-separated form as the /college query args, or a JSON list
+        if isinstance(stages, str):
+            stages = [s for s in stages.split(',') if s] or None
+        if isinstance(categories, str):
+            categories = [c for c in categories.split(',') if c] or None
+        include_cutoffs = options.get('cutoffs', True) is not False
+
+        valid_codes = [str(code) for code in codes if isinstance(code, (str, int)) and str(code).strip()]
+        found = self.db.get_colleges_data(valid_codes, include_cutoffs=include_cutoffs,
+                                          stages=stages, categories=categories) if valid_codes else {}
+
+        results = []
+        for code in codes:
+            if not isinstance(code, (str, int)) or not str(code).strip():
+                results.append({"college_code": code, "error": "Invalid college code"})
+            elif found.get(str(code)):
+                results.append({"college_code": str(code), "college": found[str(code)]})
+            else:
+                results.append({"college_code": str(code), "error": "College not found"})
+        return results
+
+    def batch_search(self, item) -> Dict:
+        """One /batch search: a query string or {"query", "limit", "offset"}."""
+        if isinstance(item, str):
+            item = {"query": item}
+        if not isinstance(item, dict) or not isinstance(item.get('query'), str):
+            return {"search": item, "error": "A search needs a query string"}
+        try:
+            colleges = self.db.search_colleges(item['query'], limit=item.get('limit'),
+                                               offset=max(0, int(item.get('offset') or 0)))
+            return {"search": item, "colleges": colleges}
+        except Exception as e:
+            return {"search": item, "error": str(e)}
+
+    def batch_chat(self, message) -> Dict:
+        """One /batch chat message, answered like /chat."""
+        if not isinstance(message, str) or not message.strip():
+            return {"message": message, "error": "Please enter a valid query."}
+        try:
+            return {"message": message, "response": self.answer_chat(message)}
+        except Exception as e:
+            return {"message": message, "error": str(e)}
@@ -0,0 +1,250 @@
+"""
+Local college-name extractor: a token trie over every name, acronym and
+alias of the colleges in the database.
+
+CollegeGazetteer.find() scans a query once and returns the longest alias it
+contains together with the college(s) that alias names, so the chat server
+can resolve "PICT cutoff" or "tell me about Walchand College" without an LLM
+round-trip. It is built from the colleges table and rebuilt by
+CollegeDatabase.get_college_gazetteer() whenever an ingest moves the
+database generation.
+
+The same object carries trigram indexes over the college and branch names
+(fuzzy_index.TrigramIndex) for typo-tolerant lookups that return scored
+candidates.
+"""
+
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from cutoff_snapshot import tokenize
+from fuzzy_index import TrigramIndex
+
+# Alias kinds, strongest first: when two kinds claim the same alias only the strongest is kept.
+# SHORT_FORM covers derived acronyms and the words before "College"/"Institute" in a name.
+FULL_NAME, NAME_PART, SHORT_FORM = 0, 1, 2
+
+# Names students use that cannot be derived from the official name: alias -> phrase in the official name
+KNOWN_ALIASES = {
+    'dj sanghvi': 'dwarkadas j sanghvi',
+    'djs': 'dwarkadas j sanghvi',
+    'thadomal shahani': 'thadomal shahani',
+    'thadomal': 'thadomal shahani',
+    'walchand college': 'walchand college',
+    'walchand': 'walchand',
+    'government college of engineering': 'government college of engineering',
+    'pune university': 'savitribai phule pune university',
+    'university of mumbai': 'university of mumbai',
+    'mumbai university': 'university of mumbai'
+}
+
+# Words that are never taken as a college acronym, even when one spells them
+EXCLUDED_ALIASES = {
+    'the', 'and', 'for', 'are', 'can', 'how', 'who', 'why', 'all', 'any', 'get', 'got', 'set', 'has', 'had',
+    'was', 'not', 'but', 'you', 'your', 'our', 'its', 'may', 'top', 'best', 'list', 'show', 'give', 'tell',
+    'what', 'which', 'with', 'from', 'near', 'info', 'about', 'rank', 'cap', 'cet', 'mht', 'jee', 'open',
+    'obc', 'tfws', 'ews', 'sebc', 'pwd', 'def', 'gen', 'cse', 'ece', 'eee', 'ent', 'mca', 'mba', 'bca',
+    'bba', 'mech', 'civil', 'chem', 'aids', 'aiml', 'data', 'btech', 'mtech', 'tech', 'eng', 'engg', 'pune',
+    'mumbai', 'nagpur', 'nashik', 'new', 'modern', 'national', 'shri', 'shree', 'smt', 'late', 'sant'
+}
+
+# Words that start the generic half of a name ("Sinhgad | College of Engineering")
+_INSTITUTION_WORDS = {
+    'college', 'institute', 'university', 'academy', 'school', 'polytechnic', 'engineering', 'technology',
+    'technological', 'institution', 'institutions', 'group', 'faculty', 'centre', 'center', 'department'
+}
+
+# Words skipped in the short form of an acronym ("Pune Institute of Computer Technology" -> PICT)
+_ACRONYM_SKIP = {'of', 'and', 'the', 'for', 'in', 'at', 'a', 's'}
+
+# Comma, possessive ("...Society's"), bracket and dash boundaries between the parts of a name
+_NAME_PART_RE = re.compile(r",|'s\b|’s\b|\(|\)|\s-\s")
+_WORD_RE = re.compile(r"[^\W_]+")
+_ACRONYM_RE = re.compile(r"[A-Z][A-Z0-9]{2,}")
+
+# Fuzzy matches scoring below this share of the query's trigrams (0-100) are dropped
+FUZZY_MIN_SCORE = 60.0
+
+# A name part must contain a word used by at most this share of college names to be an alias
+DISTINCTIVE_SHARE = 0.05
+
+class GazetteerMatch(NamedTuple):
+    """An alias found in a query and the colleges it names, as (college_code, college_name) pairs."""
+    alias: str
+    start: int
+    end: int
+    colleges: Tuple[Tuple[str, str], ...]
+
+    @property
+    def college(self) -> Optional[Tuple[str, str]]:
+        """The college named, or None when the alias is shared by several colleges."""
+        return self.colleges[0] if len(self.colleges) == 1 else None
+
+class CollegeGazetteer:
+    """Token trie of college aliases; immutable once built.
+
+    Each trie node is a dict from the next token to the child node; the key
+    None holds the (kind, college indexes) of an alias ending at that node.
+    """
+
+    def __init__(self, colleges: Iterable[Tuple[str, str]], generation: int = 0,
+                 known_aliases: Optional[Dict[str, str]] = None, branch_names: Iterable[str] = ()):
+        self.generation = generation
+        self.colleges = []
+        seen = set()
+        for code, name in colleges:
+            if code not in seen:
+                seen.add(code)
+                self.colleges.append((code, name))
+
+        self.root = {}
+        self.alias_count = 0
+        name_tokens = [tokenize(name) for _, name in self.colleges]
+        document_frequency = Counter(token for tokens in name_tokens for token in set(tokens))
+        self.distinctive_limit = max(1, int(len(self.colleges) * DISTINCTIVE_SHARE))
+        self._document_frequency = document_frequency
+
+        for index, (code, name) in enumerate(self.colleges):
+            self._add(tokenize(code), FULL_NAME, index)
+            self._add(name_tokens[index], FULL_NAME, index)
+            for tokens, kind in self._name_aliases(name):
+                self._add(tokens, kind, index)
+
+        for alias, phrase in (KNOWN_ALIASES if known_aliases is None else known_aliases).items():
+            phrase_tokens = tokenize(phrase)
+            for index, tokens in enumerate(name_tokens):
+                if self._contains(tokens, phrase_tokens):
+                    self._add(tokenize(alias), NAME_PART, index)
+
+        self.college_names = TrigramIndex(self.colleges)
+        self.branch_names = TrigramIndex((name, name) for name in dict.fromkeys(branch_names) if name)
+
+    @classmethod
+    def load(cls, conn, generation: int) -> 'CollegeGazetteer':
+        """Build a gazetteer from the colleges and branches tables."""
+        rows = conn.execute('SELECT college_code, college_name FROM colleges ORDER BY id').fetchall()
+        branch_rows = conn.execute('SELECT DISTINCT branch_name FROM branches ORDER BY branch_name').fetchall()
+        return cls(((row[0], row[1]) for row in rows), generation,
+                   branch_names=(row[0] for row in branch_rows))
+
+    def _name_aliases(self, name: str) -> List[Tuple[List[str], int]]:
+        """Parts of an official name and the acronyms it is known by."""
+        aliases = []
+        # A capitalized word between ordinary words is the college's own acronym ("COEP", "(VJTI)");
+        # runs of capitals are just a name written in upper case
+        words = _WORD_RE.findall(name)
+        for position, word in enumerate(words):
+            neighbours = words[max(position - 1, 0):position] + words[position + 1:position + 2]
+            if _ACRONYM_RE.fullmatch(word) and not any(_ACRONYM_RE.fullmatch(other) for other in neighbours):
+                aliases.append(([word.lower()], NAME_PART))
+
+        parts = [tokenize(part) for part in _NAME_PART_RE.split(name)]
+        parts = [tokens for tokens in parts if tokens]
+        for tokens in parts:
+            if len(tokens) >= 2 and self._is_distinctive(tokens):
+                aliases.append((tokens, NAME_PART))
+            short_name = self._short_name(tokens)
+            if short_name:
+                aliases.append((short_name, SHORT_FORM))
+                if len(short_name) > 1 and self._is_distinctive(short_name[-1:]):
+                    aliases.append((short_name[-1:], SHORT_FORM))
+            if len(tokens) >= 3:
+                aliases.append(([''.join(token[0] for token in tokens)], SHORT_FORM))
+                aliases.append(([''.join(token[0] for token in tokens if token not in _ACRONYM_SKIP)], SHORT_FORM))
+        return aliases
+
+    def _short_name(self, tokens: List[str]) -> List[str]:
+        """The words before the first institution word, if they identify the college."""
+        for position, token in enumerate(tokens):
+            if token in _INSTITUTION_WORDS:
+                prefix = tokens[:position]
+                if prefix and (len(prefix) > 1 or len(prefix[0]) > 3) and self._is_distinctive(prefix):
+                    return prefix
+                return []
+        return []
+
+    def _is_distinctive(self, tokens: List[str]) -> bool:
+        return any(self._document_frequency[token] <= self.distinctive_limit for token in tokens)
+
+    @staticmethod
+    def _contains(tokens: List[str], phrase: List[str]) -> bool:
+        size = len(phrase)
+        return any(tokens[i:i + size] == phrase for i in range(len(tokens) - size + 1))
+
+    def _add(self, tokens: List[str], kind: int, college_index: int):
+        if not tokens:
+            return
+        if len(tokens) == 1:
+            token = tokens[0]
+            if len(token) < 3 or token in EXCLUDED_ALIASES or token in _INSTITUTION_WORDS or (kind == SHORT_FORM and token.isdigit()):
+                return
+        node = self.root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        entry = node.get(None)
+        if entry is None:
+            node[None] = (kind, [college_index])
+            self.alias_count += 1
+        elif kind < entry[0]:
+            node[None] = (kind, [college_index])
+        elif kind == entry[0] and college_index not in entry[1]:
+            entry[1].append(college_index)
+
+    def find(self, text: str) -> Optional[GazetteerMatch]:
+        """The best alias in the text, or None.
+
+        Longer aliases win (so "Government College of Engineering, Amravati"
+        beats "Government College of Engineering"), then stronger alias kinds,
+        then the earliest in the text. start/end are token positions.
+        """
+        tokens = tokenize(text)
+        best = None
+        best_key = None
+        for start in range(len(tokens)):
+            node = self.root
+            for end in range(start, len(tokens)):
+                node = node.get(tokens[end])
+                if node is None:
+                    break
+                entry = node.get(None)
+                if entry is not None:
+                    key = (end + 1 - start, -entry[0])
+                    if best_key is None or key > best_key:
+                        best_key = key
+                        best = (start, end + 1, entry)
+        if best is None:
+            return None
+        start, end, (_, indexes) = best
+        return GazetteerMatch(' '.join(tokens[start:end]), start, end,
+                              tuple(self.colleges[index] for index in indexes))
+
+    def lookup(self, name: str) -> Tuple[Tuple[str, str], ...]:
+        """The colleges an exact alias (full name, code, acronym...) names; empty if it is not one."""
+        node = self.root
+        for token in tokenize(name):
+            node = node.get(token)
+            if node is None:
+                return ()
+        entry = node.get(None)
+        if entry is None:
+            return ()
+        return tuple(self.colleges[index] for index in entry[1])
+
+    def fuzzy_colleges(self, text: str, limit: int = 5,
+                       min_score: float = FUZZY_MIN_SCORE) -> List[Tuple[str, str, float]]:
+        """Colleges whose official name best matches a possibly misspelt name, as (code, name, score)."""
+        return self.college_names.search(text, limit, min_score)
+
+    def fuzzy_branches(self, text: str, limit: int = 5,
+                       min_score: float = FUZZY_MIN_SCORE) -> List[Tuple[str, float]]:
+        """Branch names best matching a possibly misspelt name, as (branch_name, score)."""
+        return [(name, score) for _, name, score in self.branch_names.search(text, limit, min_score)]
+
+    def get_stats(self) -> Dict:
+        return {
+            'generation': self.generation,
+            'colleges': len(self.colleges),
+            'aliases': self.alias_count,
+            'branch_names': len(self.branch_names)
+        }
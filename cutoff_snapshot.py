@@ -0,0 +1,425 @@
+import bisect
+import logging
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Column weights passed to bm25() by CollegeDatabase.search_colleges
+SEARCH_WEIGHTS = (10.0, 5.0, 1.0, 0.5)
+
+_TERM_RE = re.compile(r'\w+')
+_TOKEN_RE = re.compile(r'[^\W_]+')
+
+def tokenize(text: str) -> List[str]:
+    """Split text like the FTS5 'unicode61 remove_diacritics 2' tokenizer."""
+    if text.isascii():
+        return _TOKEN_RE.findall(text.lower())
+    folded = ''.join(c for c in unicodedata.normalize('NFD', text) if not unicodedata.combining(c))
+    return [token.lower() for token in _TOKEN_RE.findall(folded)]
+
+def like_matcher(pattern: str):
+    """Compile a SQL LIKE pattern (ASCII case-insensitive, % and _ wildcards)."""
+    regex = ''.join('.*' if c == '%' else '.' if c == '_' else re.escape(c) for c in pattern)
+    return re.compile(regex, re.IGNORECASE | re.ASCII | re.DOTALL).fullmatch
+
+class CutoffSnapshot:
+    """Read-optimized, immutable in-memory copy of colleges, branches and cutoffs.
+
+    Numeric columns are NumPy arrays and stage/category strings are interned
+    to small integer codes. Branches and cutoffs are stored grouped by their
+    parent row with offset arrays, so a college's branches or a branch's
+    cutoffs are one contiguous slice. Only the latest academic year and CAP
+    round are held, so the snapshot stays the same size as history grows.
+    The read methods return exactly what the matching CollegeDatabase SQL
+    queries return for that round.
+    """
+
+    def __init__(self, generation: int, colleges: List[Tuple], branches: List[Tuple],
+                 cutoffs: List[Tuple], search_rows: Optional[List[Tuple]] = None,
+                 academic_year: Optional[int] = None, cap_round: Optional[int] = None):
+        self.generation = generation
+        self.academic_year = academic_year
+        self.cap_round = cap_round
+
+        # Colleges, in id order
+        self.college_ids = np.array([row[0] for row in colleges], dtype=np.int64)
+        self.college_codes = [row[1] for row in colleges]
+        self.college_names = [row[2] for row in colleges]
+        self.college_index = {code: i for i, code in enumerate(self.college_codes)}
+        college_row_by_id = {college_id: i for i, college_id in enumerate(self.college_ids.tolist())}
+
+        # Branches, grouped by college and in id order within each college
+        branches = sorted(branches, key=lambda row: (college_row_by_id[row[1]], row[0]))
+        self.branch_ids = np.array([row[0] for row in branches], dtype=np.int64)
+        self.branch_college = np.array([college_row_by_id[row[1]] for row in branches], dtype=np.int32)
+        self.branch_codes = [row[2] for row in branches]
+        self.branch_names = [row[3] for row in branches]
+        self.branch_statuses = [row[4] for row in branches]
+        self.college_branch_offsets = np.searchsorted(
+            self.branch_college, np.arange(len(colleges) + 1)).astype(np.int64)
+        self.branch_index = {}
+        for i, code in enumerate(self.branch_codes):
+            self.branch_index.setdefault(code, i)
+
+        # Sort position of each code, so ORDER BY college_code, branch_code is an integer sort
+        self.college_code_order = self._sort_positions(self.college_codes)
+        self.branch_code_order = self._sort_positions(self.branch_codes)
+        branch_row_by_id = {branch_id: i for i, branch_id in enumerate(self.branch_ids.tolist())}
+
+        # Cutoffs, grouped by branch and in id order within each branch
+        cutoffs = sorted(cutoffs, key=lambda row: (branch_row_by_id[row[1]], row[0]))
+        self.stages = sorted({row[2] for row in cutoffs})
+        self.categories = sorted({row[3] for row in cutoffs})
+        self.stage_codes = {stage: i for i, stage in enumerate(self.stages)}
+        self.category_codes = {category: i for i, category in enumerate(self.categories)}
+        self.cutoff_branch = np.array([branch_row_by_id[row[1]] for row in cutoffs], dtype=np.int32)
+        self.cutoff_stage = np.array([self.stage_codes[row[2]] for row in cutoffs], dtype=np.int16)
+        self.cutoff_category = np.array([self.category_codes[row[3]] for row in cutoffs], dtype=np.int16)
+        self.cutoff_rank = np.array([row[4] for row in cutoffs], dtype=np.int64)
+        self.cutoff_percentage = np.array([row[5] for row in cutoffs], dtype=np.float64)
+        self.branch_cutoff_offsets = np.searchsorted(
+            self.cutoff_branch, np.arange(len(branches) + 1)).astype(np.int64)
+
+        # (category, stage, by_rank) -> sorted cutoff rows and keys, built on first batch lookup
+        self._eligibility_indexes = {}
+
+        self.search_enabled = search_rows is not None
+        if self.search_enabled:
+            self._build_search_index(search_rows, college_row_by_id)
+
+    @staticmethod
+    def _sort_positions(values: List[str]) -> np.ndarray:
+        positions = np.empty(len(values), dtype=np.int64)
+        positions[sorted(range(len(values)), key=values.__getitem__)] = np.arange(len(values))
+        return positions
+
+    @classmethod
+    def load(cls, conn, generation: int, fts_enabled: bool) -> 'CutoffSnapshot':
+        """Read every table (cutoffs of the latest round only) in one read transaction and build a snapshot."""
+        cursor = conn.cursor()
+        cursor.execute('BEGIN')
+        colleges = cursor.execute('SELECT id, college_code, college_name FROM colleges ORDER BY id').fetchall()
+        branches = cursor.execute('SELECT id, college_id, branch_code, branch_name, status FROM branches').fetchall()
+        latest = cursor.execute('''
+            SELECT academic_year, cap_round FROM cutoff_data
+            ORDER BY academic_year DESC, cap_round DESC LIMIT 1
+        ''').fetchone() or (None, None)
+        cutoffs = cursor.execute('''
+            SELECT id, branch_id, stage, category, rank, percentage FROM cutoff_data
+            WHERE academic_year = ? AND cap_round = ?
+        ''', latest).fetchall()
+        search_rows = None
+        if fts_enabled:
+            search_rows = cursor.execute('''
+                SELECT co.id, s.rowid, s.college_code, s.college_name, s.branch_names, s.statuses
+                FROM college_search s
+                JOIN colleges co ON co.college_code = s.college_code
+            ''').fetchall()
+        conn.commit()
+        return cls(generation, colleges, branches, cutoffs, search_rows, *latest)
+
+    def _build_search_index(self, search_rows: List[Tuple], college_row_by_id: Dict[int, int]):
+        """Inverted index over the FTS5 table's columns, for bm25 ranking in memory."""
+        search_rows = sorted(search_rows, key=lambda row: row[1])
+        self.search_college_rows = np.array([college_row_by_id[row[0]] for row in search_rows], dtype=np.int64)
+        # token -> {search row: [(column, position), ...]}
+        self.postings = defaultdict(lambda: defaultdict(list))
+        row_sizes = []
+        for search_row, row in enumerate(search_rows):
+            size = 0
+            for column, text in enumerate(row[2:]):
+                tokens = tokenize(text or '')
+                for position, token in enumerate(tokens):
+                    self.postings[token][search_row].append((column, position))
+                size += len(tokens)
+            row_sizes.append(size)
+        self.postings = {token: dict(rows) for token, rows in self.postings.items()}
+        self.sorted_tokens = sorted(self.postings)
+
+        # token -> (search rows containing it, column-weighted frequency in each row)
+        self.token_frequencies = {}
+        for token, rows in self.postings.items():
+            self.token_frequencies[token] = (
+                np.array(list(rows), dtype=np.int64),
+                np.array([sum(SEARCH_WEIGHTS[column] for column, _ in hits) for hits in rows.values()])
+            )
+
+        self.search_row_sizes = np.array(row_sizes, dtype=np.float64)
+        self.average_tokens = sum(row_sizes) / len(row_sizes) if row_sizes else 0.0
+
+    def _prefix_tokens(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self.sorted_tokens, prefix)
+        end = bisect.bisect_left(self.sorted_tokens, prefix + '\U0010ffff', start)
+        return self.sorted_tokens[start:end]
+
+    def _phrase_frequencies(self, tokens: List[str]) -> np.ndarray:
+        """Column-weighted hits per search row for a phrase whose last token is a prefix."""
+        frequencies = np.zeros(len(self.search_college_rows))
+        if not tokens:
+            return frequencies
+        *exact, prefix = tokens
+
+        if not exact:
+            for token in self._prefix_tokens(prefix):
+                rows, weights = self.token_frequencies[token]
+                frequencies[rows] += weights
+            return frequencies
+
+        # Multi-token phrase: every earlier token must sit just before the prefix hit
+        for token in self._prefix_tokens(prefix):
+            for search_row, hits in self.postings[token].items():
+                for column, position in hits:
+                    start_position = position - len(exact)
+                    if start_position >= 0 and all(
+                            (column, start_position + i) in self.postings.get(word, {}).get(search_row, ())
+                            for i, word in enumerate(exact)):
+                        frequencies[search_row] += SEARCH_WEIGHTS[column]
+        return frequencies
+
+    def search_colleges(self, query: str, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        """Same results and order as CollegeDatabase.search_colleges."""
+        terms = _TERM_RE.findall(query or '')
+        # SQLite treats a negative OFFSET as 0; a negative slice start would count from the end
+        offset = max(0, offset)
+        end = None if limit is None or limit < 0 else offset + limit
+        rows = []
+        if not terms:
+            rows = list(range(len(self.college_codes)))[offset:end]
+        elif self.search_enabled:
+            rows = self._rank_search(terms)[offset:end]
+
+        # Like the SQL path, an empty page of ranked results falls back to LIKE
+        if terms and not rows:
+            matches = like_matcher(f'%{query}%')
+            rows = [i for i, (code, name) in enumerate(zip(self.college_codes, self.college_names))
+                    if matches(name) or matches(code)][offset:end]
+
+        return [{'college_code': self.college_codes[i], 'college_name': self.college_names[i]}
+                for i in rows]
+
+    def _rank_search(self, terms: List[str]) -> List[int]:
+        """Match every term as a prefix phrase and order by FTS5's bm25 formula."""
+        k1, b = 1.2, 0.75
+        total_rows = len(self.search_college_rows)
+        phrases = [self._phrase_frequencies(tokenize(term)) for term in terms]
+        matching = np.logical_and.reduce([frequencies > 0 for frequencies in phrases])
+        if not matching.any():
+            return []
+
+        search_rows = np.flatnonzero(matching)
+        length_norm = 1 - b + b * self.search_row_sizes[search_rows] / self.average_tokens
+        score = np.zeros(len(search_rows))
+        for frequencies in phrases:
+            hits = np.count_nonzero(frequencies)
+            idf = math.log((total_rows - hits + 0.5) / (hits + 0.5))
+            idf = idf if idf > 0.0 else 1e-6
+            frequency = frequencies[search_rows]
+            score += idf * ((frequency * (k1 + 1.0)) / (frequency + k1 * length_norm))
+
+        # bm25() is negated so the best match sorts first; ties keep index order
+        order = np.lexsort((search_rows, -1.0 * score))
+        return self.search_college_rows[search_rows[order]].tolist()
+
+    def _find_college(self, college_code: str = None, college_name: str = None) -> Optional[int]:
+        if college_code:
+            return self.college_index.get(college_code)
+        if college_name:
+            matches = like_matcher(f'%{college_name}%')
+            return next((i for i, name in enumerate(self.college_names) if matches(name)), None)
+        return None
+
+    def get_college_data(self, college_code: str = None, college_name: str = None,
+                         include_cutoffs: bool = True, stages: Optional[List[str]] = None,
+                         categories: Optional[List[str]] = None) -> Optional[Dict]:
+        """Same result as CollegeDatabase.get_college_data."""
+        college = self._find_college(college_code, college_name)
+        if college is None:
+            return None
+
+        stage_filter = [self.stage_codes[s] for s in stages if s in self.stage_codes] if stages else None
+        category_filter = [self.category_codes[c] for c in categories if c in self.category_codes] if categories else None
+
+        branches = []
+        first, last = self.college_branch_offsets[college], self.college_branch_offsets[college + 1]
+        for branch in range(first, last):
+            cutoff_start, cutoff_end = self.branch_cutoff_offsets[branch], self.branch_cutoff_offsets[branch + 1]
+            selected = np.arange(cutoff_start, cutoff_end)
+            if stage_filter is not None:
+                selected = selected[np.isin(self.cutoff_stage[selected], stage_filter)]
+            if category_filter is not None:
+                selected = selected[np.isin(self.cutoff_category[selected], category_filter)]
+
+            branch_info = {
+                'branch_code': self.branch_codes[branch],
+                'branch_name': self.branch_names[branch],
+                'status': self.branch_statuses[branch]
+            }
+            if include_cutoffs:
+                branch_info['cutoff_data'] = [
+                    {
+                        'stage': self.stages[stage],
+                        'category': self.categories[category],
+                        'rank': rank,
+                        'percentage': percentage
+                    }
+                    for stage, category, rank, percentage in zip(
+                        self.cutoff_stage[selected].tolist(),
+                        self.cutoff_category[selected].tolist(),
+                        self.cutoff_rank[selected].tolist(),
+                        self.cutoff_percentage[selected].tolist()
+                    )
+                ]
+            else:
+                branch_info['cutoff_count'] = len(selected)
+            branches.append(branch_info)
+
+        return {
+            'college_code': self.college_codes[college],
+            'college_name': self.college_names[college],
+            'branches': branches
+        }
+
+    def _eligibility_order(self, rows: np.ndarray, primary: np.ndarray) -> np.ndarray:
+        """Order cutoff rows by primary key, then college code, branch code and stage."""
+        branch_rows = self.cutoff_branch[rows]
+        # Stage codes are assigned in sorted order, so they sort like the stage names
+        return np.lexsort((self.cutoff_stage[rows], self.branch_code_order[branch_rows],
+                           self.college_code_order[self.branch_college[branch_rows]], primary))
+
+    def _eligibility_result(self, cutoff: int) -> Dict:
+        branch = self.cutoff_branch[cutoff]
+        college = self.branch_college[branch]
+        return {
+            'college_code': self.college_codes[college],
+            'college_name': self.college_names[college],
+            'branch_code': self.branch_codes[branch],
+            'branch_name': self.branch_names[branch],
+            'status': self.branch_statuses[branch],
+            'stage': self.stages[self.cutoff_stage[cutoff]],
+            'category': self.categories[self.cutoff_category[cutoff]],
+            'closing_rank': int(self.cutoff_rank[cutoff]),
+            'percentage': float(self.cutoff_percentage[cutoff])
+        }
+
+    def _eligibility_mask(self, category: str, stage: Optional[str]) -> Optional[np.ndarray]:
+        category_code = self.category_codes.get(str(category).upper())
+        if category_code is None:
+            return None
+        mask = self.cutoff_category == category_code
+        if stage:
+            stage_code = self.stage_codes.get(stage)
+            if stage_code is None:
+                return None
+            mask &= self.cutoff_stage == stage_code
+        return mask
+
+    def find_eligible_branches(self, category: str, rank: Optional[int] = None,
+                               percentile: Optional[float] = None, stage: Optional[str] = None,
+                               limit: int = 50, offset: int = 0) -> List[Dict]:
+        """Same results and order as CollegeDatabase.find_eligible_branches.
+
+        Eligible rows come from boolean masks; only the best offset + limit
+        of them (plus ties at the cut) are picked with argpartition and sorted.
+        """
+        if rank is None and percentile is None:
+            return []
+        mask = self._eligibility_mask(category, stage)
+        if mask is None:
+            return []
+
+        if rank is not None:
+            mask &= self.cutoff_rank >= rank
+            primary = self.cutoff_rank
+        else:
+            mask &= self.cutoff_percentage <= percentile
+            primary = -self.cutoff_percentage
+
+        selected = np.flatnonzero(mask)
+        offset = max(0, offset)
+        top_k = offset + limit
+        if top_k <= 0:
+            return []
+        keys = primary[selected]
+        if top_k < len(selected):
+            # Keep every row tied with the k-th key so the tie-break order stays exact
+            kth_key = keys[np.argpartition(keys, top_k - 1)[top_k - 1]]
+            candidates = keys <= kth_key
+            selected, keys = selected[candidates], keys[candidates]
+
+        order = self._eligibility_order(selected, keys)
+        return [self._eligibility_result(cutoff) for cutoff in selected[order[offset:top_k]].tolist()]
+
+    def _eligibility_index(self, category: str, stage: Optional[str], by_rank: bool):
+        """All cutoff rows of a category (and stage) in eligibility order, with their sort keys.
+
+        Built once per snapshot and key, so batch lookups are a binary search.
+        """
+        key = (str(category).upper(), stage or None, by_rank)
+        index = self._eligibility_indexes.get(key)
+        if index is None:
+            mask = self._eligibility_mask(category, stage)
+            rows = np.flatnonzero(mask) if mask is not None else np.empty(0, dtype=np.int64)
+            primary = self.cutoff_rank[rows] if by_rank else -self.cutoff_percentage[rows]
+            order = self._eligibility_order(rows, primary)
+            index = (rows[order], primary[order])
+            self._eligibility_indexes[key] = index
+        return index
+
+    def find_eligible_branches_batch(self, students: List[Dict], stage: Optional[str] = None,
+                                     limit: int = 10) -> List[List[Dict]]:
+        """Top eligible branches for many students in one call.
+
+        Each student is a dict with a category and a rank or percentile; the
+        result list is aligned with students and each entry equals
+        find_eligible_branches(..., limit=limit). Students are grouped by
+        category, and each group is answered with one searchsorted over the
+        group's sorted cutoff keys.
+        """
+        results = [[] for _ in students]
+        groups = defaultdict(list)
+        for i, student in enumerate(students):
+            if student.get('rank') is not None:
+                groups[(str(student.get('category', '')).upper(), True)].append(i)
+            elif student.get('percentile') is not None:
+                groups[(str(student.get('category', '')).upper(), False)].append(i)
+
+        offsets = np.arange(max(limit, 0))
+        for (category, by_rank), members in groups.items():
+            rows, keys = self._eligibility_index(category, stage, by_rank)
+            if not len(rows):
+                continue
+            if by_rank:
+                # float64, like the single-student mask: a fractional rank must not be truncated
+                thresholds = np.array([students[i]['rank'] for i in members], dtype=np.float64)
+            else:
+                thresholds = -np.array([students[i]['percentile'] for i in members], dtype=np.float64)
+
+            # Eligible rows are the suffix of the sorted keys from each student's threshold
+            starts = np.searchsorted(keys, thresholds, side='left')
+            positions = starts[:, None] + offsets
+            positions = np.where(positions < len(rows), positions, -1)
+            for member, student_positions in zip(members, positions.tolist()):
+                results[member] = [self._eligibility_result(cutoff)
+                                   for cutoff in rows[[p for p in student_positions if p >= 0]].tolist()]
+        return results
+
+    def get_stats(self) -> Dict:
+        """Row counts and array memory used by the snapshot."""
+        arrays = (self.college_ids, self.branch_ids, self.branch_college, self.college_branch_offsets,
+                  self.cutoff_branch, self.cutoff_stage, self.cutoff_category, self.cutoff_rank,
+                  self.cutoff_percentage, self.branch_cutoff_offsets)
+        return {
+            'generation': self.generation,
+            'academic_year': self.academic_year,
+            'cap_round': self.cap_round,
+            'colleges': len(self.college_codes),
+            'branches': len(self.branch_codes),
+            'cutoff_records': len(self.cutoff_rank),
+            'array_bytes': sum(array.nbytes for array in arrays)
+        }
@@ -1,22 +1,269 @@
 import sqlite3
+import base64
+import hashlib
 import json
 import logging
-from typing import Dict, List, Optional
+import queue
+import re
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 from datetime import datetime
+import time
+import uuid
+
+from college_gazetteer import FUZZY_MIN_SCORE, CollegeGazetteer
+from cutoff_snapshot import CutoffSnapshot
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Cutoffs stored before years and rounds were tracked came from the
+# A.Y. 2024-25 CAP Round III list (cutoff.pdf)
+LEGACY_ACADEMIC_YEAR = 2024
+LEGACY_CAP_ROUND = 3
+
+# Most entries kept per list in a diff ingest changeset; the counts in the stats are always exact
+CHANGESET_LIMIT = 1000
+
+# /colleges listing pages: sort orders by their keyset columns (the last one is
+# unique, so every key is distinct), and the fields a listing can return
+COLLEGE_SORTS = {
+    'college_code': ('college_code',),
+    'college_name': ('college_name', 'college_code')
+}
+COLLEGE_FIELDS = ('college_code', 'college_name', 'branch_count', 'cutoff_count')
+DEFAULT_COLLEGE_FIELDS = ('college_code', 'college_name')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Cutoffs are partitioned by (academic_year, cap_round): every key and index
+# leads with the pair, so a new round is an append and a read of one round
+# only touches that round's rows. academic_year is the year the admission
+# year starts in (2024 for A.Y. 2024-25).
+CUTOFF_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS cutoff_data (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        academic_year INTEGER NOT NULL,
+        cap_round INTEGER NOT NULL,
+        branch_id INTEGER NOT NULL,
+        stage TEXT NOT NULL,
+        category TEXT NOT NULL,
+        rank INTEGER NOT NULL,
+        percentage REAL NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (branch_id) REFERENCES branches (id),
+        UNIQUE(academic_year, cap_round, branch_id, stage, category)
+    )
+'''
+
+class ConnectionPool:
+    """Thread-safe pool of reusable SQLite connections.
+
+    Connections are opened lazily up to pool_size and handed out through a
+    queue, so short-lived request threads reuse them instead of paying for
+    connect and schema parsing on every call.
+    """
+
+    def __init__(self, db_path: str, pool_size: int = 8, busy_timeout_ms: int = 5000,
+                 cache_size_kb: int = 8192, mmap_size: int = 64 * 1024 * 1024):
+        self.db_path = db_path
+        # Every connection to :memory: is a separate database, so share just one
+        self.pool_size = 1 if db_path == ":memory:" else pool_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        self._idle = queue.LifoQueue()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _create_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000, check_same_thread=False)
+        # WAL lets readers keep going while a PDF ingest holds the write lock
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout_ms)}')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        conn.execute(f'PRAGMA cache_size = {-int(self.cache_size_kb)}')
+        conn.execute(f'PRAGMA mmap_size = {int(self.mmap_size)}')
+        conn.execute('PRAGMA temp_store = MEMORY')
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """Take an idle connection, opening a new one while under pool_size."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if len(self._connections) < self.pool_size:
+                conn = self._create_connection()
+                self._connections.append(conn)
+                return conn
+
+        return self._idle.get(timeout=self.busy_timeout_ms / 1000)
+
+    def release(self, conn: sqlite3.Connection):
+        """Return a connection to the pool, discarding any open transaction."""
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; commits on success and rolls back on error."""
+        conn = self.acquire()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close every connection opened by this pool."""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+            self._idle = queue.LifoQueue()
+
 class CollegeDatabase:
-    def __init__(self, db_path: str = "college_cutoffs.db"):
+    def __init__(self, db_path: str = "college_cutoffs.db", pool_size: int = 8, busy_timeout_ms: int = 5000,
+                 use_snapshot: bool = True, generation_check_interval: float = 1.0):
         self.db_path = db_path
+        self.pool = ConnectionPool(db_path, pool_size=pool_size, busy_timeout_ms=busy_timeout_ms)
+        self.fts_enabled = False
+        # The data generation row, kept in memory: (token, generation, checked at, local commits then).
+        # Re-read after this process commits an ingest, and at most every
+        # generation_check_interval seconds to notice other processes' ingests
+        self.generation_check_interval = generation_check_interval
+        self._generation = None
+        self._generation_lock = threading.Lock()
+        self._local_commits = 0
+        # Reads are served from an in-memory snapshot rebuilt whenever the generation moves;
+        # SQLite stays the durable store
+        self.use_snapshot = use_snapshot
+        self._snapshot = None
+        self._snapshot_lock = threading.Lock()
+        # College-name matcher for the chat servers, rebuilt on the same generation rule
+        self._gazetteer = None
+        self._gazetteer_lock = threading.Lock()
+        # get_database_stats() result and the generation it was counted at
+        self._stats = None
         self.init_database()
+
+    def close(self):
+        """Close all pooled connections."""
+        self.pool.close()
+    
+    @staticmethod
+    def _bump_generation(cursor):
+        """Move the data generation, in the same transaction as the ingest's writes."""
+        cursor.execute('UPDATE data_generation SET generation = generation + 1 WHERE id = 0')
+    
+    def _generation_committed(self):
+        """Call once a transaction that bumped the generation has committed."""
+        with self._generation_lock:
+            self._local_commits += 1
+    
+    def _read_generation(self) -> Tuple[str, int]:
+        cached = self._generation
+        if (cached is not None and cached[3] == self._local_commits
+                and time.monotonic() - cached[2] < self.generation_check_interval):
+            return cached[0], cached[1]
+        # Taken before the read: a commit finishing during it forces another read next time
+        local_commits = self._local_commits
+        checked_at = time.monotonic()
+        with self.pool.connection() as conn:
+            token, generation = conn.execute('SELECT token, generation FROM data_generation WHERE id = 0').fetchone()
+        self._generation = (token, generation, checked_at, local_commits)
+        return token, generation
+    
+    @property
+    def generation(self) -> int:
+        """Counter moved by every ingest so caches can key on the data version.
+        
+        It lives in the data_generation row and is bumped inside each ingest's
+        transaction, so an ingest by another process on the same database file
+        (a second server or worker) moves it too. Reads come from memory: the
+        row is re-read after this process's own ingests and at most every
+        generation_check_interval seconds, so another process's ingest
+        reaches the snapshot, gazetteer, stats and response caches within
+        that interval.
+        """
+        return self._read_generation()[1]
+    
+    @property
+    def data_version(self) -> str:
+        """Opaque version of the stored data, for HTTP ETags; changes on every ingest."""
+        token, generation = self._read_generation()
+        return f"{token}.{generation}"
+    
+    def get_snapshot(self) -> Optional[CutoffSnapshot]:
+        """Return the read snapshot, rebuilding it if data changed since it was built.
+
+        A new snapshot is built off to the side and swapped in with a single
+        assignment, so readers always see either the old or the new data.
+        Returns None when snapshots are disabled or the build fails.
+        """
+        if not self.use_snapshot:
+            return None
+        generation = self.generation
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.generation == generation:
+            return snapshot
+
+        with self._snapshot_lock:
+            # Read the generation first: a commit during the load forces another rebuild
+            generation = self.generation
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.generation == generation:
+                return snapshot
+            try:
+                start_time = time.time()
+                with self.pool.connection() as conn:
+                    snapshot = CutoffSnapshot.load(conn, generation, self.fts_enabled)
+                self._snapshot = snapshot
+                logger.info(f"Built read snapshot in {time.time() - start_time:.3f}s: {snapshot.get_stats()}")
+                return snapshot
+            except Exception as e:
+                logger.error(f"Error building read snapshot: {e}")
+                return None
+
+    def get_college_gazetteer(self) -> Optional[CollegeGazetteer]:
+        """Return the college-name gazetteer, rebuilding it if data changed since it was built.
+
+        Returns None if the build fails.
+        """
+        generation = self.generation
+        gazetteer = self._gazetteer
+        if gazetteer is not None and gazetteer.generation == generation:
+            return gazetteer
+
+        with self._gazetteer_lock:
+            generation = self.generation
+            gazetteer = self._gazetteer
+            if gazetteer is not None and gazetteer.generation == generation:
+                return gazetteer
+            try:
+                start_time = time.time()
+                with self.pool.connection() as conn:
+                    gazetteer = CollegeGazetteer.load(conn, generation)
+                self._gazetteer = gazetteer
+                logger.info(f"Built college gazetteer in {time.time() - start_time:.3f}s: {gazetteer.get_stats()}")
+                return gazetteer
+            except Exception as e:
+                logger.error(f"Error building college gazetteer: {e}")
+                return None
     
     def init_database(self):
         """Initialize the database with required tables."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 
                 # Create colleges table
@@ -45,39 +292,285 @@ class CollegeDatabase:
                     )
                 ''')
                 
-                # Create cutoff_data table
+                # Create cutoff_data table, partitioned by academic year and CAP round
+                cursor.execute(CUTOFF_TABLE_SQL)
+                self._migrate_cutoff_partitions(cursor)
+                
+                # Create indexes for better performance
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_college_code ON colleges(college_code)')
+                # Keyset pages of /colleges sorted by name
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_college_name ON colleges(college_name, college_code)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_branch_code ON branches(branch_code)')
+                # A branch's cutoffs across years and rounds, for history and trend reads
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_cutoff_branch ON cutoff_data(branch_id, academic_year, cap_round)')
+                
+                # Covering indexes for rank/percentile eligibility range scans within one round
                 cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS cutoff_data (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    CREATE INDEX IF NOT EXISTS idx_cutoff_eligibility_rank
+                    ON cutoff_data(academic_year, cap_round, category, stage, rank, percentage, branch_id)
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_cutoff_eligibility_percentage
+                    ON cutoff_data(academic_year, cap_round, category, stage, percentage, rank, branch_id)
+                ''')
+                
+                # Background PDF ingestion jobs; times are epoch seconds so
+                # throughput and ETA can be computed directly. owner is the job
+                # queue that claimed the job, updated_at its heartbeat
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS ingest_jobs (
+                        id TEXT PRIMARY KEY,
+                        filename TEXT NOT NULL,
+                        filepath TEXT NOT NULL,
+                        status TEXT NOT NULL DEFAULT 'queued',
+                        owner TEXT,
+                        options TEXT,
+                        total_pages INTEGER,
+                        pages_processed INTEGER NOT NULL DEFAULT 0,
+                        colleges_stored INTEGER NOT NULL DEFAULT 0,
+                        result TEXT,
+                        error TEXT,
+                        created_at REAL NOT NULL,
+                        started_at REAL,
+                        updated_at REAL,
+                        finished_at REAL
+                    )
+                ''')
+                if 'owner' not in {row[1] for row in cursor.execute('PRAGMA table_info(ingest_jobs)')}:
+                    cursor.execute('ALTER TABLE ingest_jobs ADD COLUMN owner TEXT')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_ingest_jobs_status ON ingest_jobs(status, created_at)')
+                
+                # Data generation, bumped in every ingest transaction. The token tells a
+                # recreated database file's generations apart from the old file's
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS data_generation (
+                        id INTEGER PRIMARY KEY CHECK (id = 0),
+                        token TEXT NOT NULL,
+                        generation INTEGER NOT NULL
+                    )
+                ''')
+                cursor.execute('INSERT OR IGNORE INTO data_generation (id, token, generation) VALUES (0, ?, 0)',
+                               (uuid.uuid4().hex[:8],))
+                
+                # Hash of each college's parsed content per round, written by the diff
+                # ingest so unchanged colleges can be skipped without reading their rows
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS college_content_hashes (
+                        college_code TEXT NOT NULL,
+                        academic_year INTEGER NOT NULL,
+                        cap_round INTEGER NOT NULL,
+                        content_hash TEXT NOT NULL,
+                        PRIMARY KEY (college_code, academic_year, cap_round)
+                    )
+                ''')
+                
+                # Per-branch cutoff aggregates for each round, refreshed in the same
+                # transaction as every cutoff write so listings and chat answers read
+                # one row per branch instead of aggregating raw cutoffs
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS branch_cutoff_summary (
+                        academic_year INTEGER NOT NULL,
+                        cap_round INTEGER NOT NULL,
                         branch_id INTEGER NOT NULL,
-                        stage TEXT NOT NULL,
-                        category TEXT NOT NULL,
-                        rank INTEGER NOT NULL,
-                        percentage REAL NOT NULL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        cutoff_count INTEGER NOT NULL,
+                        stage_count INTEGER NOT NULL,
+                        best_percentage REAL,
+                        worst_percentage REAL,
+                        closing_ranks TEXT NOT NULL,
                         FOREIGN KEY (branch_id) REFERENCES branches (id),
-                        UNIQUE(branch_id, stage, category)
+                        PRIMARY KEY (academic_year, cap_round, branch_id)
                     )
                 ''')
+                summarized = cursor.execute('SELECT COALESCE(SUM(cutoff_count), 0) FROM branch_cutoff_summary').fetchone()[0]
+                if summarized != cursor.execute('SELECT COUNT(*) FROM cutoff_data').fetchone()[0]:
+                    self._refresh_branch_summaries(cursor)
                 
-                # Create indexes for better performance
-                cursor.execute('CREATE INDEX IF NOT EXISTS idx_college_code ON colleges(college_code)')
-                cursor.execute('CREATE INDEX IF NOT EXISTS idx_branch_code ON branches(branch_code)')
-                cursor.execute('CREATE INDEX IF NOT EXISTS idx_cutoff_branch ON cutoff_data(branch_id)')
-                cursor.execute('CREATE INDEX IF NOT EXISTS idx_cutoff_stage ON cutoff_data(stage)')
-                cursor.execute('CREATE INDEX IF NOT EXISTS idx_cutoff_category ON cutoff_data(category)')
+                # Full-text search index over college names, branch names and status
+                try:
+                    cursor.execute('''
+                        CREATE VIRTUAL TABLE IF NOT EXISTS college_search USING fts5(
+                            college_code,
+                            college_name,
+                            branch_names,
+                            statuses,
+                            tokenize = 'unicode61 remove_diacritics 2',
+                            prefix = '2 3'
+                        )
+                    ''')
+                    self.fts_enabled = True
+                except sqlite3.OperationalError as e:
+                    logger.warning(f"FTS5 not available, falling back to LIKE search: {e}")
                 
                 conn.commit()
+                
+                if self.fts_enabled:
+                    indexed = cursor.execute('SELECT COUNT(*) FROM college_search').fetchone()[0]
+                    stored = cursor.execute('SELECT COUNT(*) FROM colleges').fetchone()[0]
+                    if indexed != stored:
+                        self._rebuild_search_index(cursor)
+                        conn.commit()
+                
                 logger.info("Database initialized successfully")
                 
         except Exception as e:
             logger.error(f"Error initializing database: {e}")
             raise
     
+    @staticmethod
+    def _migrate_cutoff_partitions(cursor):
+        """Move a cutoff_data table from before academic years and CAP rounds into the partitioned layout.
+
+        SQLite cannot change a UNIQUE constraint in place, so the table is
+        rebuilt; existing rows are kept as the legacy year and round.
+        """
+        columns = {row[1] for row in cursor.execute('PRAGMA table_info(cutoff_data)')}
+        if 'academic_year' in columns:
+            return
+        logger.info(f"Partitioning cutoff_data by academic year and CAP round "
+                    f"(existing rows: {LEGACY_ACADEMIC_YEAR}, round {LEGACY_CAP_ROUND})")
+        cursor.execute('ALTER TABLE cutoff_data RENAME TO cutoff_data_unpartitioned')
+        cursor.execute(CUTOFF_TABLE_SQL)
+        cursor.execute('''
+            INSERT INTO cutoff_data (id, academic_year, cap_round, branch_id, stage, category, rank, percentage, created_at)
+            SELECT id, ?, ?, branch_id, stage, category, rank, percentage, created_at
+            FROM cutoff_data_unpartitioned
+        ''', (LEGACY_ACADEMIC_YEAR, LEGACY_CAP_ROUND))
+        cursor.execute('DROP TABLE cutoff_data_unpartitioned')
+
+    @staticmethod
+    def _latest_round(cursor, academic_year: Optional[int] = None) -> Optional[Tuple[int, int]]:
+        """Newest (academic_year, cap_round) stored, optionally within one year; None when empty."""
+        if academic_year is None:
+            row = cursor.execute('''
+                SELECT academic_year, cap_round FROM cutoff_data
+                ORDER BY academic_year DESC, cap_round DESC LIMIT 1
+            ''').fetchone()
+        else:
+            row = cursor.execute('''
+                SELECT academic_year, cap_round FROM cutoff_data
+                WHERE academic_year = ? ORDER BY cap_round DESC LIMIT 1
+            ''', (academic_year,)).fetchone()
+        return tuple(row) if row else None
+
+    def _read_round(self, cursor, academic_year: Optional[int], cap_round: Optional[int]) -> Tuple:
+        """The round a read covers: the latest one unless a year and/or round is named.
+
+        A year alone means its latest round; a round alone means that round of
+        the latest year. Returns (None, None) when nothing matches.
+        """
+        if academic_year is not None and cap_round is not None:
+            return int(academic_year), int(cap_round)
+        if cap_round is not None:
+            latest = self._latest_round(cursor)
+            return (latest[0], int(cap_round)) if latest else (None, None)
+        return self._latest_round(cursor, academic_year) or (None, None)
+
+    def _ingest_round(self, cursor, academic_year: Optional[int], cap_round: Optional[int]) -> Tuple[int, int]:
+        """The round an ingest writes to.
+
+        Data without a year or round (older JSON exports, PDFs without the
+        usual header) goes to the latest stored round, replacing it as before
+        rounds were tracked; a new year without a round starts at round 1.
+        """
+        latest = self._latest_round(cursor) or (LEGACY_ACADEMIC_YEAR, LEGACY_CAP_ROUND)
+        if academic_year is None:
+            academic_year = latest[0]
+        if cap_round is None:
+            cap_round = latest[1] if academic_year == latest[0] else 1
+        return int(academic_year), int(cap_round)
+
+    def _snapshot_for(self, academic_year: Optional[int], cap_round: Optional[int]) -> Optional[CutoffSnapshot]:
+        """The read snapshot, if it holds the requested round (it holds the latest one)."""
+        snapshot = self.get_snapshot()
+        if snapshot is None:
+            return None
+        if academic_year is not None and int(academic_year) != snapshot.academic_year:
+            return None
+        if cap_round is not None and int(cap_round) != snapshot.cap_round:
+            return None
+        return snapshot
+
+    def _refresh_branch_summaries(self, cursor, admission_round: Optional[Tuple[int, int]] = None,
+                                  branch_ids: Optional[Iterable[int]] = None):
+        """Recompute branch_cutoff_summary rows from cutoff_data.
+
+        With admission_round and branch_ids only those branches' rows in that
+        round are refreshed (the ingest paths); with neither, every round is
+        rebuilt. A branch's closing rank for a category is its highest rank
+        over all stages, and categories keep the order they were printed in.
+        """
+        if admission_round is None:
+            cursor.execute('DELETE FROM branch_cutoff_summary')
+            rows = cursor.execute('''
+                SELECT academic_year, cap_round, branch_id, stage, category, rank, percentage FROM cutoff_data
+                ORDER BY academic_year, cap_round, branch_id, id
+            ''').fetchall()
+        else:
+            branch_ids = list(set(branch_ids or ()))
+            if not branch_ids:
+                return
+            self._select_in(
+                cursor, 'DELETE FROM branch_cutoff_summary WHERE academic_year = ? AND cap_round = ? AND branch_id IN ({})',
+                branch_ids, params=admission_round)
+            rows = sorted(self._select_in(
+                cursor,
+                'SELECT academic_year, cap_round, branch_id, stage, category, rank, percentage, id FROM cutoff_data '
+                'WHERE academic_year = ? AND cap_round = ? AND branch_id IN ({})',
+                branch_ids, params=admission_round), key=lambda row: (row[2], row[7]))
+
+        summaries = {}
+        for academic_year, cap_round, branch_id, stage, category, rank, percentage, *_ in rows:
+            summary = summaries.get((academic_year, cap_round, branch_id))
+            if summary is None:
+                summary = summaries[(academic_year, cap_round, branch_id)] = {
+                    'count': 0, 'stages': set(), 'best': percentage, 'worst': percentage, 'ranks': {}}
+            summary['count'] += 1
+            summary['stages'].add(stage)
+            summary['best'] = max(summary['best'], percentage)
+            summary['worst'] = min(summary['worst'], percentage)
+            summary['ranks'][category] = max(summary['ranks'].get(category, rank), rank)
+
+        cursor.executemany('''
+            INSERT INTO branch_cutoff_summary (academic_year, cap_round, branch_id, cutoff_count, stage_count,
+                                               best_percentage, worst_percentage, closing_ranks)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [(*key, summary['count'], len(summary['stages']), summary['best'], summary['worst'],
+               json.dumps(summary['ranks'])) for key, summary in summaries.items()])
+
+    def _rebuild_search_index(self, cursor):
+        """Repopulate the FTS5 search table from colleges and branches."""
+        if not self.fts_enabled:
+            return
+        cursor.execute('DELETE FROM college_search')
+        cursor.execute('''
+            INSERT INTO college_search (rowid, college_code, college_name, branch_names, statuses)
+            SELECT co.id, co.college_code, co.college_name,
+                   COALESCE(group_concat(b.branch_name, ' | '), ''),
+                   COALESCE((SELECT group_concat(DISTINCT s.status) FROM branches s WHERE s.college_id = co.id), '')
+            FROM colleges co
+            LEFT JOIN branches b ON b.college_id = co.id
+            GROUP BY co.id
+        ''')
+
+    def rebuild_search_index(self) -> bool:
+        """Rebuild the college search index; called after every ingest."""
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                self._rebuild_search_index(cursor)
+                self._bump_generation(cursor)
+            self._generation_committed()
+            self.get_snapshot()
+            self.get_college_gazetteer()
+            return True
+        except Exception as e:
+            logger.error(f"Error rebuilding search index: {e}")
+            return False
+    
     def insert_college(self, college_code: str, college_name: str) -> Optional[int]:
         """Insert a new college and return its ID."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 
                 # Check if college already exists
@@ -92,6 +585,7 @@ class CollegeDatabase:
                         WHERE college_code = ?
                     ''', (college_name, college_code))
                     college_id = existing[0]
+                    self._forget_content_hashes(cursor, [college_code])
                     logger.info(f"Updated existing college: {college_name}")
                 else:
                     # Insert new college
@@ -101,8 +595,10 @@ class CollegeDatabase:
                     ''', (college_code, college_name))
                     college_id = cursor.lastrowid
                     logger.info(f"Inserted new college: {college_name}")
+                self._bump_generation(cursor)
                 
                 conn.commit()
+                self._generation_committed()
                 return college_id
                 
         except Exception as e:
@@ -112,7 +608,7 @@ class CollegeDatabase:
     def insert_branch(self, college_id: int, branch_code: str, branch_name: str, status: str) -> Optional[int]:
         """Insert a new branch and return its ID."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 
                 # Check if branch already exists
@@ -130,6 +626,8 @@ class CollegeDatabase:
                         WHERE id = ?
                     ''', (branch_name, status, existing[0]))
                     branch_id = existing[0]
+                    cursor.execute('SELECT college_code FROM colleges WHERE id = ?', (college_id,))
+                    self._forget_content_hashes(cursor, [row[0] for row in cursor.fetchall()])
                     logger.info(f"Updated existing branch: {branch_name}")
                 else:
                     # Insert new branch
@@ -139,25 +637,33 @@ class CollegeDatabase:
                     ''', (college_id, branch_code, branch_name, status))
                     branch_id = cursor.lastrowid
                     logger.info(f"Inserted new branch: {branch_name}")
+                self._bump_generation(cursor)
                 
                 conn.commit()
+                self._generation_committed()
                 return branch_id
                 
         except Exception as e:
             logger.error(f"Error inserting branch: {e}")
             return None
     
-    def insert_cutoff_data(self, branch_id: int, stage: str, category: str, rank: int, percentage: float) -> bool:
-        """Insert cutoff data for a branch."""
+    def insert_cutoff_data(self, branch_id: int, stage: str, category: str, rank: int, percentage: float,
+                           academic_year: Optional[int] = None, cap_round: Optional[int] = None) -> bool:
+        """Insert cutoff data for a branch in one academic year and CAP round (see _ingest_round)."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
+                academic_year, cap_round = self._ingest_round(cursor, academic_year, cap_round)
+                cursor.execute('''
+                    SELECT co.college_code FROM branches b JOIN colleges co ON co.id = b.college_id WHERE b.id = ?
+                ''', (branch_id,))
+                self._forget_content_hashes(cursor, [row[0] for row in cursor.fetchall()])
                 
                 # Check if cutoff data already exists
                 cursor.execute('''
                     SELECT id FROM cutoff_data 
-                    WHERE branch_id = ? AND stage = ? AND category = ?
-                ''', (branch_id, stage, category))
+                    WHERE academic_year = ? AND cap_round = ? AND branch_id = ? AND stage = ? AND category = ?
+                ''', (academic_year, cap_round, branch_id, stage, category))
                 existing = cursor.fetchone()
                 
                 if existing:
@@ -171,20 +677,33 @@ class CollegeDatabase:
                 else:
                     # Insert new cutoff data
                     cursor.execute('''
-                        INSERT INTO cutoff_data (branch_id, stage, category, rank, percentage)
-                        VALUES (?, ?, ?, ?, ?)
-                    ''', (branch_id, stage, category, rank, percentage))
+                        INSERT INTO cutoff_data (academic_year, cap_round, branch_id, stage, category, rank, percentage)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ''', (academic_year, cap_round, branch_id, stage, category, rank, percentage))
                     logger.debug(f"Inserted cutoff data: Stage {stage}, {category}")
+                self._refresh_branch_summaries(cursor, (academic_year, cap_round), [branch_id])
+                self._bump_generation(cursor)
                 
                 conn.commit()
+                self._generation_committed()
                 return True
                 
         except Exception as e:
             logger.error(f"Error inserting cutoff data: {e}")
             return False
     
-    def store_parsed_data(self, parsed_data: Dict) -> bool:
-        """Store complete parsed data from PDF into database."""
+    def store_parsed_data(self, parsed_data: Dict, bulk: bool = True, diff: bool = False) -> bool:
+        """Store complete parsed data from PDF into database.
+
+        With bulk=True the whole document is loaded in one transaction via
+        bulk_store_parsed_data; bulk=False keeps the row-by-row insert path.
+        diff=True writes only what changed, via diff_store_parsed_data.
+        """
+        if diff:
+            return self.diff_store_parsed_data(parsed_data).get('success', False)
+        if bulk:
+            return self.bulk_store_parsed_data(parsed_data).get('success', False)
+
         try:
             if not parsed_data.get("parsing_success"):
                 logger.error("Cannot store data: parsing was not successful")
@@ -198,6 +717,9 @@ class CollegeDatabase:
             
             logger.info(f"Storing data for {len(colleges)} colleges")
             
+            with self.pool.connection() as conn:
+                academic_year, cap_round = self._ingest_round(
+                    conn.cursor(), parsed_data.get("academic_year"), parsed_data.get("cap_round"))
             total_stored = 0
             
             # Process each college
@@ -244,7 +766,8 @@ class CollegeDatabase:
                         percentage = cutoff.get("percentage")
                         
                         if all([stage, category, rank is not None, percentage is not None]):
-                            if self.insert_cutoff_data(branch_id, stage, category, rank, percentage):
+                            if self.insert_cutoff_data(branch_id, stage, category, rank, percentage,
+                                                       academic_year, cap_round):
                                 cutoff_count += 1
                         else:
                             logger.warning(f"Skipping incomplete cutoff data: {cutoff}")
@@ -253,91 +776,890 @@ class CollegeDatabase:
                 
                 total_stored += 1
             
+            self.rebuild_search_index()
             logger.info(f"Successfully stored data for {total_stored} colleges")
             return total_stored > 0
-            
+
         except Exception as e:
             logger.error(f"Error storing parsed data: {e}")
             return False
-    
-    def get_college_data(self, college_code: str = None, college_name: str = None) -> Optional[Dict]:
-        """Retrieve college data with branches and cutoff information."""
+
+    @staticmethod
+    def _new_ingest_stats() -> Dict:
+        return {
+            'success': False,
+            'colleges': {'inserted': 0, 'updated': 0, 'skipped': 0},
+            'branches': {'inserted': 0, 'updated': 0, 'skipped': 0},
+            'cutoffs': {'inserted': 0, 'updated': 0, 'skipped': 0}
+        }
+
+    @staticmethod
+    def _forget_content_hashes(cursor, college_codes: List[str]):
+        """Drop the diff ingest's content hashes for colleges written some other way.
+
+        The next diff ingest then compares those colleges row by row instead
+        of trusting a hash that no longer describes the stored rows.
+        """
+        cursor.executemany('DELETE FROM college_content_hashes WHERE college_code = ?',
+                           [(code,) for code in college_codes])
+
+    @staticmethod
+    def _select_in(cursor, query: str, values: List, chunk_size: int = 900, params: Tuple = ()) -> List:
+        """Run a query with a single IN (...) placeholder over chunks of values.
+
+        params are bound before the IN list.
+        """
+        rows = []
+        for start in range(0, len(values), chunk_size):
+            chunk = values[start:start + chunk_size]
+            rows.extend(cursor.execute(query.format(', '.join('?' * len(chunk))), [*params, *chunk]))
+        return rows
+
+    def _upsert_college_batch(self, cursor, colleges: List[Dict], stats: Dict,
+                              admission_round: Tuple[int, int]) -> int:
+        """Upsert a batch of parsed colleges with executemany; returns valid colleges stored.
+
+        Cutoffs go into the (academic_year, cap_round) partition given, so
+        they only replace rows from the same round.
+        """
+        # Colleges
+        valid_colleges = []
+        for college in colleges:
+            if not college.get("college_code") or not college.get("college_name"):
+                stats['colleges']['skipped'] += 1
+                continue
+            valid_colleges.append(college)
+
+        codes = list({college["college_code"] for college in valid_colleges})
+        self._forget_content_hashes(cursor, codes)
+        existing = {row[0] for row in self._select_in(
+            cursor, 'SELECT college_code FROM colleges WHERE college_code IN ({})', codes)}
+        college_rows = []
+        for college in valid_colleges:
+            key = college["college_code"]
+            if key in existing:
+                stats['colleges']['updated'] += 1
+            else:
+                stats['colleges']['inserted'] += 1
+                existing.add(key)
+            college_rows.append((key, college["college_name"]))
+
+        cursor.executemany('''
+            INSERT INTO colleges (college_code, college_name)
+            VALUES (?, ?)
+            ON CONFLICT(college_code) DO UPDATE SET
+                college_name = excluded.college_name,
+                updated_at = CURRENT_TIMESTAMP
+        ''', college_rows)
+
+        college_ids = dict(self._select_in(
+            cursor, 'SELECT college_code, id FROM colleges WHERE college_code IN ({})', codes))
+
+        # Branches
+        existing = {(row[1], row[2]): row[0] for row in self._select_in(
+            cursor, 'SELECT id, college_id, branch_code FROM branches WHERE college_id IN ({})',
+            list(college_ids.values()))}
+        branch_rows = []
+        valid_branches = []
+        for college in valid_colleges:
+            college_id = college_ids[college["college_code"]]
+            for branch in college.get("branches", []):
+                branch_code = branch.get("branch_code")
+                branch_name = branch.get("branch_name")
+                if not branch_code or not branch_name:
+                    stats['branches']['skipped'] += 1
+                    continue
+
+                key = (college_id, branch_code)
+                if key in existing:
+                    stats['branches']['updated'] += 1
+                else:
+                    stats['branches']['inserted'] += 1
+                    existing[key] = None
+                branch_rows.append((college_id, branch_code, branch_name, branch.get("status", "Unknown")))
+                valid_branches.append((key, branch))
+
+        cursor.executemany('''
+            INSERT INTO branches (college_id, branch_code, branch_name, status)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(college_id, branch_code) DO UPDATE SET
+                branch_name = excluded.branch_name,
+                status = excluded.status,
+                updated_at = CURRENT_TIMESTAMP
+        ''', branch_rows)
+
+        branch_ids = {(row[1], row[2]): row[0] for row in self._select_in(
+            cursor, 'SELECT id, college_id, branch_code FROM branches WHERE college_id IN ({})',
+            list(college_ids.values()))}
+
+        # Cutoff data
+        existing = set(self._select_in(
+            cursor,
+            'SELECT branch_id, stage, category FROM cutoff_data WHERE academic_year = ? AND cap_round = ? AND branch_id IN ({})',
+            list({branch_ids[key] for key, _ in valid_branches}), params=admission_round))
+        cutoff_rows = []
+        for key, branch in valid_branches:
+            branch_id = branch_ids[key]
+            for cutoff in branch.get("cutoff_data", []):
+                stage = cutoff.get("stage")
+                category = cutoff.get("category")
+                rank = cutoff.get("rank")
+                percentage = cutoff.get("percentage")
+
+                if not all([stage, category, rank is not None, percentage is not None]):
+                    stats['cutoffs']['skipped'] += 1
+                    continue
+
+                cutoff_key = (branch_id, stage, category)
+                if cutoff_key in existing:
+                    stats['cutoffs']['updated'] += 1
+                else:
+                    stats['cutoffs']['inserted'] += 1
+                    existing.add(cutoff_key)
+                cutoff_rows.append((*admission_round, branch_id, stage, category, rank, percentage))
+
+        cursor.executemany('''
+            INSERT INTO cutoff_data (academic_year, cap_round, branch_id, stage, category, rank, percentage)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(academic_year, cap_round, branch_id, stage, category) DO UPDATE SET
+                rank = excluded.rank,
+                percentage = excluded.percentage,
+                created_at = CURRENT_TIMESTAMP
+        ''', cutoff_rows)
+        self._refresh_branch_summaries(cursor, admission_round, {branch_ids[key] for key, _ in valid_branches})
+
+        return len(valid_colleges)
+
+    def bulk_store_parsed_data(self, parsed_data: Dict) -> Dict:
+        """Store complete parsed data in a single transaction using set-based upserts.
+
+        Cutoffs are stored under parsed_data's academic_year and cap_round
+        (see _ingest_round). Returns per-table counts of inserted, updated and
+        skipped rows, and the round written.
+        """
+        stats = self._new_ingest_stats()
+
+        if not parsed_data.get("parsing_success"):
+            logger.error("Cannot store data: parsing was not successful")
+            stats['error'] = "Parsing was not successful"
+            return stats
+
+        colleges = parsed_data.get("colleges", [])
+        if not colleges:
+            logger.error("No colleges found in parsed data")
+            stats['error'] = "No colleges found in parsed data"
+            return stats
+
+        start_time = time.time()
+        logger.info(f"Bulk storing data for {len(colleges)} colleges")
+
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
-                
-                if college_code:
-                    cursor.execute('''
-                        SELECT * FROM colleges WHERE college_code = ?
-                    ''', (college_code,))
-                elif college_name:
-                    cursor.execute('''
-                        SELECT * FROM colleges WHERE college_name LIKE ?
-                    ''', (f'%{college_name}%',))
+                admission_round = self._ingest_round(
+                    cursor, parsed_data.get("academic_year"), parsed_data.get("cap_round"))
+                stats['academic_year'], stats['cap_round'] = admission_round
+                stored = self._upsert_college_batch(cursor, colleges, stats, admission_round)
+                self._rebuild_search_index(cursor)
+                self._bump_generation(cursor)
+            self._generation_committed()
+            self.get_snapshot()
+            self.get_college_gazetteer()
+
+            stats['success'] = stored > 0
+            stats['elapsed_seconds'] = round(time.time() - start_time, 3)
+            logger.info(f"Bulk stored {stored} colleges in {stats['elapsed_seconds']}s: {stats}")
+            return stats
+
+        except Exception as e:
+            logger.error(f"Error bulk storing parsed data: {e}")
+            stats['error'] = str(e)
+            return stats
+
+    @staticmethod
+    def _new_diff_stats() -> Dict:
+        stats = CollegeDatabase._new_ingest_stats()
+        stats['colleges']['unchanged'] = 0
+        stats['branches']['unchanged'] = 0
+        stats['cutoffs'].update({'deleted': 0, 'unchanged': 0})
+        stats['changeset'] = {'added': [], 'removed': [], 'changed': [], 'truncated': False}
+        return stats
+
+    @staticmethod
+    def _merge_college_records(colleges: Iterable[Dict], stats: Dict) -> Dict[str, Dict]:
+        """Fold the parsed records of each college into one, keyed by college code.
+
+        The parser emits a college once per page section; later values win
+        exactly as they would through the upserts.
+        """
+        merged = {}
+        for college in colleges:
+            college_code, college_name = college.get("college_code"), college.get("college_name")
+            if not college_code or not college_name:
+                stats['colleges']['skipped'] += 1
+                continue
+            record = merged.setdefault(college_code, {'branches': {}})
+            record['college_name'] = college_name
+
+            for branch in college.get("branches", []):
+                branch_code, branch_name = branch.get("branch_code"), branch.get("branch_name")
+                if not branch_code or not branch_name:
+                    stats['branches']['skipped'] += 1
+                    continue
+                entry = record['branches'].setdefault(branch_code, {'cutoffs': {}})
+                entry['branch_name'] = branch_name
+                entry['status'] = branch.get("status", "Unknown")
+
+                for cutoff in branch.get("cutoff_data", []):
+                    stage, category = cutoff.get("stage"), cutoff.get("category")
+                    rank, percentage = cutoff.get("rank"), cutoff.get("percentage")
+                    if not all([stage, category, rank is not None, percentage is not None]):
+                        stats['cutoffs']['skipped'] += 1
+                        continue
+                    entry['cutoffs'][(stage, category)] = (int(rank), float(percentage))
+        return merged
+
+    @staticmethod
+    def _college_content_hash(record: Dict) -> str:
+        """Order-independent hash of a merged college record."""
+        content = [record['college_name'], sorted(
+            [branch_code, branch['branch_name'], branch['status'],
+             sorted([stage, category, rank, percentage]
+                    for (stage, category), (rank, percentage) in branch['cutoffs'].items())]
+            for branch_code, branch in record['branches'].items()
+        )]
+        return hashlib.sha256(json.dumps(content, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _record_change(stats: Dict, kind: str, change: Dict):
+        changeset = stats['changeset']
+        if len(changeset[kind]) < CHANGESET_LIMIT:
+            changeset[kind].append(change)
+        else:
+            changeset['truncated'] = True
+
+    def _diff_college_batch(self, cursor, merged: Dict[str, Dict], stats: Dict,
+                            admission_round: Tuple[int, int]) -> bool:
+        """Write only what differs between merged colleges and the stored round.
+
+        Colleges whose content hash matches the stored one are skipped
+        without reading their rows; the rest are compared row by row, and
+        only new, changed and removed rows are written. Cutoffs stored in
+        this round for a college in the batch but missing from its new
+        parse are deleted. Returns whether college or branch names/statuses
+        changed (the search index then needs a rebuild).
+        """
+        codes = list(merged)
+        stored_hashes = dict(self._select_in(
+            cursor,
+            'SELECT college_code, content_hash FROM college_content_hashes '
+            'WHERE academic_year = ? AND cap_round = ? AND college_code IN ({})',
+            codes, params=admission_round))
+        hashes = {code: self._college_content_hash(record) for code, record in merged.items()}
+        changed_codes = [code for code in codes if stored_hashes.get(code) != hashes[code]]
+        for code in codes:
+            if stored_hashes.get(code) == hashes[code]:
+                stats['colleges']['unchanged'] += 1
+                stats['branches']['unchanged'] += len(merged[code]['branches'])
+                stats['cutoffs']['unchanged'] += sum(len(b['cutoffs']) for b in merged[code]['branches'].values())
+        if not changed_codes:
+            return False
+
+        # Colleges
+        stored_colleges = {row[1]: (row[0], row[2]) for row in self._select_in(
+            cursor, 'SELECT id, college_code, college_name FROM colleges WHERE college_code IN ({})', changed_codes)}
+        new_colleges = [(code, merged[code]['college_name']) for code in changed_codes if code not in stored_colleges]
+        renamed_colleges = [(merged[code]['college_name'], stored_colleges[code][0]) for code in changed_codes
+                            if code in stored_colleges and stored_colleges[code][1] != merged[code]['college_name']]
+        cursor.executemany('INSERT INTO colleges (college_code, college_name) VALUES (?, ?)', new_colleges)
+        cursor.executemany('UPDATE colleges SET college_name = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
+                           renamed_colleges)
+        stats['colleges']['inserted'] += len(new_colleges)
+        stats['colleges']['updated'] += len(renamed_colleges)
+        stats['colleges']['unchanged'] += len(changed_codes) - len(new_colleges) - len(renamed_colleges)
+        if new_colleges:
+            stored_colleges.update({row[1]: (row[0], row[2]) for row in self._select_in(
+                cursor, 'SELECT id, college_code, college_name FROM colleges WHERE college_code IN ({})',
+                [code for code, _ in new_colleges])})
+        college_codes = {stored_colleges[code][0]: code for code in changed_codes}
+
+        # Branches
+        branch_query = 'SELECT id, college_id, branch_code, branch_name, status FROM branches WHERE college_id IN ({})'
+        stored_branches = {(row[1], row[2]): (row[0], row[3], row[4])
+                           for row in self._select_in(cursor, branch_query, list(college_codes))}
+        new_branches = []
+        changed_branches = []
+        for college_id, code in college_codes.items():
+            for branch_code, branch in merged[code]['branches'].items():
+                stored = stored_branches.get((college_id, branch_code))
+                if stored is None:
+                    new_branches.append((college_id, branch_code, branch['branch_name'], branch['status']))
+                elif stored[1:] != (branch['branch_name'], branch['status']):
+                    changed_branches.append((branch['branch_name'], branch['status'], stored[0]))
                 else:
-                    return None
-                
-                college = cursor.fetchone()
-                if not college:
-                    return None
-                
-                # Get branches
-                cursor.execute('''
-                    SELECT * FROM branches WHERE college_id = ?
-                ''', (college['id'],))
-                branches = cursor.fetchall()
-                
-                # Get cutoff data for each branch
+                    stats['branches']['unchanged'] += 1
+        cursor.executemany('INSERT INTO branches (college_id, branch_code, branch_name, status) VALUES (?, ?, ?, ?)',
+                           new_branches)
+        cursor.executemany('''
+            UPDATE branches SET branch_name = ?, status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?
+        ''', changed_branches)
+        stats['branches']['inserted'] += len(new_branches)
+        stats['branches']['updated'] += len(changed_branches)
+        if new_branches:
+            stored_branches = {(row[1], row[2]): (row[0], row[3], row[4])
+                               for row in self._select_in(cursor, branch_query, list(college_codes))}
+        branch_keys = {stored[0]: key for key, stored in stored_branches.items()}
+
+        # Cutoffs of this round
+        stored_cutoffs = {(row[1], row[2], row[3]): (row[0], row[4], row[5]) for row in self._select_in(
+            cursor,
+            'SELECT id, branch_id, stage, category, rank, percentage FROM cutoff_data '
+            'WHERE academic_year = ? AND cap_round = ? AND branch_id IN ({})',
+            list(branch_keys), params=admission_round)}
+        added, changed = [], []
+        changed_branch_ids = set()
+        for college_id, code in college_codes.items():
+            for branch_code, branch in merged[code]['branches'].items():
+                branch_id = stored_branches[(college_id, branch_code)][0]
+                for (stage, category), (rank, percentage) in branch['cutoffs'].items():
+                    change = {'college_code': code, 'branch_code': branch_code, 'stage': stage,
+                              'category': category, 'rank': rank, 'percentage': percentage}
+                    stored = stored_cutoffs.pop((branch_id, stage, category), None)
+                    if stored is None:
+                        added.append((*admission_round, branch_id, stage, category, rank, percentage))
+                        self._record_change(stats, 'added', change)
+                    elif stored[1:] != (rank, percentage):
+                        changed.append((rank, percentage, stored[0]))
+                        changed_branch_ids.add(branch_id)
+                        self._record_change(stats, 'changed', {
+                            **change, 'previous_rank': stored[1], 'previous_percentage': stored[2]})
+                    else:
+                        stats['cutoffs']['unchanged'] += 1
+        # Whatever is left was stored for these colleges but is gone from the new parse
+        for (branch_id, stage, category), (_, rank, percentage) in stored_cutoffs.items():
+            college_id, branch_code = branch_keys[branch_id]
+            self._record_change(stats, 'removed', {
+                'college_code': college_codes[college_id], 'branch_code': branch_code, 'stage': stage,
+                'category': category, 'rank': rank, 'percentage': percentage})
+
+        cursor.executemany('''
+            INSERT INTO cutoff_data (academic_year, cap_round, branch_id, stage, category, rank, percentage)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', added)
+        cursor.executemany('''
+            UPDATE cutoff_data SET rank = ?, percentage = ?, created_at = CURRENT_TIMESTAMP WHERE id = ?
+        ''', changed)
+        cursor.executemany('DELETE FROM cutoff_data WHERE id = ?', [(stored[0],) for stored in stored_cutoffs.values()])
+        stats['cutoffs']['inserted'] += len(added)
+        stats['cutoffs']['updated'] += len(changed)
+        stats['cutoffs']['deleted'] += len(stored_cutoffs)
+        changed_branch_ids.update(row[2] for row in added)
+        changed_branch_ids.update(branch_id for branch_id, _, _ in stored_cutoffs)
+        self._refresh_branch_summaries(cursor, admission_round, changed_branch_ids)
+
+        # Names and statuses are shared by every round, so other rounds' hashes go stale with them
+        renamed_codes = {college_codes[college_id] for _, college_id in renamed_colleges}
+        renamed_codes.update(college_codes[branch_keys[branch_id][0]] for _, _, branch_id in changed_branches)
+        self._forget_content_hashes(cursor, list(renamed_codes))
+        cursor.executemany('''
+            INSERT INTO college_content_hashes (college_code, academic_year, cap_round, content_hash)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(college_code, academic_year, cap_round) DO UPDATE SET content_hash = excluded.content_hash
+        ''', [(code, *admission_round, hashes[code]) for code in changed_codes])
+
+        return bool(new_colleges or renamed_colleges or new_branches or changed_branches)
+
+    @staticmethod
+    def _diff_write_count(stats: Dict) -> int:
+        """Rows a diff ingest has inserted, updated or deleted so far."""
+        return sum(stats[table].get(count, 0) for table in ('colleges', 'branches', 'cutoffs')
+                   for count in ('inserted', 'updated', 'deleted'))
+
+    def diff_store_parsed_data(self, parsed_data: Dict) -> Dict:
+        """Store parsed data by writing only the rows that differ from the stored round.
+
+        Meant for corrected or re-uploaded PDFs: colleges with the same
+        content hash as last time are skipped, and for the rest only added,
+        changed and removed rows are written, so a re-upload changing 2% of
+        the cutoffs does about 2% of the writes. A college missing from the
+        new parse altogether is left as it is. Returns the ingest stats
+        (including unchanged and deleted counts) and a changeset of added,
+        removed and changed cutoffs. Nothing is republished when nothing
+        changed.
+        """
+        stats = self._new_diff_stats()
+
+        if not parsed_data.get("parsing_success"):
+            logger.error("Cannot store data: parsing was not successful")
+            stats['error'] = "Parsing was not successful"
+            return stats
+
+        merged = self._merge_college_records(parsed_data.get("colleges", []), stats)
+        if not merged:
+            logger.error("No colleges found in parsed data")
+            stats['error'] = "No colleges found in parsed data"
+            return stats
+
+        start_time = time.time()
+        logger.info(f"Diff storing data for {len(merged)} colleges")
+
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                admission_round = self._ingest_round(
+                    cursor, parsed_data.get("academic_year"), parsed_data.get("cap_round"))
+                stats['academic_year'], stats['cap_round'] = admission_round
+                names_changed = self._diff_college_batch(cursor, merged, stats, admission_round)
+                if names_changed:
+                    self._rebuild_search_index(cursor)
+                if self._diff_write_count(stats):
+                    self._bump_generation(cursor)
+            if self._diff_write_count(stats):
+                self._generation_committed()
+                self.get_snapshot()
+                self.get_college_gazetteer()
+
+            stats['success'] = True
+            stats['elapsed_seconds'] = round(time.time() - start_time, 3)
+            logger.info(f"Diff stored {len(merged)} colleges in {stats['elapsed_seconds']}s: "
+                        f"colleges {stats['colleges']}, branches {stats['branches']}, cutoffs {stats['cutoffs']}")
+            return stats
+
+        except Exception as e:
+            logger.error(f"Error diff storing parsed data: {e}")
+            stats['error'] = str(e)
+            return stats
+
+    def store_college_stream(self, colleges: Iterable[Dict], batch_size: int = 100,
+                             progress: Optional[Callable[[Dict], None]] = None,
+                             academic_year: Optional[int] = None, cap_round: Optional[int] = None,
+                             diff: bool = False) -> Dict:
+        """Store colleges from an iterator (e.g. parse_pdf_stream) in batches.
+
+        Each batch is upserted and committed in its own transaction, so neither
+        the parsed document nor a long write lock is held for the whole upload.
+        Cutoffs go into the given academic year and CAP round (see
+        _ingest_round). With diff=True each batch only writes what differs
+        from the stored round, as in diff_store_parsed_data; batches are then
+        only cut between colleges, since the parser emits a college's page
+        sections one after another. Stats also count the parsed totals seen
+        on the stream, and stored_colleges the colleges committed so far;
+        progress, if given, is called with the running stats after every
+        committed batch.
+        """
+        stats = self._new_diff_stats() if diff else self._new_ingest_stats()
+        stats['parsed'] = {'colleges': 0, 'branches': 0, 'cutoffs': 0}
+        stats['stored_colleges'] = 0
+        start_time = time.time()
+        stored = 0
+        batch = []
+        admission_round = None
+        names_changed = False
+
+        def flush():
+            nonlocal admission_round, names_changed
+            writes = self._diff_write_count(stats)
+            bumped = False
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                if admission_round is None:
+                    admission_round = self._ingest_round(cursor, academic_year, cap_round)
+                    stats['academic_year'], stats['cap_round'] = admission_round
+                if diff:
+                    merged = self._merge_college_records(batch, stats)
+                    names_changed |= self._diff_college_batch(cursor, merged, stats, admission_round)
+                    count = len(merged)
+                else:
+                    count = self._upsert_college_batch(cursor, batch, stats, admission_round)
+                if not diff or self._diff_write_count(stats) > writes:
+                    self._bump_generation(cursor)
+                    bumped = True
+            if bumped:
+                self._generation_committed()
+            stats['stored_colleges'] += count
+            if progress:
+                progress(stats)
+            return count
+
+        try:
+            for college in colleges:
+                same_college = diff and batch and college.get("college_code") == batch[-1].get("college_code")
+                if len(batch) >= batch_size and not same_college:
+                    stored += flush()
+                    batch = []
+                batch.append(college)
+                stats['parsed']['colleges'] += 1
+                stats['parsed']['branches'] += len(college.get("branches", []))
+                stats['parsed']['cutoffs'] += sum(len(b.get("cutoff_data", [])) for b in college.get("branches", []))
+            if batch:
+                stored += flush()
+
+            if not diff or names_changed:
+                self.rebuild_search_index()
+            elif self._diff_write_count(stats):
+                self.get_snapshot()
+                self.get_college_gazetteer()
+            stats['success'] = stored > 0
+            if not stored:
+                stats['error'] = "No colleges found in parsed data"
+            stats['elapsed_seconds'] = round(time.time() - start_time, 3)
+            logger.info(f"Stream stored {stored} colleges in {stats['elapsed_seconds']}s: {stats}")
+            return stats
+
+        except Exception as e:
+            logger.error(f"Error storing college stream: {e}")
+            stats['error'] = str(e)
+            return stats
+
+    def get_college_data(self, college_code: str = None, college_name: str = None,
+                         include_cutoffs: bool = True, stages: Optional[List[str]] = None,
+                         categories: Optional[List[str]] = None, academic_year: Optional[int] = None,
+                         cap_round: Optional[int] = None) -> Optional[Dict]:
+        """Retrieve college data with branches and cutoff information.
+
+        The college, its branches and their cutoffs are fetched with a single
+        joined query. stages/categories restrict which cutoff rows are returned;
+        with include_cutoffs=False each branch carries only a cutoff_count.
+        Cutoffs are from the latest CAP round unless academic_year/cap_round
+        name another (see _read_round). The latest round is served from the
+        in-memory snapshot when it is enabled.
+        """
+        snapshot = self._snapshot_for(academic_year, cap_round)
+        if snapshot is not None:
+            return snapshot.get_college_data(college_code, college_name, include_cutoffs, stages, categories)
+
+        if college_code:
+            college_filter, college_param = 'college_code = ?', college_code
+        elif college_name:
+            college_filter, college_param = 'college_name LIKE ?', f'%{college_name}%'
+        else:
+            return None
+
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
+                query, cutoff_params = self._college_data_query(
+                    f'co.id = (SELECT id FROM colleges WHERE {college_filter} ORDER BY id LIMIT 1)',
+                    include_cutoffs, stages, categories, self._read_round(cursor, academic_year, cap_round)
+                )
+                cursor.execute(query, cutoff_params + [college_param])
+                colleges = self._assemble_college_data(cursor, include_cutoffs)
+                return next(iter(colleges.values()), None)
+
+        except Exception as e:
+            logger.error(f"Error retrieving college data: {e}")
+            return None
+
+    def get_colleges_data(self, college_codes: List[str], include_cutoffs: bool = True,
+                          stages: Optional[List[str]] = None,
+                          categories: Optional[List[str]] = None,
+                          chunk_size: int = 500, academic_year: Optional[int] = None,
+                          cap_round: Optional[int] = None) -> Dict[str, Optional[Dict]]:
+        """get_college_data for many colleges at once, keyed by college code.
+
+        Resolved with one joined query per chunk of codes
+        (WHERE college_code IN (...)) instead of one query per college.
+        Codes that are not in the database map to None.
+        """
+        codes = list(dict.fromkeys(college_codes))
+        snapshot = self._snapshot_for(academic_year, cap_round)
+        if snapshot is not None:
+            return {
+                code: snapshot.get_college_data(code, None, include_cutoffs, stages, categories)
+                for code in codes
+            }
+
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
+                admission_round = self._read_round(cursor, academic_year, cap_round)
+                found = {}
+                for start in range(0, len(codes), chunk_size):
+                    chunk = codes[start:start + chunk_size]
+                    query, cutoff_params = self._college_data_query(
+                        f"co.college_code IN ({', '.join('?' * len(chunk))})",
+                        include_cutoffs, stages, categories, admission_round
+                    )
+                    cursor.execute(query, cutoff_params + chunk)
+                    found.update(self._assemble_college_data(cursor, include_cutoffs))
+                return {code: found.get(code) for code in codes}
+
+        except Exception as e:
+            logger.error(f"Error retrieving data for {len(codes)} colleges: {e}")
+            return {}
+
+    @staticmethod
+    def _college_data_query(college_where: str, include_cutoffs: bool, stages: Optional[List[str]],
+                            categories: Optional[List[str]], admission_round: Tuple):
+        """Build the college/branch/cutoff join for get_college_data(s); returns (query, params)."""
+        # Round and projection filters go in the join so branches without matches are kept
+        cutoff_join = ['cd.branch_id = b.id', 'cd.academic_year = ?', 'cd.cap_round = ?']
+        cutoff_params = list(admission_round)
+        if stages:
+            cutoff_join.append(f"cd.stage IN ({', '.join('?' * len(stages))})")
+            cutoff_params.extend(stages)
+        if categories:
+            cutoff_join.append(f"cd.category IN ({', '.join('?' * len(categories))})")
+            cutoff_params.extend(categories)
+
+        if not include_cutoffs and not stages and not categories:
+            # Whole-round counts come precomputed, one summary row per branch
+            query = f'''
+                SELECT co.id AS college_id, co.college_code, co.college_name,
+                       b.id AS branch_id, b.branch_code, b.branch_name, b.status,
+                       COALESCE(s.cutoff_count, 0) AS cutoff_count
+                FROM colleges co
+                LEFT JOIN branches b ON b.college_id = co.id
+                LEFT JOIN branch_cutoff_summary s
+                       ON s.academic_year = ? AND s.cap_round = ? AND s.branch_id = b.id
+                WHERE {college_where}
+                ORDER BY co.id, b.id
+            '''
+        elif include_cutoffs:
+            query = f'''
+                SELECT co.id AS college_id, co.college_code, co.college_name,
+                       b.id AS branch_id, b.branch_code, b.branch_name, b.status,
+                       cd.stage, cd.category, cd.rank, cd.percentage
+                FROM colleges co
+                LEFT JOIN branches b ON b.college_id = co.id
+                LEFT JOIN cutoff_data cd ON {' AND '.join(cutoff_join)}
+                WHERE {college_where}
+                ORDER BY co.id, b.id, cd.id
+            '''
+        else:
+            query = f'''
+                SELECT co.id AS college_id, co.college_code, co.college_name,
+                       b.id AS branch_id, b.branch_code, b.branch_name, b.status,
+                       COUNT(cd.id) AS cutoff_count
+                FROM colleges co
+                LEFT JOIN branches b ON b.college_id = co.id
+                LEFT JOIN cutoff_data cd ON {' AND '.join(cutoff_join)}
+                WHERE {college_where}
+                GROUP BY co.id, b.id
+                ORDER BY co.id, b.id
+            '''
+        return query, cutoff_params
+
+    @staticmethod
+    def _assemble_college_data(rows, include_cutoffs: bool) -> Dict[str, Dict]:
+        """Group joined rows ordered by college and branch into nested college dicts."""
+        colleges = {}
+        result = None
+        branch_info = None
+        for row in rows:
+            if result is None or result['_id'] != row['college_id']:
                 result = {
-                    'college_code': college['college_code'],
-                    'college_name': college['college_name'],
+                    '_id': row['college_id'],
+                    'college_code': row['college_code'],
+                    'college_name': row['college_name'],
                     'branches': []
                 }
-                
-                for branch in branches:
-                    cursor.execute('''
-                        SELECT * FROM cutoff_data WHERE branch_id = ?
-                    ''', (branch['id'],))
-                    cutoff_data = cursor.fetchall()
-                    
-                    branch_info = {
-                        'branch_code': branch['branch_code'],
-                        'branch_name': branch['branch_name'],
-                        'status': branch['status'],
-                        'cutoff_data': []
-                    }
-                    
-                    for cutoff in cutoff_data:
-                        branch_info['cutoff_data'].append({
-                            'stage': cutoff['stage'],
-                            'category': cutoff['category'],
-                            'rank': cutoff['rank'],
-                            'percentage': cutoff['percentage']
-                        })
-                    
-                    result['branches'].append(branch_info)
-                
-                return result
-                
+                colleges.setdefault(row['college_code'], result)
+                branch_info = None
+
+            if row['branch_id'] is None:
+                continue
+
+            if branch_info is None or branch_info['_id'] != row['branch_id']:
+                branch_info = {
+                    '_id': row['branch_id'],
+                    'branch_code': row['branch_code'],
+                    'branch_name': row['branch_name'],
+                    'status': row['status']
+                }
+                if include_cutoffs:
+                    branch_info['cutoff_data'] = []
+                else:
+                    branch_info['cutoff_count'] = row['cutoff_count']
+                result['branches'].append(branch_info)
+
+            if include_cutoffs and row['stage'] is not None:
+                branch_info['cutoff_data'].append({
+                    'stage': row['stage'],
+                    'category': row['category'],
+                    'rank': row['rank'],
+                    'percentage': row['percentage']
+                })
+
+        for college in colleges.values():
+            del college['_id']
+            for branch in college['branches']:
+                del branch['_id']
+        return colleges
+
+    def get_branch_summaries(self, college_codes: List[str], academic_year: Optional[int] = None,
+                             cap_round: Optional[int] = None) -> Dict[str, Optional[Dict]]:
+        """Per-branch cutoff aggregates for colleges, keyed by college code.
+
+        Each branch carries cutoff_count, stage_count, best/worst_percentage
+        and closing_ranks ({category: closing rank}, in printed order), read
+        from branch_cutoff_summary rather than aggregated from raw cutoffs.
+        Covers the latest CAP round unless academic_year/cap_round name
+        another. Codes that are not in the database map to None.
+        """
+        codes = list(dict.fromkeys(college_codes))
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                admission_round = self._read_round(cursor, academic_year, cap_round)
+                rows = self._select_in(cursor, '''
+                    SELECT co.college_code, co.college_name, b.branch_code, b.branch_name, b.status,
+                           s.cutoff_count, s.stage_count, s.best_percentage, s.worst_percentage, s.closing_ranks
+                    FROM colleges co
+                    LEFT JOIN branches b ON b.college_id = co.id
+                    LEFT JOIN branch_cutoff_summary s
+                           ON s.academic_year = ? AND s.cap_round = ? AND s.branch_id = b.id
+                    WHERE co.college_code IN ({})
+                    ORDER BY co.id, b.id
+                ''', codes, params=admission_round)
+
+            found = {}
+            for code, college_name, branch_code, branch_name, status, count, stages, best, worst, ranks in rows:
+                college = found.setdefault(code, {
+                    'college_code': code,
+                    'college_name': college_name,
+                    'academic_year': admission_round[0],
+                    'cap_round': admission_round[1],
+                    'branches': []
+                })
+                if branch_code is None:
+                    continue
+                college['branches'].append({
+                    'branch_code': branch_code,
+                    'branch_name': branch_name,
+                    'status': status,
+                    'cutoff_count': count or 0,
+                    'stage_count': stages or 0,
+                    'best_percentage': best,
+                    'worst_percentage': worst,
+                    'closing_ranks': json.loads(ranks) if ranks else {}
+                })
+            return {code: found.get(code) for code in codes}
+
         except Exception as e:
-            logger.error(f"Error retrieving college data: {e}")
-            return None
-    
-    def search_colleges(self, query: str) -> List[Dict]:
-        """Search colleges by name or code."""
+            logger.error(f"Error getting branch summaries for {len(codes)} colleges: {e}")
+            return {}
+
+    def list_colleges(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                      sort: str = 'college_code', fields: Optional[List[str]] = None) -> Dict:
+        """One page of colleges, sought by key instead of skipped by offset.
+
+        sort is a COLLEGE_SORTS name, prefixed with '-' for descending order;
+        cursor is the next_cursor of the previous page. Every page is an index
+        range scan of at most limit + 1 rows (limit is capped at
+        MAX_PAGE_SIZE), however deep it is. fields are picked as in
+        select_college_fields. Returns {'colleges': [...], 'next_cursor': str
+        or None on the last page}. Raises ValueError for an unknown sort or
+        field, or a cursor that was not issued for this sort.
+        """
+        descending = sort.startswith('-')
+        columns = COLLEGE_SORTS.get(sort.lstrip('-'))
+        if columns is None:
+            raise ValueError(f"Unknown sort '{sort}'; use one of {', '.join(COLLEGE_SORTS)}, optionally prefixed with '-'")
+        after = self._decode_cursor(cursor, sort, len(columns)) if cursor else None
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        direction = 'DESC' if descending else 'ASC'
+        seek = f"WHERE ({', '.join(columns)}) {'<' if descending else '>'} ({', '.join('?' * len(columns))})" if after else ''
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self.pool.connection() as conn:
+                rows = conn.execute(f'''
+                    SELECT college_code, college_name FROM colleges {seek}
+                    ORDER BY {', '.join(f'{column} {direction}' for column in columns)}
+                    LIMIT ?
+                ''', [*(after or ()), limit + 1]).fetchall()
+        except Exception as e:
+            logger.error(f"Error listing colleges: {e}")
+            rows = []
+
+        colleges = [{'college_code': code, 'college_name': name} for code, name in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = colleges[-1]
+            next_cursor = self._encode_cursor(sort, [last[column] for column in columns])
+        return {'colleges': self.select_college_fields(colleges, fields), 'next_cursor': next_cursor}
+
+    @staticmethod
+    def _encode_cursor(sort: str, key: List) -> str:
+        return base64.urlsafe_b64encode(json.dumps([sort, *key]).encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def _decode_cursor(cursor: str, sort: str, key_length: int) -> List:
+        try:
+            decoded = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        except (ValueError, UnicodeError):
+            decoded = None
+        if not isinstance(decoded, list) or len(decoded) != key_length + 1 or decoded[0] != sort:
+            raise ValueError("Invalid cursor for this sort order")
+        return decoded[1:]
+
+    def select_college_fields(self, colleges: List[Dict], fields: Optional[List[str]] = None) -> List[Dict]:
+        """Project college listings onto fields (COLLEGE_FIELDS, default DEFAULT_COLLEGE_FIELDS).
+
+        branch_count and cutoff_count come from the latest round's branch
+        summaries and are only looked up when asked for. Raises ValueError
+        for an unknown field.
+        """
+        fields = list(dict.fromkeys(fields or DEFAULT_COLLEGE_FIELDS))
+        unknown = [field for field in fields if field not in COLLEGE_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields {', '.join(unknown)}; use {', '.join(COLLEGE_FIELDS)}")
+
+        if 'branch_count' in fields or 'cutoff_count' in fields:
+            summaries = self.get_branch_summaries([college['college_code'] for college in colleges])
+            counted = []
+            for college in colleges:
+                branches = (summaries.get(college['college_code']) or {}).get('branches', [])
+                counted.append({**college, 'branch_count': len(branches),
+                                'cutoff_count': sum(branch['cutoff_count'] for branch in branches)})
+            colleges = counted
+        return [{field: college[field] for field in fields} for college in colleges]
+
+    def search_colleges(self, query: str, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        """Search colleges by name, code, branch name or status.
+
+        Uses the FTS5 index ranked by bm25 with prefix matching on every term;
+        falls back to a LIKE substring scan when FTS5 finds nothing. The
+        snapshot, when enabled, reproduces the same ranking in memory.
+        """
+        snapshot = self.get_snapshot()
+        if snapshot is not None:
+            return snapshot.search_colleges(query, limit, offset)
+
+        terms = re.findall(r'\w+', query or '')
+        page = ' LIMIT ? OFFSET ?'
+        page_params = [limit if limit is not None else -1, offset]
+
+        try:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
                 
-                cursor.execute('''
-                    SELECT college_code, college_name FROM colleges 
-                    WHERE college_name LIKE ? OR college_code LIKE ?
-                ''', (f'%{query}%', f'%{query}%'))
+                rows = []
+                if not terms:
+                    cursor.execute('SELECT college_code, college_name FROM colleges ORDER BY id' + page, page_params)
+                    rows = cursor.fetchall()
+                elif self.fts_enabled:
+                    match = ' '.join(f'"{term}"*' for term in terms)
+                    cursor.execute('''
+                        SELECT college_code, college_name FROM college_search
+                        WHERE college_search MATCH ?
+                        ORDER BY bm25(college_search, 10.0, 5.0, 1.0, 0.5)
+                    ''' + page, [match] + page_params)
+                    rows = cursor.fetchall()
+                
+                if terms and not rows:
+                    cursor.execute('''
+                        SELECT college_code, college_name FROM colleges 
+                        WHERE college_name LIKE ? OR college_code LIKE ?
+                        ORDER BY id
+                    ''' + page, [f'%{query}%', f'%{query}%'] + page_params)
+                    rows = cursor.fetchall()
                 
                 results = []
-                for row in cursor.fetchall():
+                for row in rows:
                     results.append({
                         'college_code': row['college_code'],
                         'college_name': row['college_name']
@@ -349,10 +1671,303 @@ class CollegeDatabase:
             logger.error(f"Error searching colleges: {e}")
             return []
     
+    def match_names(self, name: str, limit: int = 5, min_score: float = FUZZY_MIN_SCORE) -> Dict:
+        """Typo-tolerant college and branch name candidates, best first.
+
+        Scores (0-100) are the share of the name's trigrams found in each
+        candidate; see fuzzy_index.TrigramIndex.
+        """
+        gazetteer = self.get_college_gazetteer()
+        if gazetteer is None:
+            return {'colleges': [], 'branches': []}
+        return {
+            'colleges': [{'college_code': code, 'college_name': college_name, 'score': score}
+                         for code, college_name, score in gazetteer.fuzzy_colleges(name, limit, min_score)],
+            'branches': [{'branch_name': branch_name, 'score': score}
+                         for branch_name, score in gazetteer.fuzzy_branches(name, limit, min_score)]
+        }
+
+    def find_eligible_branches(self, category: str, rank: Optional[int] = None,
+                               percentile: Optional[float] = None, stage: Optional[str] = None,
+                               limit: int = 50, offset: int = 0, academic_year: Optional[int] = None,
+                               cap_round: Optional[int] = None) -> List[Dict]:
+        """Find branches whose closing rank/percentile admits the given student.
+
+        A branch is eligible when its closing rank is at or beyond the student's
+        rank (or its cutoff percentage is at or below the student's percentile).
+        Results are ordered by closing rank, most competitive first, and are
+        served by a range scan over the (academic_year, cap_round, category,
+        stage, rank) covering index, or by a mask over the snapshot's cutoff
+        arrays when it is enabled. Cutoffs are from the latest CAP round unless
+        academic_year/cap_round name another.
+        """
+        if rank is None and percentile is None:
+            return []
+
+        snapshot = self._snapshot_for(academic_year, cap_round)
+        if snapshot is not None:
+            return snapshot.find_eligible_branches(category, rank, percentile, stage, limit, offset)
+
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
+                admission_round = list(self._read_round(cursor, academic_year, cap_round))
+
+                if stage:
+                    stages = [stage]
+                else:
+                    # IN over the stage column keeps the index range scan usable
+                    stages = [row[0] for row in cursor.execute(
+                        'SELECT DISTINCT stage FROM cutoff_data WHERE academic_year = ? AND cap_round = ?',
+                        admission_round)]
+                if not stages:
+                    return []
+
+                if rank is not None:
+                    condition, order, param = 'cd.rank >= ?', 'cd.rank ASC', rank
+                else:
+                    condition, order, param = 'cd.percentage <= ?', 'cd.percentage DESC', percentile
+
+                cursor.execute(f'''
+                    SELECT co.college_code, co.college_name, b.branch_code, b.branch_name, b.status,
+                           cd.stage, cd.category, cd.rank, cd.percentage
+                    FROM cutoff_data cd
+                    JOIN branches b ON b.id = cd.branch_id
+                    JOIN colleges co ON co.id = b.college_id
+                    WHERE cd.academic_year = ? AND cd.cap_round = ? AND cd.category = ?
+                      AND cd.stage IN ({', '.join('?' * len(stages))}) AND {condition}
+                    ORDER BY {order}, co.college_code, b.branch_code, cd.stage
+                    LIMIT ? OFFSET ?
+                ''', admission_round + [category.upper()] + stages + [param, limit, offset])
+
+                results = []
+                for row in cursor.fetchall():
+                    results.append({
+                        'college_code': row['college_code'],
+                        'college_name': row['college_name'],
+                        'branch_code': row['branch_code'],
+                        'branch_name': row['branch_name'],
+                        'status': row['status'],
+                        'stage': row['stage'],
+                        'category': row['category'],
+                        'closing_rank': row['rank'],
+                        'percentage': row['percentage']
+                    })
+
+                return results
+
+        except Exception as e:
+            logger.error(f"Error finding eligible branches: {e}")
+            return []
+
+    def find_eligible_branches_batch(self, students: List[Dict], stage: Optional[str] = None,
+                                     limit: int = 10, academic_year: Optional[int] = None,
+                                     cap_round: Optional[int] = None) -> List[List[Dict]]:
+        """Eligible branches for many students at once (counselling-style bulk reports).
+
+        students are dicts with a category and a rank or percentile. Returns
+        one list per student, each equal to find_eligible_branches with the
+        same limit. Served by the snapshot's vectorized batch lookup; without
+        a snapshot each student is queried in turn. limit is capped at
+        MAX_PAGE_SIZE, since the batch lookup allocates students x limit.
+        """
+        limit = max(0, min(limit, MAX_PAGE_SIZE))
+        try:
+            snapshot = self._snapshot_for(academic_year, cap_round)
+            if snapshot is not None:
+                return snapshot.find_eligible_branches_batch(students, stage, limit)
+            return [
+                self.find_eligible_branches(student.get('category', ''), rank=student.get('rank'),
+                                            percentile=student.get('percentile'), stage=stage, limit=limit,
+                                            academic_year=academic_year, cap_round=cap_round)
+                for student in students
+            ]
+
+        except Exception as e:
+            logger.error(f"Error finding eligible branches in batch: {e}")
+            return []
+
+    def get_cutoff_history(self, college_code: str, branch_code: Optional[str] = None,
+                           category: Optional[str] = None, stage: Optional[str] = None) -> List[Dict]:
+        """A college's cutoffs across every academic year and CAP round, for trend questions.
+
+        Rows are ordered by branch, category and stage, then year and round,
+        so each series reads oldest to newest. Served from SQLite through the
+        (branch_id, academic_year, cap_round) index; the snapshot only holds
+        the latest round.
+        """
+        conditions = ['co.college_code = ?']
+        params = [college_code]
+        for column, value in (('b.branch_code', branch_code), ('cd.category', category), ('cd.stage', stage)):
+            if value:
+                conditions.append(f'{column} = ?')
+                params.append(value.upper() if column == 'cd.category' else value)
+
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
+                cursor.execute(f'''
+                    SELECT cd.academic_year, cd.cap_round, b.branch_code, b.branch_name,
+                           cd.stage, cd.category, cd.rank, cd.percentage
+                    FROM colleges co
+                    JOIN branches b ON b.college_id = co.id
+                    JOIN cutoff_data cd ON cd.branch_id = b.id
+                    WHERE {' AND '.join(conditions)}
+                    ORDER BY b.branch_code, cd.category, cd.stage, cd.academic_year, cd.cap_round
+                ''', params)
+                return [dict(row) for row in cursor.fetchall()]
+
+        except Exception as e:
+            logger.error(f"Error getting cutoff history: {e}")
+            return []
+
+    @staticmethod
+    def _admission_rounds(cursor) -> List[Dict]:
+        cursor.execute('''
+            SELECT academic_year, cap_round, COUNT(*) FROM cutoff_data
+            GROUP BY academic_year, cap_round
+            ORDER BY academic_year, cap_round
+        ''')
+        return [{'academic_year': year, 'cap_round': cap_round, 'cutoff_records': count}
+                for year, cap_round, count in cursor.fetchall()]
+
+    def get_admission_rounds(self) -> List[Dict]:
+        """Stored (academic_year, cap_round) partitions with their row counts, oldest first."""
+        try:
+            with self.pool.connection() as conn:
+                return self._admission_rounds(conn.cursor())
+
+        except Exception as e:
+            logger.error(f"Error getting admission rounds: {e}")
+            return []
+
+    def resolve_admission_round(self, academic_year: Optional[int] = None,
+                                cap_round: Optional[int] = None) -> Tuple[Optional[int], Optional[int]]:
+        """The (academic_year, cap_round) a read with these arguments covers; (None, None) when empty."""
+        try:
+            with self.pool.connection() as conn:
+                return self._read_round(conn.cursor(), academic_year, cap_round)
+
+        except Exception as e:
+            logger.error(f"Error resolving admission round: {e}")
+            return None, None
+
+    INGEST_JOB_FIELDS = ('status', 'options', 'total_pages', 'pages_processed', 'colleges_stored',
+                         'result', 'error', 'started_at', 'finished_at')
+    
+    def create_ingest_job(self, job_id: str, filename: str, filepath: str, options: Optional[Dict] = None) -> bool:
+        """Record a queued PDF ingestion job."""
+        try:
+            with self.pool.connection() as conn:
+                now = time.time()
+                conn.execute('''
+                    INSERT INTO ingest_jobs (id, filename, filepath, status, options, created_at, updated_at)
+                    VALUES (?, ?, ?, 'queued', ?, ?, ?)
+                ''', (job_id, filename, filepath, json.dumps(options or {}), now, now))
+                return True
+                
+        except Exception as e:
+            logger.error(f"Error creating ingest job: {e}")
+            return False
+    
+    def update_ingest_job(self, job_id: str, **fields) -> bool:
+        """Update job columns; options and result are stored as JSON."""
+        try:
+            unknown = set(fields) - set(self.INGEST_JOB_FIELDS)
+            if unknown:
+                raise ValueError(f"Unknown ingest job fields: {sorted(unknown)}")
+            
+            for name in ('options', 'result'):
+                if fields.get(name) is not None:
+                    fields[name] = json.dumps(fields[name])
+            fields['updated_at'] = time.time()
+            
+            assignments = ", ".join(f"{name} = ?" for name in fields)
+            with self.pool.connection() as conn:
+                cursor = conn.execute(f'UPDATE ingest_jobs SET {assignments} WHERE id = ?',
+                                      (*fields.values(), job_id))
+                return cursor.rowcount > 0
+                
+        except Exception as e:
+            logger.error(f"Error updating ingest job {job_id}: {e}")
+            return False
+    
+    def claim_ingest_job(self, job_id: str, owner: str, stale_after: float) -> bool:
+        """Atomically mark a job running for owner; False if another owner has it or it has finished.
+
+        A queued job can always be claimed. A running job can only be taken
+        over once its heartbeat (updated_at) is stale_after seconds old, i.e.
+        its owner has stopped.
+        """
+        try:
+            with self.pool.connection() as conn:
+                now = time.time()
+                cursor = conn.execute('''
+                    UPDATE ingest_jobs SET status = 'running', owner = ?, started_at = ?, updated_at = ?
+                    WHERE id = ? AND (status = 'queued' OR (status = 'running' AND updated_at < ?))
+                ''', (owner, now, now, job_id, now - stale_after))
+                return cursor.rowcount > 0
+                
+        except Exception as e:
+            logger.error(f"Error claiming ingest job {job_id}: {e}")
+            return False
+    
+    @staticmethod
+    def _ingest_job_from_row(row) -> Dict:
+        job = dict(row)
+        job['options'] = json.loads(job['options']) if job['options'] else {}
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+    
+    def get_ingest_job(self, job_id: str) -> Optional[Dict]:
+        """Get one ingestion job by id."""
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
+                row = cursor.execute('SELECT * FROM ingest_jobs WHERE id = ?', (job_id,)).fetchone()
+                return self._ingest_job_from_row(row) if row else None
+                
+        except Exception as e:
+            logger.error(f"Error getting ingest job {job_id}: {e}")
+            return None
+    
+    def get_unfinished_ingest_jobs(self, stale_after: float) -> List[Dict]:
+        """Jobs still queued, or running without a heartbeat for stale_after seconds, oldest first.
+
+        Used to resume jobs left by a stopped server; running jobs with a
+        fresh heartbeat belong to a live one and are left alone.
+        """
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
+                cursor.execute('''
+                    SELECT * FROM ingest_jobs
+                    WHERE status = 'queued' OR (status = 'running' AND updated_at < ?)
+                    ORDER BY created_at
+                ''', (time.time() - stale_after,))
+                return [self._ingest_job_from_row(row) for row in cursor.fetchall()]
+                
+        except Exception as e:
+            logger.error(f"Error getting unfinished ingest jobs: {e}")
+            return []
+
     def get_database_stats(self) -> Dict:
-        """Get database statistics."""
+        """Get database statistics.
+
+        The counts scan whole tables, so they are kept until the next ingest
+        moves the generation.
+        """
+        generation = self.generation
+        stats = self._stats
+        if stats is not None and stats[0] == generation:
+            return dict(stats[1])
+
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('SELECT COUNT(*) FROM colleges')
@@ -364,11 +1979,14 @@ class CollegeDatabase:
                 cursor.execute('SELECT COUNT(*) FROM cutoff_data')
                 cutoff_count = cursor.fetchone()[0]
                 
-                return {
+                stats = {
                     'colleges': college_count,
                     'branches': branch_count,
-                    'cutoff_records': cutoff_count
+                    'cutoff_records': cutoff_count,
+                    'admission_rounds': self._admission_rounds(cursor)
                 }
+                self._stats = (generation, stats)
+                return dict(stats)
                 
         except Exception as e:
             logger.error(f"Error getting database stats: {e}")
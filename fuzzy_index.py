@@ -0,0 +1,69 @@
+"""
+Typo-tolerant name lookup over trigram postings.
+
+TrigramIndex breaks every name into padded character trigrams ("walchand"
+-> "$wa", "wal", ..., "nd$") and keeps, for each trigram, a NumPy array of
+the names containing it. A query counts its shared trigrams against every
+name with one bincount over the matching postings, so "Walchnd Colege" finds
+"Walchand College of Engineering, Sangli" without comparing strings one by
+one.
+"""
+
+from collections import defaultdict
+from typing import Hashable, Iterable, List, Set, Tuple
+
+import numpy as np
+
+from cutoff_snapshot import tokenize
+
+def trigrams(text: str) -> Set[str]:
+    """Padded character trigrams of each token in the text."""
+    grams = set()
+    for token in tokenize(text):
+        padded = f'${token}$'
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+class TrigramIndex:
+    """Trigram inverted index over (key, name) pairs; immutable once built.
+
+    search() scores each name by the share of the query's trigrams it
+    contains (0-100), so a query that is a misspelt part of a long name still
+    scores high; names with the same score are ordered by trigram overlap
+    with the whole name (Dice coefficient), then by insertion order.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[Hashable, str]]):
+        self.keys = []
+        self.names = []
+        postings = defaultdict(list)
+        sizes = []
+        for key, name in entries:
+            grams = trigrams(name)
+            for gram in grams:
+                postings[gram].append(len(self.names))
+            self.keys.append(key)
+            self.names.append(name)
+            sizes.append(len(grams))
+        self.postings = {gram: np.array(rows, dtype=np.int32) for gram, rows in postings.items()}
+        self.sizes = np.array(sizes, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def search(self, query: str, limit: int = 5, min_score: float = 60.0) -> List[Tuple[Hashable, str, float]]:
+        """Best (key, name, score) matches for the query, best first."""
+        grams = trigrams(query)
+        hits = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not hits or limit <= 0:
+            return []
+
+        shared = np.bincount(np.concatenate(hits), minlength=len(self.names))
+        score = 100.0 * shared / len(grams)
+        candidates = np.flatnonzero(score >= min_score)
+        if not len(candidates):
+            return []
+
+        dice = 2.0 * shared[candidates] / (len(grams) + self.sizes[candidates])
+        order = np.lexsort((candidates, -dice, -score[candidates]))[:limit]
+        return [(self.keys[row], self.names[row], round(float(score[row]), 1)) for row in candidates[order]]
@@ -0,0 +1,103 @@
+"""
+ETags, conditional GETs and cached response bodies for read-only Flask endpoints.
+
+Stored data only changes through an ingest, which moves db.data_version.
+HTTPCache.cached wraps a GET view so that:
+
+- its ETag is derived from that version and the request path, so
+  If-None-Match is answered with 304 before the view runs;
+- the serialized JSON body, and a gzip (or brotli, when the brotli package
+  is installed) copy for clients that accept it, are kept in a bounded
+  ResponseCache keyed on the version, so repeat requests skip the queries
+  and the serialization.
+
+Only 200 responses are cached; errors and 404s are passed through.
+"""
+
+import functools
+import gzip
+import threading
+import zlib
+from typing import Dict, Optional
+
+from flask import current_app, request
+
+from response_cache import ResponseCache
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+class HTTPCache:
+    """Conditional GET and body cache for views whose output depends only on stored data."""
+
+    def __init__(self, db, max_entries: int = 2048, ttl_seconds: float = 3600.0,
+                 max_bytes: Optional[int] = None, min_compress_bytes: int = 1024, gzip_level: int = 6):
+        self.db = db
+        # Bodies from older versions are never looked up again and age out of the LRU
+        self.bodies = ResponseCache(max_entries=max_entries, ttl_seconds=ttl_seconds, max_bytes=max_bytes)
+        self.min_compress_bytes = min_compress_bytes
+        self.gzip_level = gzip_level
+        self.encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+        self._lock = threading.Lock()
+        self.not_modified = 0
+
+    def cached(self, view):
+        """Decorator for a GET view returning JSON."""
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            # One read of the version, so the ETag and the cached body always agree
+            version = self.db.data_version
+            path = request.full_path
+            etag = f"{version}-{zlib.crc32(path.encode('utf-8')):08x}"
+            if request.if_none_match.contains_weak(etag):
+                with self._lock:
+                    self.not_modified += 1
+                return self._response(b'', etag, None, status=304)
+
+            encoding = request.accept_encodings.best_match(self.encodings)
+            body = self.bodies.get((version, path, encoding)) if encoding else None
+            if body is None:
+                raw = self.bodies.get((version, path, None))
+                if raw is None:
+                    response = current_app.make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    raw = response.get_data()
+                    self.bodies.put((version, path, None), raw)
+                if encoding and len(raw) >= self.min_compress_bytes:
+                    body = self._compress(raw, encoding)
+                    self.bodies.put((version, path, encoding), body)
+                else:
+                    body, encoding = raw, None
+            return self._response(body, etag, encoding)
+        return wrapper
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == 'br':
+            return brotli.compress(body)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    @staticmethod
+    def _response(body: bytes, etag: str, encoding: Optional[str], status: int = 200):
+        # Weak tag: the identity and compressed bodies are the same resource version
+        response = current_app.response_class(body, status=status, mimetype='application/json')
+        response.set_etag(etag, weak=True)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        # Clients and CDNs may store the body but must revalidate it
+        response.headers['Cache-Control'] = 'no-cache'
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def clear(self):
+        """Drop every cached body."""
+        self.bodies.clear()
+
+    def get_stats(self) -> Dict:
+        """Body cache counters plus the number of 304 answers."""
+        stats = self.bodies.get_stats()
+        stats['not_modified'] = self.not_modified
+        stats['encodings'] = list(self.encodings)
+        return stats
@@ -0,0 +1,178 @@
+import contextlib
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ('completed', 'failed')
+
+class IngestJobQueue:
+    """Background PDF ingestion: uploads are queued and parsed by worker threads.
+
+    Job state lives in the ingest_jobs table, shared by every server process
+    on the database. A worker claims a job atomically before running it, so
+    two processes (gunicorn workers, or the async and Flask servers) never
+    ingest the same upload at once. Progress writes are the job's heartbeat:
+    a running job whose heartbeat is stale_after seconds old belonged to a
+    server that stopped, and is picked up again by start() or by an idle
+    worker's periodic rescan. An interrupted job is re-run from the first
+    page; the upsert-based ingest makes that safe.
+    """
+
+    def __init__(self, db, parser, workers: int = 1, progress_interval: float = 1.0,
+                 stale_after: float = 300.0):
+        self.db = db
+        self.parser = parser
+        self.workers = max(1, workers)
+        # Minimum seconds between page-progress writes to the jobs table
+        self.progress_interval = progress_interval
+        # Seconds without a heartbeat before another queue may take over a running job
+        self.stale_after = stale_after
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the worker threads and re-queue unfinished jobs; safe to call repeatedly."""
+        with self._lock:
+            if self._threads:
+                return
+            self._queue_unfinished()
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"ingest-worker-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None):
+        """Let the workers finish their current job and exit."""
+        with self._lock:
+            for _ in self._threads:
+                self._queue.put(None)
+            for thread in self._threads:
+                thread.join(timeout)
+            self._threads = []
+
+    def submit(self, filepath: str, filename: Optional[str] = None, workers: int = 1,
+               use_cache: bool = True, academic_year: Optional[int] = None,
+               cap_round: Optional[int] = None, diff: bool = False) -> Optional[str]:
+        """Queue an uploaded PDF for parsing and storage; returns the job id.
+
+        academic_year and cap_round override the ones printed in the PDF header.
+        diff=True writes only what changed since the round was last stored.
+        """
+        job_id = uuid.uuid4().hex
+        options = {'workers': workers, 'cache': use_cache, 'academic_year': academic_year, 'cap_round': cap_round,
+                   'diff': diff}
+        if not self.db.create_ingest_job(job_id, filename or os.path.basename(filepath), filepath, options):
+            return None
+        self._queue.put(job_id)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Return job state with throughput and ETA derived from its progress."""
+        job = self.db.get_ingest_job(job_id)
+        if not job:
+            return None
+
+        job.pop('filepath', None)
+        started_at = job['started_at']
+        end_time = job['finished_at'] or time.time()
+        elapsed = end_time - started_at if started_at else 0.0
+        pages = job['pages_processed']
+        total_pages = job['total_pages']
+
+        job['elapsed_seconds'] = round(elapsed, 2)
+        job['pages_per_second'] = round(pages / elapsed, 2) if elapsed > 0 else None
+        job['colleges_per_second'] = round(job['colleges_stored'] / elapsed, 2) if elapsed > 0 else None
+        job['progress'] = round(pages / total_pages, 4) if total_pages else None
+        job['eta_seconds'] = None
+        if job['status'] == 'running' and total_pages and pages:
+            job['eta_seconds'] = round((total_pages - pages) * elapsed / pages, 1)
+        elif job['status'] in FINISHED_STATUSES:
+            job['eta_seconds'] = 0
+        return job
+
+    def _queue_unfinished(self):
+        for job in self.db.get_unfinished_ingest_jobs(self.stale_after):
+            logger.info(f"Resuming ingest job {job['id']} ({job['status']})")
+            self._queue.put(job['id'])
+
+    def _worker(self):
+        while True:
+            try:
+                job_id = self._queue.get(timeout=self.stale_after)
+            except queue.Empty:
+                # Pick up jobs left queued or running by a server that stopped
+                self._queue_unfinished()
+                continue
+            if job_id is None:
+                break
+            try:
+                self._run(job_id)
+            except Exception as e:
+                logger.error(f"Ingest job {job_id} crashed: {e}")
+                self.db.update_ingest_job(job_id, status='failed', error=str(e), finished_at=time.time())
+
+    def _run(self, job_id: str):
+        # Finished, or running under another owner: nothing to do here
+        if not self.db.claim_ingest_job(job_id, self.owner, self.stale_after):
+            return
+
+        job = self.db.get_ingest_job(job_id)
+        filepath = job['filepath']
+        if not os.path.exists(filepath):
+            self.db.update_ingest_job(job_id, status='failed', error="Uploaded file is missing",
+                                      finished_at=time.time())
+            return
+
+        # The upload is only needed until the job has finished, however it ends
+        try:
+            self._ingest(job_id, job, filepath)
+        finally:
+            # Never fail a finished job over the cleanup
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(filepath)
+
+    def _ingest(self, job_id: str, job: Dict, filepath: str):
+        total_pages = self.parser.count_pages(filepath)
+        self.db.update_ingest_job(job_id, total_pages=total_pages, pages_processed=0, colleges_stored=0,
+                                  error=None)
+        logger.info(f"Ingest job {job_id} started: {job['filename']} ({total_pages} pages)")
+
+        last_write = [0.0]
+
+        def on_pages(pages_processed):
+            now = time.time()
+            if now - last_write[0] >= self.progress_interval:
+                last_write[0] = now
+                self.db.update_ingest_job(job_id, pages_processed=pages_processed)
+
+        def on_batch(stats):
+            self.db.update_ingest_job(job_id, colleges_stored=stats['stored_colleges'])
+
+        options = job['options']
+        admission_round = self.parser.read_admission_round(filepath)
+        stats = self.db.store_college_stream(
+            self.parser.parse_pdf_stream(filepath, workers=options.get('workers', 1),
+                                         cache=options.get('cache', True), progress=on_pages),
+            progress=on_batch,
+            academic_year=options.get('academic_year') or admission_round['academic_year'],
+            cap_round=options.get('cap_round') or admission_round['cap_round'],
+            diff=options.get('diff', False)
+        )
+
+        if stats.get('success'):
+            self.db.update_ingest_job(job_id, status='completed', pages_processed=total_pages,
+                                      colleges_stored=stats['stored_colleges'], result=stats,
+                                      finished_at=time.time())
+            logger.info(f"Ingest job {job_id} completed: {stats['parsed']}")
+        else:
+            self.db.update_ingest_job(job_id, status='failed', error=stats.get('error'), result=stats,
+                                      finished_at=time.time())
+            logger.error(f"Ingest job {job_id} failed: {stats.get('error')}")
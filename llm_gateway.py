@@ -0,0 +1,551 @@
+import asyncio
+import json
+import logging
+import math
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError, wait
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    """Stop calling a provider after repeated failures.
+
+    After failure_threshold consecutive failures the breaker opens and
+    allow() refuses calls for reset_timeout seconds. It then lets a single
+    trial call through (half-open): success closes it again, failure
+    re-opens it for another reset_timeout.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.failures < self.failure_threshold:
+                return 'closed'
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return 'open'
+            return 'half_open'
+
+    def allow(self) -> bool:
+        """Whether a call may be made now; claims the trial call when half-open."""
+        with self._lock:
+            if self.failures < self.failure_threshold:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_timeout and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """Give back a trial call that was cancelled before it had an outcome."""
+        with self._lock:
+            self._trial_in_flight = False
+
+class LLMProvider:
+    """A text-generation backend with its own circuit breaker and counters."""
+
+    name = 'provider'
+    # Whether stream() yields tokens as they are generated
+    streams = False
+
+    def __init__(self, breaker: Optional[CircuitBreaker] = None):
+        self.breaker = breaker or CircuitBreaker()
+        self.calls = 0
+        self.failures = 0
+        self.last_error = None
+
+    def generate(self, prompt: str, max_tokens: int, temperature: float, timeout: float) -> str:
+        """Return the generated text; raise on any failure."""
+        raise NotImplementedError
+
+    def stream(self, prompt: str, max_tokens: int, temperature: float, timeout: float) -> Iterator[str]:
+        """Yield the generated text in pieces; by default all at once."""
+        yield self.generate(prompt, max_tokens, temperature, timeout)
+
+    async def agenerate(self, prompt: str, max_tokens: int, temperature: float, timeout: float) -> str:
+        """generate() for asyncio callers; by default run on a worker thread."""
+        return await asyncio.to_thread(self.generate, prompt, max_tokens, temperature, timeout)
+
+    async def astream(self, prompt: str, max_tokens: int, temperature: float,
+                      timeout: float) -> AsyncIterator[str]:
+        """stream() for asyncio callers; by default the whole answer at once."""
+        yield await self.agenerate(prompt, max_tokens, temperature, timeout)
+
+    def record_failure(self, error: Exception):
+        self.failures += 1
+        self.last_error = str(error) or type(error).__name__
+        self.breaker.record_failure()
+
+    def get_stats(self) -> Dict:
+        return {
+            'state': self.breaker.state,
+            'calls': self.calls,
+            'failures': self.failures,
+            'last_error': self.last_error
+        }
+
+class OllamaProvider(LLMProvider):
+    """Ollama's /api/generate over a pooled keep-alive HTTP session."""
+
+    name = 'ollama'
+    streams = True
+
+    def __init__(self, base_url: str = 'http://localhost:11434', model: str = 'gemma3:1b',
+                 connect_timeout: float = 1.0, pool_size: int = 8,
+                 breaker: Optional[CircuitBreaker] = None):
+        super().__init__(breaker)
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.connect_timeout = connect_timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.pool_size = pool_size
+        # Created on first async use, inside the event loop that uses it
+        self._async_client = None
+
+    def _post(self, prompt: str, max_tokens: int, temperature: float, timeout: float, stream: bool):
+        response = self.session.post(
+            f'{self.base_url}/api/generate',
+            json=self._request_body(prompt, max_tokens, temperature, stream),
+            timeout=(min(self.connect_timeout, timeout), timeout),
+            stream=stream
+        )
+        response.raise_for_status()
+        return response
+
+    def generate(self, prompt: str, max_tokens: int, temperature: float, timeout: float) -> str:
+        return self._post(prompt, max_tokens, temperature, timeout, stream=False).json().get('response', '')
+
+    def stream(self, prompt: str, max_tokens: int, temperature: float, timeout: float) -> Iterator[str]:
+        """Relay Ollama's newline-delimited JSON chunks; timeout bounds each wait for data."""
+        with self._post(prompt, max_tokens, temperature, timeout, stream=True) as response:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get('error'):
+                    raise RuntimeError(chunk['error'])
+                if chunk.get('response'):
+                    yield chunk['response']
+                if chunk.get('done'):
+                    break
+
+    def _request_body(self, prompt: str, max_tokens: int, temperature: float, stream: bool) -> Dict:
+        return {
+            'model': self.model,
+            'prompt': prompt,
+            'stream': stream,
+            'options': {
+                'num_predict': max_tokens,
+                'temperature': temperature
+            }
+        }
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=httpx.Limits(max_connections=None, max_keepalive_connections=self.pool_size)
+            )
+        return self._async_client
+
+    async def agenerate(self, prompt: str, max_tokens: int, temperature: float, timeout: float) -> str:
+        response = await self._get_async_client().post(
+            '/api/generate',
+            json=self._request_body(prompt, max_tokens, temperature, stream=False),
+            timeout=httpx.Timeout(timeout, connect=min(self.connect_timeout, timeout))
+        )
+        response.raise_for_status()
+        return response.json().get('response', '')
+
+    async def astream(self, prompt: str, max_tokens: int, temperature: float,
+                      timeout: float) -> AsyncIterator[str]:
+        async with self._get_async_client().stream(
+            'POST', '/api/generate',
+            json=self._request_body(prompt, max_tokens, temperature, stream=True),
+            timeout=httpx.Timeout(timeout, connect=min(self.connect_timeout, timeout))
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get('error'):
+                    raise RuntimeError(chunk['error'])
+                if chunk.get('response'):
+                    yield chunk['response']
+                if chunk.get('done'):
+                    break
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+class CohereProvider(LLMProvider):
+    """Cohere chat through an existing cohere.Client (or cohere.AsyncClient).
+
+    Each call passes the gateway's remaining time as the SDK request timeout.
+    """
+
+    name = 'cohere'
+
+    def __init__(self, client, model: str = 'command-r-plus', breaker: Optional[CircuitBreaker] = None):
+        super().__init__(breaker)
+        self.client = client
+        self.model = model
+
+    @staticmethod
+    def _request_options(timeout: float) -> Dict:
+        # The SDK's own retries would outlast the deadline; the gateway falls back instead
+        return {'timeout_in_seconds': max(1, math.ceil(timeout)), 'max_retries': 0}
+
+    def generate(self, prompt: str, max_tokens: int, temperature: float, timeout: float) -> str:
+        # Bounded by the SDK timeout, so a hung call frees its gateway worker
+        response = self.client.chat(
+            model=self.model,
+            message=prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            request_options=self._request_options(timeout)
+        )
+        return response.text.strip()
+
+    async def agenerate(self, prompt: str, max_tokens: int, temperature: float, timeout: float) -> str:
+        # cohere.AsyncClient is awaited directly; a sync client runs on a worker thread
+        if not asyncio.iscoroutinefunction(self.client.chat):
+            return await super().agenerate(prompt, max_tokens, temperature, timeout)
+        response = await self.client.chat(
+            model=self.model,
+            message=prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            request_options=self._request_options(timeout)
+        )
+        return response.text.strip()
+
+class LLMGateway:
+    """Bounded-time text generation across providers, in preference order.
+
+    Calls run on a shared thread pool, so the caller waits at most the
+    deadline no matter how slow a provider is. Providers whose circuit
+    breaker is open are skipped. When the current provider fails, or has
+    not answered within hedge_delay seconds, the next one is started as
+    well, and the first non-empty answer wins.
+    """
+
+    def __init__(self, providers: List[LLMProvider], deadline: float = 20.0,
+                 hedge_delay: float = 3.0, max_concurrency: int = 8):
+        self.providers = providers
+        self.deadline = deadline
+        self.hedge_delay = hedge_delay
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='llm')
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.answered = 0
+        self.hedged = 0
+        self.timeouts = 0
+
+    def generate(self, prompt: str, max_tokens: int = 200, temperature: float = 0.7,
+                 deadline: Optional[float] = None, providers: Optional[List[str]] = None) -> Optional[str]:
+        """Return the first successful answer, or None if every provider failed or time ran out.
+
+        providers optionally restricts the call to the named providers.
+        """
+        deadline_at = time.monotonic() + (self.deadline if deadline is None else deadline)
+        candidates = [p for p in self.providers if providers is None or p.name in providers]
+        pending = {}
+        launched = 0
+        next_launch_at = time.monotonic()
+        with self._lock:
+            self.requests += 1
+
+        try:
+            while True:
+                now = time.monotonic()
+                remaining = deadline_at - now
+                if remaining <= 0:
+                    if pending:
+                        with self._lock:
+                            self.timeouts += 1
+                        logger.warning(f"LLM deadline reached waiting for {[p.name for p in pending.values()]}")
+                    return None
+
+                if candidates and now >= next_launch_at:
+                    provider = candidates.pop(0)
+                    if provider.breaker.allow():
+                        pending[self._executor.submit(self._call, provider, prompt, max_tokens,
+                                                      temperature, remaining)] = provider
+                        launched += 1
+                        next_launch_at = now + self.hedge_delay
+                    continue
+
+                if not pending:
+                    return None
+
+                timeout = remaining if not candidates else min(remaining, max(0.0, next_launch_at - now))
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.pop(future)
+                    text = future.result()
+                    if text:
+                        with self._lock:
+                            self.answered += 1
+                        return text
+                    # A failed provider hands over to the next one straight away
+                    next_launch_at = time.monotonic()
+        finally:
+            if launched > 1:
+                with self._lock:
+                    self.hedged += 1
+
+    def stream(self, prompt: str, max_tokens: int = 200, temperature: float = 0.7,
+               deadline: Optional[float] = None, providers: Optional[List[str]] = None) -> Iterator[str]:
+        """Yield answer tokens from the first provider that starts answering; nothing if none does.
+
+        Providers are tried in order, skipping open breakers; one that fails
+        before its first token hands over to the next. Once tokens have been
+        sent the answer is never switched, so there is no hedging here. The
+        deadline bounds the wait for the first token and for each token after it.
+        """
+        timeout = self.deadline if deadline is None else deadline
+        candidates = [p for p in self.providers if providers is None or p.name in providers]
+        with self._lock:
+            self.requests += 1
+
+        for provider in candidates:
+            if not provider.breaker.allow():
+                continue
+
+            if not provider.streams:
+                # Run on the pool so a hung call still returns control at the deadline
+                try:
+                    text = self._executor.submit(self._call, provider, prompt, max_tokens,
+                                                 temperature, timeout).result(timeout)
+                except TimeoutError:
+                    with self._lock:
+                        self.timeouts += 1
+                    continue
+                if text:
+                    with self._lock:
+                        self.answered += 1
+                    yield text
+                    return
+                continue
+
+            provider.calls += 1
+            started = False
+            try:
+                for token in provider.stream(prompt, max_tokens, temperature, timeout):
+                    if token:
+                        started = True
+                        yield token
+                if not started:
+                    raise ValueError("Empty response")
+                provider.breaker.record_success()
+                with self._lock:
+                    self.answered += 1
+                return
+            except GeneratorExit:
+                # The client went away; that is no verdict on the provider either way
+                provider.breaker.release()
+                raise
+            except Exception as e:
+                provider.record_failure(e)
+                logger.warning(f"LLM provider {provider.name} failed while streaming: {e}")
+                if started:
+                    return
+
+    @staticmethod
+    def _call(provider: LLMProvider, prompt: str, max_tokens: int, temperature: float,
+              timeout: float) -> Optional[str]:
+        provider.calls += 1
+        try:
+            text = provider.generate(prompt, max_tokens, temperature, timeout)
+            if not text:
+                raise ValueError("Empty response")
+            provider.breaker.record_success()
+            return text
+        except Exception as e:
+            provider.record_failure(e)
+            logger.warning(f"LLM provider {provider.name} failed: {e}")
+            return None
+
+    def close(self):
+        """Stop the worker pool without waiting for calls still in flight."""
+        self._executor.shutdown(wait=False)
+
+    def get_stats(self) -> Dict:
+        """Return request counters and per-provider breaker state."""
+        return {
+            'requests': self.requests,
+            'answered': self.answered,
+            'hedged': self.hedged,
+            'timeouts': self.timeouts,
+            'deadline_seconds': self.deadline,
+            'hedge_delay_seconds': self.hedge_delay,
+            'providers': {provider.name: provider.get_stats() for provider in self.providers}
+        }
+
+class AsyncLLMGateway(LLMGateway):
+    """asyncio counterpart of LLMGateway: agenerate() and astream().
+
+    Same preference order, hedging, deadlines and breakers, but provider
+    calls are tasks on the running event loop, so thousands of waiting
+    chats cost no threads. A provider still running at the deadline is
+    cancelled and counted as failed; a hedge that loses the race is
+    cancelled without a verdict.
+    """
+
+    async def agenerate(self, prompt: str, max_tokens: int = 200, temperature: float = 0.7,
+                        deadline: Optional[float] = None,
+                        providers: Optional[List[str]] = None) -> Optional[str]:
+        """Return the first successful answer, or None if every provider failed or time ran out."""
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + (self.deadline if deadline is None else deadline)
+        candidates = [p for p in self.providers if providers is None or p.name in providers]
+        pending = {}
+        launched = 0
+        next_launch_at = loop.time()
+        self.requests += 1
+
+        try:
+            while True:
+                now = loop.time()
+                remaining = deadline_at - now
+                if remaining <= 0:
+                    if pending:
+                        self.timeouts += 1
+                        logger.warning(f"LLM deadline reached waiting for {[p.name for p in pending.values()]}")
+                        for provider in pending.values():
+                            provider.record_failure(TimeoutError("Deadline exceeded"))
+                    return None
+
+                if candidates and now >= next_launch_at:
+                    provider = candidates.pop(0)
+                    if provider.breaker.allow():
+                        task = asyncio.ensure_future(self._acall(provider, prompt, max_tokens,
+                                                                 temperature, remaining))
+                        pending[task] = provider
+                        launched += 1
+                        next_launch_at = now + self.hedge_delay
+                    continue
+
+                if not pending:
+                    return None
+
+                timeout = remaining if not candidates else min(remaining, max(0.0, next_launch_at - now))
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    pending.pop(task)
+                    text = task.result()
+                    if text:
+                        self.answered += 1
+                        return text
+                    # A failed provider hands over to the next one straight away
+                    next_launch_at = loop.time()
+        finally:
+            for task in pending:
+                task.cancel()
+            if launched > 1:
+                self.hedged += 1
+
+    async def astream(self, prompt: str, max_tokens: int = 200, temperature: float = 0.7,
+                      deadline: Optional[float] = None,
+                      providers: Optional[List[str]] = None) -> AsyncIterator[str]:
+        """Yield answer tokens from the first provider that starts answering, as LLMGateway.stream."""
+        timeout = self.deadline if deadline is None else deadline
+        candidates = [p for p in self.providers if providers is None or p.name in providers]
+        self.requests += 1
+
+        for provider in candidates:
+            if not provider.breaker.allow():
+                continue
+
+            if not provider.streams:
+                try:
+                    text = await asyncio.wait_for(self._acall(provider, prompt, max_tokens, temperature, timeout),
+                                                  timeout)
+                except asyncio.TimeoutError:
+                    self.timeouts += 1
+                    provider.record_failure(TimeoutError("Deadline exceeded"))
+                    continue
+                if text:
+                    self.answered += 1
+                    yield text
+                    return
+                continue
+
+            provider.calls += 1
+            started = False
+            try:
+                async for token in provider.astream(prompt, max_tokens, temperature, timeout):
+                    if token:
+                        started = True
+                        yield token
+                if not started:
+                    raise ValueError("Empty response")
+                provider.breaker.record_success()
+                self.answered += 1
+                return
+            except (GeneratorExit, asyncio.CancelledError):
+                # The client went away; that is no verdict on the provider either way
+                provider.breaker.release()
+                raise
+            except Exception as e:
+                provider.record_failure(e)
+                logger.warning(f"LLM provider {provider.name} failed while streaming: {e}")
+                if started:
+                    return
+
+    @staticmethod
+    async def _acall(provider: LLMProvider, prompt: str, max_tokens: int, temperature: float,
+                     timeout: float) -> Optional[str]:
+        provider.calls += 1
+        try:
+            text = await provider.agenerate(prompt, max_tokens, temperature, timeout)
+            if not text:
+                raise ValueError("Empty response")
+            provider.breaker.record_success()
+            return text
+        except asyncio.CancelledError:
+            provider.breaker.release()
+            raise
+        except Exception as e:
+            provider.record_failure(e)
+            logger.warning(f"LLM provider {provider.name} failed: {e}")
+            return None
+
+    async def aclose(self):
+        """Close the providers' async HTTP clients."""
+        for provider in self.providers:
+            if hasattr(provider, 'aclose'):
+                await provider.aclose()
+        self.close()
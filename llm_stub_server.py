@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Minimal stand-in for the Ollama HTTP API, for tests and offline development.
+
+Serves POST /api/generate with a canned answer, in one JSON reply or, for
+"stream": true, as newline-delimited JSON chunks one word at a time. The
+delay, per-token delay, HTTP status and answer can be changed while it runs
+to simulate a slow or broken model.
+
+    python llm_stub_server.py [port]    # default 11434, Ollama's port
+"""
+
+import json
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Load tests open hundreds of connections at once
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        # Clients hanging up mid-reply (deadlines, closed streams) are expected here
+        pass
+
+class StubOllamaServer:
+    """Ollama-compatible stub served from a background thread; usable as a context manager."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, response_text: str = 'Stub answer.',
+                 delay: float = 0.0, status: int = 200, token_delay: float = 0.0):
+        self.response_text = response_text
+        self.delay = delay
+        self.status = status
+        self.token_delay = token_delay
+        self.requests = []
+        self._stopped = threading.Event()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                stub.requests.append(body)
+                if self.path != '/api/generate':
+                    self._reply(404, {'error': 'not found'})
+                    return
+                # Wait on the stop event so stop() is not held up by a long delay
+                if stub.delay:
+                    stub._stopped.wait(stub.delay)
+                if stub.status != 200:
+                    self._reply(stub.status, {'error': 'stub failure'})
+                    return
+                if body.get('stream'):
+                    self._stream(body.get('model'))
+                    return
+                self._reply(200, {'model': body.get('model'), 'response': stub.response_text, 'done': True})
+
+            def _stream(self, model):
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                tokens = re.findall(r'\S+\s*', stub.response_text)
+                for index, token in enumerate(tokens):
+                    if index and stub.token_delay:
+                        stub._stopped.wait(stub.token_delay)
+                    self._chunk({'model': model, 'response': token, 'done': False})
+                self._chunk({'model': model, 'response': '', 'done': True})
+                self.wfile.write(b'0\r\n\r\n')
+
+            def _chunk(self, payload):
+                data = json.dumps(payload).encode('utf-8') + b'\n'
+                self.wfile.write(f'{len(data):x}\r\n'.encode('ascii') + data + b'\r\n')
+                self.wfile.flush()
+
+            def _reply(self, status, payload):
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = _QuietHTTPServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 11434
+    server = StubOllamaServer(port=port)
+    print(f"🤖 Stub Ollama API listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
@@ -0,0 +1,122 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from typing import Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+class ParseCache:
+    """On-disk cache of parsed PDF results keyed by content hash and parser version.
+
+    Each entry is a gzip-compressed JSON-lines file with one college per line,
+    so it can be written and read back as a stream. When the cache grows past
+    max_bytes the least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir: str = "parse_cache", max_bytes: int = 200 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key_for(self, pdf_path: str, parser_version: str) -> str:
+        """SHA-256 of the PDF bytes combined with the parser version."""
+        digest = hashlib.sha256()
+        with open(pdf_path, 'rb') as file:
+            for block in iter(lambda: file.read(1024 * 1024), b''):
+                digest.update(block)
+        return f"{digest.hexdigest()}-v{parser_version}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.jsonl.gz")
+
+    def contains(self, pdf_path: str, parser_version: str) -> bool:
+        """Check whether a parse result for this PDF is cached."""
+        return os.path.exists(self._path(self.key_for(pdf_path, parser_version)))
+
+    def iter_colleges(self, key: str) -> Optional[Iterator[Dict]]:
+        """Return an iterator over the cached colleges, or None on a miss."""
+        path = self._path(key)
+        if not os.path.exists(path):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        # Touch the entry so eviction sees it as recently used
+        os.utime(path, None)
+        logger.info(f"Parse cache hit: {key}")
+        return self._read(path)
+
+    @staticmethod
+    def _read(path: str) -> Iterator[Dict]:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+    def store_stream(self, key: str, colleges: Iterable[Dict]) -> Iterator[Dict]:
+        """Pass colleges through while writing them to the cache.
+
+        The entry only becomes visible once the stream has been fully
+        consumed; an interrupted or failed parse leaves nothing behind.
+        """
+        path = self._path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        completed = False
+        try:
+            with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+                for college in colleges:
+                    f.write(json.dumps(college, ensure_ascii=False, separators=(',', ':')))
+                    f.write('\n')
+                    yield college
+            completed = True
+        finally:
+            if completed:
+                os.replace(tmp_path, path)
+                logger.info(f"Parse result cached: {key} ({os.path.getsize(path)} bytes)")
+                self.evict()
+            elif os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith('.jsonl.gz'):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                os.remove(path)
+                total -= size
+                logger.info(f"Evicted parse cache entry: {path}")
+
+    def clear(self):
+        """Delete every cached entry."""
+        with self._lock:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.jsonl.gz'):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+    def get_stats(self) -> Dict:
+        """Return hit/miss counters and the on-disk size of the cache."""
+        # Under the lock, so an eviction cannot remove an entry between the listing and its size
+        with self._lock:
+            size = sum(
+                os.path.getsize(os.path.join(self.cache_dir, name))
+                for name in os.listdir(self.cache_dir) if name.endswith('.jsonl.gz')
+            )
+            return {'hits': self.hits, 'misses': self.misses, 'bytes': size, 'max_bytes': self.max_bytes}
@@ -1,16 +1,58 @@
 import re
 import PyPDF2
 import pandas as pd
-from typing import Dict, List, Tuple, Optional
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, Optional
 import logging
 import json
+import os
+
+from parse_cache import ParseCache
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# Bump whenever a parser change alters the parsed output, so cached results are not reused
+PARSER_VERSION = "2"
+
+ROMAN_NUMERALS = {'I': 1, 'II': 2, 'III': 3, 'IV': 4, 'V': 5, 'VI': 6, 'VII': 7, 'VIII': 8, 'IX': 9, 'X': 10}
+
+def _parse_page_range(parser_class, pdf_path: str, start_page: int, end_page: int) -> Tuple[List[str], List[Dict], Optional[List[str]]]:
+    """Worker for parallel parsing: extract and parse one page range.
+
+    Returns (head, colleges, tail). colleges are the sections that open and
+    close inside the range. head holds the raw lines before the first of
+    those headers and tail the raw lines from the last header to the end;
+    both may be cut mid-line and are stitched with the neighbouring ranges
+    by the parent. When the range has no usable header, tail is None and
+    head holds every line.
+    """
+    parser = parser_class()
+    lines = "".join(parser.iter_page_texts(pdf_path, start_page, end_page)).split('\n')
+    
+    # The first and last lines may continue in the neighbouring ranges
+    headers = [i for i in range(1, len(lines) - 1) if parser.college_line_re.match(lines[i].strip())]
+    if not headers:
+        return lines, [], None
+    
+    colleges = list(parser.iter_colleges_from_lines(lines[headers[0]:headers[-1]]))
+    return lines[:headers[0]], colleges, lines[headers[-1]:]
+
+def clamp_workers(workers: Optional[int], ceiling: Optional[int] = None) -> int:
+    """A worker count within 1..min(CPU count, ceiling); None means as many as allowed."""
+    cpus = os.cpu_count() or 1
+    ceiling = cpus if ceiling is None else max(1, min(ceiling, cpus))
+    return ceiling if workers is None else max(1, min(workers, ceiling))
+
 class EnhancedCollegeParser:
-    def __init__(self):
+    parser_version = PARSER_VERSION
+    
+    def __init__(self, cache: Optional[ParseCache] = None):
+        # Optional on-disk cache of parse results, keyed by PDF content hash
+        self.cache = cache
+        
         # Pattern to match college code and name (e.g., "01002 - Government College of Engineering, Amravati")
         # College codes are typically 5 digits and appear at the start of a section
         self.college_name_pattern = r'^(\d{5})\s*-\s*(.+?)(?=\n|$)'
@@ -28,101 +70,282 @@ class EnhancedCollegeParser:
         # Pattern to match category and cutoff data (e.g., "GOPENS: 33717 (88.6037289)")
         self.category_pattern = r'([A-Z]+):\s*(\d+)\s*\(([\d.]+)\)'
         
+        # Pattern for a whole (stripped) college header line
+        self.college_line_re = re.compile(r'^(\d{5})\s*-\s*(.+)$')
+        
+        # Same header match run over a whole text by offset: equivalent to
+        # college_line_re on each stripped line, without splitting the text
+        self.college_header_re = re.compile(r'^[^\S\n]*(\d{5})[^\S\n]*-[^\S\n]*([^\n]*\S)[^\S\n]*$', re.MULTILINE)
+        
+        # Precompiled patterns for the single-pass segmenter and cutoff extractor
+        self.branch_re = re.compile(self.branch_pattern)
+        self.status_re = re.compile(self.status_pattern)
+        self.category_header_re = re.compile(r'\b[A-Z]{4,6}\b')
+        self.stage_row_re = re.compile(r'\b([IVX]+)(?:-Non\s+PWD)?\b')
+        self.branch_line_re = re.compile(r'^\d{10}')
+        self.rank_re = re.compile(r'\b(\d{4,6})\b')
+        self.percentage_re = re.compile(r'\(([\d.]+)\)')
+        
+        # Page header: "... of CAP Round - III for the Admission ... A .Y. 2024-25"
+        self.cap_round_re = re.compile(r'CAP\s*Round\s*-?\s*([IVX]+|\d+)\b', re.IGNORECASE)
+        self.academic_year_re = re.compile(r'A\s*\.?\s*Y\s*\.?\s*(\d{4})\s*-\s*\d{2,4}')
+        
+    def iter_page_texts(self, pdf_path: str, start_page: int = 0, end_page: Optional[int] = None) -> Iterator[str]:
+        """Yield the extracted text of each PDF page lazily, one page at a time."""
+        with open(pdf_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            total_pages = len(pdf_reader.pages)
+            end_page = total_pages if end_page is None else min(end_page, total_pages)
+            for page_number in range(start_page, end_page):
+                yield pdf_reader.pages[page_number].extract_text()
+    
+    def count_pages(self, pdf_path: str) -> int:
+        """Return the number of pages in the PDF."""
+        with open(pdf_path, 'rb') as file:
+            return len(PyPDF2.PdfReader(file).pages)
+    
+    def admission_round_from_text(self, text: str) -> Dict:
+        """Academic year (its first calendar year, 2024 for A.Y. 2024-25) and CAP round from header text."""
+        year_match = self.academic_year_re.search(text)
+        round_match = self.cap_round_re.search(text)
+        cap_round = None
+        if round_match:
+            value = round_match.group(1).upper()
+            cap_round = int(value) if value.isdigit() else ROMAN_NUMERALS.get(value)
+        return {
+            'academic_year': int(year_match.group(1)) if year_match else None,
+            'cap_round': cap_round
+        }
+    
+    def read_admission_round(self, pdf_path: str) -> Dict:
+        """Academic year and CAP round printed on the first page; None where not found."""
+        try:
+            return self.admission_round_from_text(next(self.iter_page_texts(pdf_path, 0, 1), ''))
+        except Exception as e:
+            logger.warning(f"Could not read admission round from {pdf_path}: {e}")
+            return {'academic_year': None, 'cap_round': None}
+    
     def extract_text_from_pdf(self, pdf_path: str) -> str:
         """Extract text content from PDF file."""
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text()
-                return text
+            return "".join(self.iter_page_texts(pdf_path))
         except Exception as e:
             logger.error(f"Error reading PDF: {e}")
             return ""
     
+    @staticmethod
+    def iter_lines(chunks: Iterable[str]) -> Iterator[str]:
+        """Split a stream of text chunks into lines.
+
+        Yields exactly what "".join(chunks).split('\n') would, so a line that
+        runs across a page break is stitched back together.
+        """
+        carry = ""
+        for chunk in chunks:
+            parts = (carry + chunk).split('\n')
+            carry = parts.pop()
+            yield from parts
+        yield carry
+    
+    def iter_college_spans(self, text: str) -> Iterator[Tuple[str, str, int, int]]:
+        """Find every college section in one pass, as (code, name, start, end) offsets.
+
+        A section runs from its header line up to the newline before the next
+        header, matching the line-based segmentation exactly.
+        """
+        previous = None
+        for match in self.college_header_re.finditer(text):
+            # The pattern is anchored at the line start, so match.start() is the line offset
+            if previous:
+                yield previous[0], previous[1], previous[2], match.start() - 1
+            previous = (match.group(1), match.group(2).strip(), match.start())
+        if previous:
+            yield previous[0], previous[1], previous[2], len(text)
+    
     def extract_colleges(self, text: str) -> List[Dict]:
         """Extract all colleges from text."""
         colleges = []
+        for college_code, college_name, start, end in self.iter_college_spans(text):
+            college = self._build_college(college_code, college_name, text, start, end)
+            if college:
+                colleges.append(college)
+        logger.info(f"Found {len(colleges)} colleges in text")
+        return colleges
+    
+    def iter_colleges_from_lines(self, lines: Iterable[str]) -> Iterator[Dict]:
+        """Yield each college as soon as the next college header closes its section.
+
+        Only the lines of the current college section are held in memory.
+        """
+        college_code = college_name = None
+        section_lines = []
         
-        # Split text into lines for better processing
-        lines = text.split('\n')
-        
-        # Find potential college lines (lines that start with 5-digit codes)
-        college_lines = []
-        for i, line in enumerate(lines):
-            line = line.strip()
-            if not line:
-                continue
-            
+        for line in lines:
             # Look for lines that start with 5-digit codes followed by dash and college name
-            match = re.match(r'^(\d{5})\s*-\s*(.+)$', line)
+            match = self.college_line_re.match(line.strip())
             if match:
-                college_lines.append((i, match.group(1), match.group(2).strip()))
+                if college_code is not None:
+                    college = self._build_college(college_code, college_name, '\n'.join(section_lines))
+                    if college:
+                        yield college
+                college_code, college_name = match.group(1), match.group(2).strip()
+                section_lines = [line]
+            elif college_code is not None:
+                section_lines.append(line)
+        
+        if college_code is not None:
+            college = self._build_college(college_code, college_name, '\n'.join(section_lines))
+            if college:
+                yield college
+    
+    def _build_college(self, college_code: str, college_name: str, text: str,
+                       start: int = 0, end: Optional[int] = None) -> Optional[Dict]:
+        """Parse the college section text[start:end] into a college record."""
+        try:
+            # Extract branches for this college
+            branches = self.extract_branches_for_college(text, start, end)
+            
+            logger.info(f"Found college: {college_code} - {college_name} with {len(branches)} branches")
+            
+            return {
+                'college_code': college_code,
+                'college_name': college_name,
+                'branches': branches,
+                'total_branches': len(branches)
+            }
+            
+        except Exception as e:
+            logger.error(f"Error parsing college {college_code} - {college_name}: {e}")
+            return None
+    
+    def _resolve_cache(self, cache) -> Optional[ParseCache]:
+        """cache=None/True uses the parser's cache, False bypasses it, or pass a ParseCache."""
+        if cache is None or cache is True:
+            return self.cache
+        if cache is False:
+            return None
+        return cache
+    
+    def parse_pdf_stream(self, pdf_path: str, workers: int = 1, cache=None,
+                         progress: Optional[Callable[[int], None]] = None) -> Iterator[Dict]:
+        """Parse a PDF page by page, yielding college records as they complete.
+
+        Memory stays bounded by one page plus one college section, so this can
+        feed CollegeDatabase.store_college_stream without loading the document.
+        With workers > 1 page ranges are parsed in a process pool and yielded
+        in document order. A cached result for the same PDF bytes is replayed
+        instead of parsing; a fresh parse is written to the cache as it streams.
+        progress, if given, is called with the number of pages extracted so far.
+        """
+        cache = self._resolve_cache(cache)
+        if cache is None:
+            return self._parse_stream(pdf_path, workers, progress)
         
-        logger.info(f"Found {len(college_lines)} potential college lines")
+        key = cache.key_for(pdf_path, self.parser_version)
+        cached = cache.iter_colleges(key)
+        if cached is not None:
+            return cached
+        return cache.store_stream(key, self._parse_stream(pdf_path, workers, progress))
+    
+    def _parse_stream(self, pdf_path: str, workers: int = 1,
+                      progress: Optional[Callable[[int], None]] = None) -> Iterator[Dict]:
+        if workers and workers > 1:
+            return self.iter_colleges_parallel(pdf_path, workers=workers, progress=progress)
+        pages = self.iter_page_texts(pdf_path)
+        if progress:
+            pages = self._report_pages(pages, progress)
+        return self.iter_colleges_from_lines(self.iter_lines(pages))
+    
+    @staticmethod
+    def _report_pages(pages: Iterable[str], progress: Callable[[int], None]) -> Iterator[str]:
+        for count, page in enumerate(pages, 1):
+            progress(count)
+            yield page
+    
+    @staticmethod
+    def page_ranges(total_pages: int, workers: int, chunk_pages: Optional[int] = None,
+                    start_page: int = 0) -> List[Tuple[int, int]]:
+        """Split pages into contiguous ranges, several per worker for load balancing."""
+        if not chunk_pages:
+            chunk_pages = max(1, -(-(total_pages - start_page) // (workers * 4)))
+        return [(start, min(start + chunk_pages, total_pages)) for start in range(start_page, total_pages, chunk_pages)]
+    
+    def iter_colleges_parallel(self, pdf_path: str, workers: Optional[int] = None, chunk_pages: Optional[int] = None,
+                               start_page: int = 0, end_page: Optional[int] = None,
+                               progress: Optional[Callable[[int], None]] = None) -> Iterator[Dict]:
+        """Extract and parse page ranges in a ProcessPoolExecutor.
+
+        Colleges whose section crosses a range boundary are re-assembled from
+        the ranges' raw head/tail lines, so the output is identical to the
+        serial parse. workers defaults to, and is capped at, the CPU count.
+        """
+        workers = clamp_workers(workers or None)
+        total_pages = self.count_pages(pdf_path)
+        if end_page is not None:
+            total_pages = min(end_page, total_pages)
+        ranges = self.page_ranges(total_pages, workers, chunk_pages, start_page)
+        logger.info(f"Parsing {total_pages - start_page} pages in {len(ranges)} ranges with {workers} workers")
         
-        # Process each college
-        for i, (line_index, college_code, college_name) in enumerate(college_lines):
-            try:
-                # Find the section for this college (from this line to the next college or end)
-                start_line = line_index
-                end_line = len(lines)
+        # Raw lines not yet assigned to a college; the last one may be cut mid-line
+        pending = []
+        pages_done = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                _parse_page_range,
+                repeat(type(self)),
+                repeat(pdf_path),
+                [start for start, _ in ranges],
+                [end for _, end in ranges]
+            )
+            for (start, end), (head, colleges, tail) in zip(ranges, results):
+                pages_done += end - start
+                if progress:
+                    progress(pages_done)
                 
-                # Look for the next college line
-                if i + 1 < len(college_lines):
-                    end_line = college_lines[i + 1][0]
-                
-                # Extract the section for this college
-                college_section_lines = lines[start_line:end_line]
-                college_section = '\n'.join(college_section_lines)
-                
-                # Extract branches for this college
-                branches = self.extract_branches_for_college(college_section)
-                
-                colleges.append({
-                    'college_code': college_code,
-                    'college_name': college_name,
-                    'branches': branches,
-                    'total_branches': len(branches)
-                })
+                if pending:
+                    pending[-1] += head[0]
+                    pending.extend(head[1:])
+                else:
+                    pending = list(head)
                 
-                logger.info(f"Found college: {college_code} - {college_name} with {len(branches)} branches")
+                if tail is None:
+                    continue
                 
-            except Exception as e:
-                logger.error(f"Error parsing college {college_code} - {college_name}: {e}")
-                continue
+                # pending now ends right before this range's first closed college
+                yield from self.iter_colleges_from_lines(pending)
+                yield from colleges
+                pending = list(tail)
         
-        return colleges
+        yield from self.iter_colleges_from_lines(pending)
     
-    def extract_branches_for_college(self, college_section: str) -> List[Dict]:
-        """Extract branch information for a specific college."""
+    def extract_branches_for_college(self, college_section: str, start: int = 0, end: Optional[int] = None) -> List[Dict]:
+        """Extract branch information for a specific college.
+
+        Only college_section[start:end] is scanned, by offset: branch headers
+        are found in a single pass and each branch runs to the next header.
+        """
         branches = []
+        if end is None:
+            end = len(college_section)
         
-        # Find all branch codes and names in this college section
-        branch_matches = re.finditer(self.branch_pattern, college_section)
+        # Find all branch codes and names in this college section, once
+        branch_matches = list(self.branch_re.finditer(college_section, start, end))
         
-        for match in branch_matches:
+        for index, match in enumerate(branch_matches):
             try:
                 branch_code = match.group(1)
                 branch_name = match.group(2).strip()
                 
-                # Find the section for this branch (from this match to the next branch or end)
+                # The branch runs from this header to the next branch header or the section end
                 start_pos = match.end()
-                next_match = re.search(self.branch_pattern, college_section[start_pos:])
-                if next_match:
-                    end_pos = start_pos + next_match.start()
-                else:
-                    end_pos = len(college_section)
-                
-                branch_section = college_section[start_pos:end_pos]
+                end_pos = branch_matches[index + 1].start() if index + 1 < len(branch_matches) else end
                 
                 # Extract status
-                status_match = re.search(self.status_pattern, branch_section)
+                status_match = self.status_re.search(college_section, start_pos, end_pos)
                 status = status_match.group(1).strip() if status_match else "Unknown"
                 
                 # Extract cutoff data
-                cutoff_data = self.extract_cutoff_data(branch_section)
+                cutoff_data = self.extract_cutoff_data(college_section[start_pos:end_pos])
                 
                 branches.append({
                     'branch_code': branch_code,
@@ -172,7 +395,7 @@ class EnhancedCollegeParser:
             
             # Look for category patterns like GOPENS, GSCS, GNT3S, etc.
             # These are typically 4-6 character codes
-            potential_categories = re.findall(r'\b[A-Z]{4,6}\b', line)
+            potential_categories = self.category_header_re.findall(line)
             if len(potential_categories) >= 3:  # Need at least 3 categories to be valid
                 categories = potential_categories
                 categories_line_index = i
@@ -190,7 +413,7 @@ class EnhancedCollegeParser:
                 continue
             
             # Look for stage information (I, II, III, etc.)
-            stage_match = re.search(r'\b([IVX]+)(?:-Non\s+PWD)?\b', line)
+            stage_match = self.stage_row_re.search(line)
             if stage_match:
                 stage = stage_match.group(1)
                 logger.debug(f"Found stage: {stage} in line: {line[:100]}...")
@@ -210,17 +433,17 @@ class EnhancedCollegeParser:
                     logger.debug(f"  Line {j}: '{next_line[:50]}...'")
                     
                     # Stop if we hit another stage or section boundary
-                    if (re.search(r'\b([IVX]+)(?:-Non\s+PWD)?\b', next_line) and j > i) or \
+                    if (self.stage_row_re.search(next_line) and j > i) or \
                        'Status:' in next_line or \
-                       re.match(r'^\d{10}', next_line) or \
+                       self.branch_line_re.match(next_line) or \
                        'Stage' in next_line:
                         logger.debug(f"  Stopping at line {j} due to boundary")
                         break
                     
                     # Look for individual ranks (numbers) and percentages (numbers in parentheses)
                     # We'll collect them separately and then pair them up
-                    ranks = re.findall(r'\b(\d{4,6})\b', next_line)  # 4-6 digit numbers
-                    percentages = re.findall(r'\(([\d.]+)\)', next_line)  # Numbers in parentheses
+                    ranks = self.rank_re.findall(next_line)  # 4-6 digit numbers
+                    percentages = self.percentage_re.findall(next_line)  # Numbers in parentheses
                     
                     if ranks:
                         logger.debug(f"  Found ranks: {ranks}")
@@ -273,21 +496,43 @@ class EnhancedCollegeParser:
         logger.debug(f"Total cutoff entries extracted: {len(cutoff_data)}")
         return cutoff_data
     
-    def parse_pdf(self, pdf_path: str) -> Dict:
-        """Main method to parse PDF and extract all data."""
+    def parse_pdf(self, pdf_path: str, workers: int = 1, cache=None) -> Dict:
+        """Main method to parse PDF and extract all data.
+
+        workers > 1 splits the document into page ranges parsed in parallel
+        processes; the result is identical to the serial parse. cache controls
+        the parse-result cache (see _resolve_cache). The academic year and CAP
+        round printed in the header are included, so storing the result files
+        the cutoffs under their own round.
+        """
         try:
-            text = self.extract_text_from_pdf(pdf_path)
-            if not text:
-                return {"error": "Could not extract text from PDF", "parsing_success": False}
+            cache = self._resolve_cache(cache)
+            cache_key = cache.key_for(pdf_path, self.parser_version) if cache is not None else None
+            cached = cache.iter_colleges(cache_key) if cache is not None else None
             
-            logger.info("Extracted text from PDF successfully")
-            
-            # Extract all colleges
-            colleges = self.extract_colleges(text)
+            admission_round = None
+            if cached is not None:
+                colleges = list(cached)
+            elif workers and workers > 1:
+                colleges = list(self.iter_colleges_parallel(pdf_path, workers=workers))
+            else:
+                text = self.extract_text_from_pdf(pdf_path)
+                if not text:
+                    return {"error": "Could not extract text from PDF", "parsing_success": False}
+                
+                logger.info("Extracted text from PDF successfully")
+                
+                # Extract all colleges
+                colleges = self.extract_colleges(text)
+                admission_round = self.admission_round_from_text(text)
             
             if not colleges:
                 return {"error": "Could not extract any colleges from PDF", "parsing_success": False}
             
+            if cache is not None and cached is None:
+                for _ in cache.store_stream(cache_key, colleges):
+                    pass
+            
             logger.info(f"Found {len(colleges)} colleges in PDF")
             
             # Calculate total statistics
@@ -299,6 +544,8 @@ class EnhancedCollegeParser:
                 "total_colleges": len(colleges),
                 "total_branches": total_branches,
                 "total_cutoffs": total_cutoffs,
+                # Cached and parallel parses read the header from the first page
+                **(admission_round or self.read_admission_round(pdf_path)),
                 "parsing_success": True
             }
             
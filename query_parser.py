@@ -0,0 +1,180 @@
+"""
+Single-pass, table-driven parser for chat queries.
+
+QueryParser compiles INTENT_KEYWORDS, BRANCH_ALIASES and the category, CAP
+stage, rank and percentile patterns into one regular expression with a
+named group per table row, once. parse() walks the query with a single
+finditer and returns everything the chat handlers need together: intent,
+branch, category, CAP stage and round, rank, percentile and the search
+terms left once the intent words and values are removed. "stage N" is a
+stage within a CAP round; "round N" / "cap round N" is the CAP round itself,
+and a year ("2024", "A.Y. 2024-25") is the academic year the admission year
+starts in. Given a CollegeGazetteer it also resolves the college named in
+the query.
+
+Keywords match whole words only, so "vs" no longer fires inside other
+words and "in" is never cut out of "engineering".
+"""
+
+import re
+from typing import List, NamedTuple, Optional, Tuple
+
+# Intents in priority order: when a query has keywords for several, the first one listed wins
+INTENT_KEYWORDS: List[Tuple[str, List[str]]] = [
+    ('college_search', [r'find(?:ing)?', r'search(?:ing)?', r'which', r'what\s+colleges',
+                        r'colleges?\s+(?:in|near|around|offering)']),
+    ('cutoff_query', [r'cut[\s-]?offs?', r'ranks?', r'ranking', r'percentages?', r'admissions?',
+                      r'eligib(?:le|ility)']),
+    ('branch_query', [r'branch(?:es)?', r'courses?', r'streams?', r'departments?', r'speciali[sz]ations?']),
+    ('college_info', [r'info', r'information', r'details?', r'about']),
+    ('comparison_query', [r'compare', r'comparison', r'vs\.?', r'versus', r'difference'])
+]
+
+# Branch the query asks about -> the ways students write it, and acronyms that only
+# count in capitals ("IT", not "it"). The name is matched as a substring of the
+# database's branch names, so keep it to the common part.
+BRANCH_ALIASES: List[Tuple[str, List[str], List[str]]] = [
+    ('Computer Science', [r'computer\s+science', r'comp\s+sci'], ['CS', 'CSE']),
+    ('Computer Engineering', [r'computer\s+(?:engineering|engg)', r'comps?'], []),
+    ('Information Technology', [r'information\s+technology'], ['IT']),
+    ('Mechanical Engineering', [r'mechanical(?:\s+(?:engineering|engg))?', r'mech'], []),
+    ('Electrical Engineering', [r'electrical(?:\s+(?:engineering|engg))?'], []),
+    ('Electronics', [r'electronics', r'entc', r'extc'], ['EC', 'ECE']),
+    ('Civil Engineering', [r'civil(?:\s+(?:engineering|engg))?'], []),
+    ('Chemical Engineering', [r'chemical(?:\s+(?:engineering|engg))?'], []),
+    ('Biotechnology', [r'bio[\s-]?technology', r'biotech'], []),
+    ('Artificial Intelligence', [r'artificial\s+intelligence', r'ai\s*/\s*ml', r'ai\s*&\s*ds', r'aiml', r'aids'], []),
+    ('Data Science', [r'data\s+science'], [])
+]
+
+# Seat categories as printed in the CAP cutoff lists (GOPENS, LOBCS, TFWS, ...)
+CATEGORY_PATTERN = (r'(?:[gl]|defr?|pwdr?)(?:open[sho]?|(?:obc|sebc|sc|st|vj|nt[123abcd])[sho])'
+                    r'|tfws|ews|orphan')
+ROMAN_STAGES = ['I', 'II', 'III', 'IV', 'V', 'VI', 'VII', 'VIII', 'IX', 'X']
+STAGE_PATTERN = r'stage\s*(?:no\.?\s*)?(?P<stage_value>10|[1-9]|x|ix|iv|v?i{1,3})\b'
+ROUND_PATTERN = r'(?:cap\s+)?round\s*(?:no\.?\s*)?(?P<round_value>10|[1-9]|x|ix|iv|v?i{1,3})\b'
+RANK_PATTERN = (r'(?:rank(?:\s+(?:is|of|=|:))?\s*(?P<rank_after>\d[\d,]*)'
+                r'|(?P<rank_before>\d[\d,]*)\s*(?:st|nd|rd|th)?\s+rank)')
+# Only the first year counts: "2024-25" is academic year 2024
+YEAR_PATTERN = r'(?:a\.?\s*y\.?\s*)?(?P<year_value>20\d{2})(?:\s*-\s*(?:20)?\d{2})?'
+PERCENTILE_PATTERN = (r'(?:(?P<percentile_before>\d{1,3}(?:\.\d+)?)\s*(?:percentile|%ile|%)'
+                      r'|percentile(?:\s+(?:is|of|=|:))?\s*(?P<percentile_after>\d{1,3}(?:\.\d+)?))')
+
+# Words dropped from a college search besides the intent keywords
+SEARCH_STOP_WORDS = {
+    'find', 'search', 'which', 'what', 'colleges', 'college', 'in', 'near', 'around', 'for', 'me', 'the',
+    'a', 'an', 'are', 'is', 'there', 'all', 'list', 'show', 'give', 'good', 'best', 'top', 'offer', 'offers',
+    'offering', 'that', 'with', 'do', 'does', 'i', 'can', 'my'
+}
+
+_WORD_RE = re.compile(r'[\w/&]+')
+
+class ParsedQuery(NamedTuple):
+    """Everything QueryParser.parse() extracts from one query."""
+    intent: str
+    college: Optional[str] = None
+    college_code: Optional[str] = None
+    branch: Optional[str] = None
+    category: Optional[str] = None
+    stage: Optional[str] = None
+    rank: Optional[int] = None
+    percentile: Optional[float] = None
+    search_terms: str = ''
+    cap_round: Optional[int] = None
+    academic_year: Optional[int] = None
+
+class QueryParser:
+    """Precompiled multi-pattern query parser; thread-safe and reusable.
+
+    Patterns are written in lower case and run over the lower-cased query
+    without re.IGNORECASE, which keeps the one big alternation fast.
+    """
+
+    def __init__(self, intent_keywords=INTENT_KEYWORDS, branch_aliases=BRANCH_ALIASES):
+        self.intents = [intent for intent, _ in intent_keywords]
+        self.branches = [branch for branch, _, _ in branch_aliases]
+        self.cutoff_intent = self.intents.index('cutoff_query') if 'cutoff_query' in self.intents else len(self.intents)
+        alternatives = [
+            f'(?P<rank>{RANK_PATTERN})',
+            f'(?P<percentile>{PERCENTILE_PATTERN})',
+            f'(?P<stage>{STAGE_PATTERN})',
+            f'(?P<cap_round>{ROUND_PATTERN})',
+            f'(?P<academic_year>{YEAR_PATTERN})',
+            f'(?P<category>{CATEGORY_PATTERN})'
+        ]
+        # Branch names before intent words, so "data science" is not split up
+        for i, (_, patterns, acronyms) in enumerate(branch_aliases):
+            alternatives.append(f'(?P<branch{i}>{"|".join(patterns)})')
+            if acronyms:
+                alternatives.append(f'(?P<acronym{i}>{"|".join(acronym.lower() for acronym in acronyms)})')
+        alternatives += [f'(?P<intent{i}>{"|".join(patterns)})' for i, (_, patterns) in enumerate(intent_keywords)]
+        self.pattern = re.compile(r'(?<![\w/&])(?:' + '|'.join(alternatives) + r')(?![\w/&])')
+
+    def parse(self, text: str, gazetteer=None) -> ParsedQuery:
+        """Parse a query; the college is only looked up when a gazetteer is given."""
+        intent_rank = len(self.intents)
+        branch = category = stage = cap_round = academic_year = rank = percentile = None
+        kept = []
+        position = 0
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # A few characters change length when lower-cased; keep match offsets valid for text
+            lowered = ''.join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+        for match in self.pattern.finditer(lowered):
+            group = match.lastgroup
+            if group.startswith('branch'):
+                # Branch names stay in the search terms ("colleges offering civil")
+                branch = branch or self.branches[int(group[6:])]
+                continue
+            if group.startswith('acronym'):
+                if text[match.start():match.end()].isupper():
+                    branch = branch or self.branches[int(group[7:])]
+                continue
+
+            kept.append(lowered[position:match.start()])
+            position = match.end()
+            if group.startswith('intent'):
+                intent_rank = min(intent_rank, int(group[6:]))
+                continue
+            if group == 'academic_year':
+                # A year alone does not make it a cutoff question ("engineering in 2025")
+                academic_year = academic_year or int(match.group('year_value'))
+                continue
+
+            # A rank, percentile, category, stage or round makes it a cutoff question
+            intent_rank = min(intent_rank, self.cutoff_intent)
+            if group == 'rank':
+                rank = rank or int((match.group('rank_after') or match.group('rank_before')).replace(',', ''))
+            elif group == 'percentile':
+                value = float(match.group('percentile_before') or match.group('percentile_after'))
+                if percentile is None and value <= 100:
+                    percentile = value
+            elif group == 'category':
+                code = match.group(0).upper()
+                category = category or (code + 'S' if code.endswith('OPEN') else code)
+            elif group == 'stage':
+                stage = stage or self._stage(match.group('stage_value'))
+            elif group == 'cap_round':
+                cap_round = cap_round or ROMAN_STAGES.index(self._stage(match.group('round_value'))) + 1
+        kept.append(lowered[position:])
+
+        intent = self.intents[intent_rank] if intent_rank < len(self.intents) else 'general_query'
+        words = _WORD_RE.findall(' '.join(kept))
+        search_terms = ' '.join(word for word in words if word not in SEARCH_STOP_WORDS)
+
+        college = college_code = None
+        match = gazetteer.find(text) if gazetteer is not None else None
+        if match is not None:
+            college = match.college[1] if match.college else match.alias
+            college_code = match.college[0] if match.college else None
+
+        return ParsedQuery(intent, college, college_code, branch, category, stage, rank, percentile, search_terms,
+                           cap_round, academic_year)
+
+    @staticmethod
+    def _stage(value: str) -> str:
+        """CAP stages are stored as Roman numerals."""
+        if value.isdigit():
+            return ROMAN_STAGES[int(value) - 1]
+        return value.upper()
@@ -0,0 +1,99 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Union
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+def normalize_query(text: str) -> str:
+    """Normalize chat text for cache keys: case, whitespace and trailing punctuation.
+
+    Only differences the query pipeline ignores are folded together
+    (classification and extraction are case-insensitive, and search splits
+    on word characters), so equal keys always produce the same answer.
+    """
+    return _WHITESPACE_RE.sub(' ', text.casefold()).strip().rstrip('?!. ')
+
+class ResponseCache:
+    """Thread-safe LRU cache of chat responses with a per-entry TTL.
+
+    Keys should include the database generation so that answers computed
+    before an ingest are never served after it. max_bytes optionally bounds
+    the total size of the cached responses (UTF-8 for text, as stored for
+    bytes).
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 600.0,
+                 max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Union[str, bytes]]:
+        """Return the cached response, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key: Hashable, value: Union[str, bytes]):
+        """Cache a response, evicting least recently used entries past the limits."""
+        size = len(value) if isinstance(value, bytes) else len(value.encode('utf-8'))
+        if self.max_entries <= 0 or (self.max_bytes is not None and size > self.max_bytes):
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, size, value)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or (
+                    self.max_bytes is not None and self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: Hashable):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        """Drop every cached response."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict:
+        """Return hit/miss/eviction counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
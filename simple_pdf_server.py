@@ -7,11 +7,16 @@ This server provides the core PDF upload and parsing endpoints.
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import os
+import uuid
 import werkzeug
 from werkzeug.utils import secure_filename
 
 # Import our custom modules
-from pdf_parser import EnhancedCollegeParser
+from pdf_parser import EnhancedCollegeParser, clamp_workers
+from parse_cache import ParseCache
+from ingest_jobs import IngestJobQueue
+from http_cache import HTTPCache
+from college_api import MAX_BATCH_ITEMS, CollegeAPI
 from database import CollegeDatabase
 
 # Initialize Flask app
@@ -20,7 +25,19 @@ CORS(app)
 
 # Initialize database and parser
 db = CollegeDatabase()
-pdf_parser = EnhancedCollegeParser()
+pdf_parser = EnhancedCollegeParser(cache=ParseCache(
+    os.getenv('PARSE_CACHE_DIR', 'parse_cache'),
+    max_bytes=int(os.getenv('PARSE_CACHE_MAX_MB', '200')) * 1024 * 1024
+))
+ingest_jobs = IngestJobQueue(db, pdf_parser, workers=int(os.getenv('INGEST_JOB_WORKERS', '1')))
+
+# ETags and serialized (and gzip-compressed) bodies of the read endpoints, keyed on db.data_version
+http_cache = HTTPCache(
+    db,
+    max_entries=int(os.getenv('HTTP_CACHE_MAX_ENTRIES', '2048')),
+    ttl_seconds=float(os.getenv('HTTP_CACHE_TTL_SECONDS', '3600')),
+    max_bytes=int(os.getenv('HTTP_CACHE_MAX_MB', '64')) * 1024 * 1024 or None
+)
 
 # Configure upload settings
 UPLOAD_FOLDER = 'uploads'
@@ -32,11 +49,17 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 # Configure upload folder
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['PDF_PARSE_WORKERS'] = int(os.getenv('PDF_PARSE_WORKERS', '1'))  # >1 parses page ranges in parallel; caps ?workers=
 
 def allowed_file(filename):
     """Check if file extension is allowed."""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+@app.before_request
+def start_ingest_workers():
+    """Start the ingest workers, resuming unfinished jobs, on the first request."""
+    ingest_jobs.start()
+
 @app.route('/')
 def home():
     """Home endpoint with server information."""
@@ -44,15 +67,20 @@ def home():
         "message": "PDF Parser Server is running!",
         "endpoints": {
             "upload_pdf": "/upload-pdf (POST)",
+            "ingest_job": "/jobs/<id> (GET)",
             "get_colleges": "/colleges (GET)",
+            "match_names": "/colleges/match?name= (GET)",
             "get_college": "/college/<code> (GET)",
+            "branch_summary": "/college/<code>/summary (GET)",
+            "cutoff_history": "/college/<code>/history (GET)",
+            "batch": "/batch (POST)",
             "database_stats": "/database-stats (GET)"
         }
     })
 
 @app.route('/upload-pdf', methods=['POST'])
 def upload_pdf():
-    """Upload and parse PDF file."""
+    """Upload a PDF and queue it for background parsing and storage."""
     try:
         # Check if file is present in request
         if 'file' not in request.files:
@@ -68,83 +96,64 @@ def upload_pdf():
         if not allowed_file(file.filename):
             return jsonify({"error": "Only PDF files are allowed"}), 400
         
-        # Save file securely
+        # Save file securely, under a unique name so concurrent uploads don't collide
         filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"{uuid.uuid4().hex}_{filename}")
         file.save(filepath)
         
-        print(f"Processing PDF: {filename}")
-        
-        # Parse the PDF
-        parsed_data = pdf_parser.parse_pdf(filepath)
-        
-        if not parsed_data.get("parsing_success"):
-            # Clean up file if parsing failed
-            os.remove(filepath)
-            return jsonify({"error": "Failed to parse PDF", "details": parsed_data.get("error")}), 400
-        
-        print(f"PDF parsed successfully: {parsed_data.get('college_name')}")
-        
-        # Store data in database
-        storage_success = db.store_parsed_data(parsed_data)
-        
-        if not storage_success:
-            # Clean up file if storage failed
+        # Parse and store in the background; poll /jobs/<job_id> for progress
+        workers = clamp_workers(request.values.get('workers', app.config['PDF_PARSE_WORKERS'], type=int),
+                                app.config['PDF_PARSE_WORKERS'])
+        # Re-uploads of an identical PDF replay the cached parse; ?cache=false forces a fresh parse
+        use_cache = request.values.get('cache', 'true').lower() != 'false'
+        cache_hit = use_cache and pdf_parser.cache.contains(filepath, pdf_parser.parser_version)
+        # ?year=2025&round=1 override the academic year and CAP round printed in the PDF;
+        # ?diff=true writes only the rows that changed since that round was last uploaded
+        job_id = ingest_jobs.submit(filepath, filename, workers=workers, use_cache=use_cache,
+                                    academic_year=request.values.get('year', type=int),
+                                    cap_round=request.values.get('round', type=int),
+                                    diff=request.values.get('diff', 'false').lower() == 'true')
+        if not job_id:
             os.remove(filepath)
-            return jsonify({"error": "Failed to store data in database"}), 500
+            return jsonify({"error": "Failed to queue PDF for parsing"}), 500
         
-        # Clean up uploaded file
-        os.remove(filepath)
+        print(f"PDF queued for parsing: {filename} (job {job_id})")
         
         return jsonify({
-            "message": "PDF parsed and stored successfully",
-            "total_colleges": parsed_data.get("total_colleges"),
-            "total_branches": parsed_data.get("total_branches"),
-            "total_cutoffs": parsed_data.get("total_cutoffs"),
-            "colleges": parsed_data.get("colleges", [])
-        })
+            "message": "PDF queued for parsing",
+            "job_id": job_id,
+            "status_url": f"/jobs/{job_id}",
+            "parse_cache_hit": cache_hit
+        }), 202
         
     except Exception as e:
         print(f"Error in PDF upload: {e}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/colleges', methods=['GET'])
-def get_colleges():
-    """Get list of all colleges in database."""
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_ingest_job(job_id):
+    """Get progress of a background PDF ingestion job."""
     try:
-        query = request.args.get('search', '')
-        if query:
-            colleges = db.search_colleges(query)
-        else:
-            # Get all colleges (you might want to add pagination here)
-            colleges = db.search_colleges('')
-        
-        return jsonify({"colleges": colleges})
+        job = ingest_jobs.get(job_id)
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify(job)
         
     except Exception as e:
-        print(f"Error getting colleges: {e}")
+        print(f"Error getting ingest job: {e}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/college/<college_code>', methods=['GET'])
-def get_college_details(college_code):
-    """Get detailed information about a specific college."""
-    try:
-        college_data = db.get_college_data(college_code=college_code)
-        
-        if not college_data:
-            return jsonify({"error": "College not found"}), 404
-        
-        return jsonify(college_data)
-        
-    except Exception as e:
-        print(f"Error getting college details: {e}")
-        return jsonify({"error": str(e)}), 500
+# College lookups, listings and /batch (college_api.py)
+college_api = CollegeAPI(db, http_cache, max_batch_items=MAX_BATCH_ITEMS)
+app.register_blueprint(college_api.blueprint)
 
 @app.route('/database-stats', methods=['GET'])
 def get_database_stats():
     """Get database statistics."""
     try:
         stats = db.get_database_stats()
+        stats['parse_cache'] = pdf_parser.cache.get_stats()
+        stats['http_cache'] = http_cache.get_stats()
         return jsonify(stats)
         
     except Exception as e:
@@ -176,7 +185,10 @@ if __name__ == '__main__':
     print("   - GET  /              - Server information")
     print("   - POST /upload-pdf    - Upload and parse PDF")
     print("   - GET  /colleges      - List all colleges")
+    print("   - GET  /colleges/match - Typo-tolerant name matches")
     print("   - GET  /college/<id>  - Get college details")
+    print("   - GET  /college/<id>/summary - Closing ranks and counts per branch")
+    print("   - GET  /college/<id>/history - Cutoffs across years and CAP rounds")
     print("   - GET  /database-stats - Database statistics")
     print("   - GET  /health        - Health check")
     print()
@@ -1,5 +1,4 @@
 import React, { useState, useRef, useEffect } from "react";
-import axios from "axios";
 import { Send, Loader, RefreshCw, Download, Trash2, AlertCircle } from "lucide-react";
 
 const styles = `
@@ -66,6 +65,36 @@ const styles = `
 }
 `;
 
+const API_URL = "http://localhost:5002";
+
+// Parse a server-sent event stream, calling onEvent(eventName, data) per event
+const readEvents = async (body, onEvent) => {
+  const reader = body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = "message";
+      const dataLines = [];
+      for (const line of block.split("\n")) {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) dataLines.push(line.slice(5).trim());
+      }
+      if (event === "done") return;
+      if (dataLines.length) onEvent(event, JSON.parse(dataLines.join("\n")));
+    }
+  }
+};
+
 function Chatbot() {
   const [messages, setMessages] = useState([]);
   const [input, setInput] = useState("");
@@ -101,25 +130,44 @@ function Chatbot() {
     setIsLoading(true);
   
     try {
-      const response = await axios.post("http://localhost:5002/chat", 
-        { message: input },
-        {
-          headers: {
-            'Content-Type': 'application/json'
-          }
-        }
-      );
-      
+      // Server-sent events: the answer grows as tokens arrive
+      const response = await fetch(`${API_URL}/chat/stream`, {
+        method: "POST",
+        headers: {
+          'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ message: input })
+      });
+
+      if (!response.ok || !response.body) {
+        const data = await response.json().catch(() => ({}));
+        throw new Error(data.error || "Failed to connect to the server");
+      }
+
       const botMessage = { 
+        id: `bot-${Date.now()}`,
         sender: "bot", 
-        text: response.data.response,
+        text: "",
         timestamp: new Date().toISOString()
       };
-      
-      setMessages(prev => [...prev, botMessage]);
+
+      await readEvents(response.body, (event, data) => {
+        if (event === "error") {
+          throw new Error(data.error || "The answer was interrupted");
+        }
+        if (event !== "message") return;
+
+        const text = botMessage.text += data.token;
+        setIsLoading(false);
+        setMessages(prev => (
+          prev.some(msg => msg.id === botMessage.id)
+            ? prev.map(msg => (msg.id === botMessage.id ? { ...msg, text } : msg))
+            : [...prev, { ...botMessage, text }]
+        ));
+      });
     } catch (error) {
-      console.error("Full error details:", error.response || error.message);
-      setError(error.response?.data?.error || "Failed to connect to the server");
+      console.error("Full error details:", error.message);
+      setError(error.message || "Failed to connect to the server");
     } finally {
       setIsLoading(false);
       setInput("");
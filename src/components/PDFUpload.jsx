@@ -1,9 +1,14 @@
 import React, { useState } from 'react';
 import axios from 'axios';
 
+const API_URL = 'http://localhost:5002';
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
 const PDFUpload = () => {
   const [file, setFile] = useState(null);
   const [uploading, setUploading] = useState(false);
+  const [job, setJob] = useState(null);
   const [result, setResult] = useState(null);
   const [error, setError] = useState(null);
 
@@ -27,21 +32,36 @@ const PDFUpload = () => {
     setUploading(true);
     setError(null);
     setResult(null);
+    setJob(null);
 
     const formData = new FormData();
     formData.append('file', file);
 
     try {
-      const response = await axios.post('http://localhost:5002/upload-pdf', formData, {
+      const response = await axios.post(`${API_URL}/upload-pdf`, formData, {
         headers: {
           'Content-Type': 'multipart/form-data',
         },
       });
 
-      setResult(response.data);
       setFile(null);
       // Reset file input
       document.getElementById('pdf-file').value = '';
+
+      // The server parses in the background; poll the job until it finishes
+      let status = null;
+      do {
+        await sleep(1000);
+        const jobResponse = await axios.get(`${API_URL}${response.data.status_url}`);
+        status = jobResponse.data;
+        setJob(status);
+      } while (status.status === 'queued' || status.status === 'running');
+
+      if (status.status === 'completed') {
+        setResult(status.result);
+      } else {
+        setError(status.error || 'Parsing failed. Please try again.');
+      }
     } catch (err) {
       setError(err.response?.data?.error || 'Upload failed. Please try again.');
     } finally {
@@ -51,6 +71,7 @@ const PDFUpload = () => {
 
   const handleClear = () => {
     setFile(null);
+    setJob(null);
     setResult(null);
     setError(null);
     document.getElementById('pdf-file').value = '';
@@ -157,6 +178,27 @@ const PDFUpload = () => {
           </button>
         </div>
 
+        {/* Job Progress */}
+        {uploading && job && (
+          <div className="bg-indigo-50 border border-indigo-200 rounded-lg p-4">
+            <div className="flex justify-between text-sm text-indigo-800 mb-2">
+              <span>
+                {job.status === 'queued' ? 'Queued' : `Page ${job.pages_processed} of ${job.total_pages || '?'}`}
+              </span>
+              <span>
+                {job.colleges_stored} colleges stored
+                {job.eta_seconds != null && job.status === 'running' && ` · ~${Math.ceil(job.eta_seconds)}s left`}
+              </span>
+            </div>
+            <div className="w-full bg-indigo-100 rounded-full h-2">
+              <div
+                className="bg-indigo-600 h-2 rounded-full"
+                style={{ width: `${Math.round((job.progress || 0) * 100)}%` }}
+              />
+            </div>
+          </div>
+        )}
+
         {/* Results Display */}
         {result && (
           <div className="bg-green-50 border border-green-200 rounded-lg p-6">
@@ -169,16 +211,16 @@ const PDFUpload = () => {
             
             <div className="space-y-3">
               <div>
-                <span className="font-medium text-green-700">College:</span>
-                <span className="ml-2 text-green-800">{result.college_name}</span>
+                <span className="font-medium text-green-700">Total Colleges:</span>
+                <span className="ml-2 text-green-800">{result.parsed.colleges}</span>
               </div>
               <div>
-                <span className="font-medium text-green-700">College Code:</span>
-                <span className="ml-2 text-green-800">{result.college_code}</span>
+                <span className="font-medium text-green-700">Total Branches:</span>
+                <span className="ml-2 text-green-800">{result.parsed.branches}</span>
               </div>
               <div>
-                <span className="font-medium text-green-700">Total Branches:</span>
-                <span className="ml-2 text-green-800">{result.total_branches}</span>
+                <span className="font-medium text-green-700">Total Cutoffs:</span>
+                <span className="ml-2 text-green-800">{result.parsed.cutoffs}</span>
               </div>
             </div>
             
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Test script for cutoffs kept per academic year and CAP round: a new round is
+appended instead of overwriting, reads default to the latest round, older
+rounds and history stay queryable, and old databases are migrated.
+"""
+
+import copy
+import json
+import os
+import sqlite3
+import tempfile
+from database import LEGACY_ACADEMIC_YEAR, LEGACY_CAP_ROUND, CollegeDatabase
+from pdf_parser import EnhancedCollegeParser
+from test_database_queries import make_database
+from test_stream_parser import SAMPLE_TEXT
+
+class RoundPageParser(EnhancedCollegeParser):
+    """Parser that serves SAMPLE_TEXT under a CAP round header instead of reading a PDF."""
+
+    def __init__(self, header):
+        super().__init__()
+        self.header = header
+
+    def iter_page_texts(self, pdf_path, start_page=0, end_page=None):
+        yield self.header + SAMPLE_TEXT
+
+def next_round(parsed_data, academic_year, cap_round, rank_shift):
+    """The parsed document as if printed for another round, with every closing rank moved."""
+    shifted = copy.deepcopy(parsed_data)
+    shifted['academic_year'], shifted['cap_round'] = academic_year, cap_round
+    for college in shifted['colleges']:
+        for branch in college['branches']:
+            for cutoff in branch['cutoff_data']:
+                cutoff['rank'] += rank_shift
+    return shifted
+
+def test_new_round_is_appended():
+    """Ingesting another round keeps the earlier one; reads default to the newest."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = make_database(tmp_dir)
+        with open("full_pdf_parsed.json", "r", encoding="utf-8") as f:
+            parsed_data = json.load(f)
+        first = db.get_college_data(college_code="01002")
+        first_count = db.get_database_stats()['cutoff_records']
+
+        stats = db.bulk_store_parsed_data(next_round(parsed_data, 2025, 1, 100))
+        assert (stats['academic_year'], stats['cap_round']) == (2025, 1)
+        assert stats['cutoffs']['inserted'] == first_count
+        assert db.get_database_stats()['cutoff_records'] == 2 * first_count
+        assert [(r['academic_year'], r['cap_round']) for r in db.get_admission_rounds()] == \
+            [(LEGACY_ACADEMIC_YEAR, LEGACY_CAP_ROUND), (2025, 1)]
+
+        latest = db.get_college_data(college_code="01002")
+        assert latest['branches'][0]['cutoff_data'][0]['rank'] == first['branches'][0]['cutoff_data'][0]['rank'] + 100
+        assert db.get_college_data(college_code="01002", academic_year=LEGACY_ACADEMIC_YEAR) == first
+        # The snapshot holds only the newest round
+        snapshot = db.get_snapshot()
+        assert (snapshot.academic_year, snapshot.cap_round) == (2025, 1)
+        assert snapshot.get_stats()['cutoff_records'] == first_count
+
+        # Older rounds come from SQLite and match what the snapshot served before
+        sql_db = CollegeDatabase(db.db_path, use_snapshot=False)
+        assert sql_db.get_college_data(college_code="01002") == latest
+        assert sql_db.get_college_data(college_code="01002", academic_year=2024, cap_round=3) == first
+        old_eligible = db.find_eligible_branches("GOPENS", rank=15000, stage="I", academic_year=2024)
+        assert all(r['closing_rank'] >= 15000 for r in old_eligible)
+        assert old_eligible != db.find_eligible_branches("GOPENS", rank=15000, stage="I")
+        assert db.find_eligible_branches_batch([{'category': 'GOPENS', 'rank': 15000}], stage="I", limit=50,
+                                               academic_year=2024)[0] == old_eligible
+        assert db.get_college_data(college_code="01002", academic_year=2019)['branches'][0]['cutoff_data'] == []
+
+        # Re-ingesting the same round replaces it instead of appending
+        again = db.bulk_store_parsed_data(next_round(parsed_data, 2025, 1, 200))
+        assert again['cutoffs']['inserted'] == 0
+        assert db.get_database_stats()['cutoff_records'] == 2 * first_count
+        sql_db.close()
+        db.close()
+    print("✅ New CAP rounds are appended and reads default to the latest")
+
+def test_cutoff_history():
+    """A branch's closing ranks read oldest to newest across rounds."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = make_database(tmp_dir)
+        with open("full_pdf_parsed.json", "r", encoding="utf-8") as f:
+            parsed_data = json.load(f)
+        db.bulk_store_parsed_data(next_round(parsed_data, 2025, 1, 100))
+        db.bulk_store_parsed_data(next_round(parsed_data, 2025, 2, 250))
+
+        branch = db.get_college_data(college_code="01002")['branches'][0]
+        cutoff = branch['cutoff_data'][0]
+        history = db.get_cutoff_history("01002", branch_code=branch['branch_code'],
+                                        category=cutoff['category'].lower(), stage=cutoff['stage'])
+        assert [(h['academic_year'], h['cap_round']) for h in history] == [(2024, 3), (2025, 1), (2025, 2)]
+        assert [h['rank'] - history[0]['rank'] for h in history] == [0, 100, 250]
+        assert len(db.get_cutoff_history("01002")) == 3 * sum(
+            len(b['cutoff_data']) for b in db.get_college_data(college_code="01002")['branches'])
+        assert db.get_cutoff_history("99999") == []
+        # A year alone means its latest round
+        assert db.get_college_data(college_code="01002", academic_year=2025)['branches'][0]['cutoff_data'][0] == cutoff
+        db.close()
+    print("✅ Cutoff history spans every year and round")
+
+def test_parse_pdf_keeps_rounds_apart():
+    """Results of parse_pdf carry the header's round, so storing two rounds keeps both."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = CollegeDatabase(os.path.join(tmp_dir, "rounds.db"))
+        upload = os.path.join(tmp_dir, "cutoff.pdf")
+        with open(upload, 'wb') as f:
+            f.write(b"%PDF sample")
+
+        first = RoundPageParser("Cut Off List of CAP Round - I A.Y. 2025-26\n").parse_pdf(upload, cache=False)
+        second = RoundPageParser("Cut Off List of CAP Round - II A.Y. 2025-26\n").parse_pdf(upload, cache=False)
+        assert (first['academic_year'], first['cap_round']) == (2025, 1)
+        assert (second['academic_year'], second['cap_round']) == (2025, 2)
+        db.store_parsed_data(first)
+        db.store_parsed_data(second)
+
+        history = db.get_cutoff_history("01002", category="GOPENS", stage="I")
+        assert [(h['academic_year'], h['cap_round'], h['rank']) for h in history] == [(2025, 1, 33717), (2025, 2, 33717)]
+        assert [(r['academic_year'], r['cap_round']) for r in db.get_admission_rounds()] == [(2025, 1), (2025, 2)]
+        db.close()
+    print("✅ parse_pdf results are stored under the round in their header")
+
+def test_round_reads_use_partition_index():
+    """Reads of one round are range scans over that round only."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = make_database(tmp_dir)
+        with db.pool.connection() as conn:
+            plan = str(conn.execute('''
+                EXPLAIN QUERY PLAN SELECT branch_id FROM cutoff_data
+                WHERE academic_year = 2025 AND cap_round = 1 AND category = 'GOPENS' AND stage = 'I' AND rank >= 15000
+            ''').fetchall())
+            latest = str(conn.execute('''
+                EXPLAIN QUERY PLAN SELECT academic_year, cap_round FROM cutoff_data
+                ORDER BY academic_year DESC, cap_round DESC LIMIT 1
+            ''').fetchall())
+        assert "idx_cutoff_eligibility_rank (academic_year=? AND cap_round=? AND category=? AND stage=? AND rank>?)" in plan
+        # The newest round is the first entry of the partition key, not a table scan
+        assert "USING COVERING INDEX" in latest
+        db.close()
+    print("✅ Round reads use the partitioned indexes")
+
+def test_unpartitioned_database_is_migrated():
+    """A database from before rounds were tracked keeps its cutoffs as the legacy round."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "old.db")
+        conn = sqlite3.connect(path)
+        conn.executescript('''
+            CREATE TABLE colleges (id INTEGER PRIMARY KEY AUTOINCREMENT, college_code TEXT UNIQUE NOT NULL,
+                                   college_name TEXT NOT NULL, created_at TIMESTAMP, updated_at TIMESTAMP);
+            CREATE TABLE branches (id INTEGER PRIMARY KEY AUTOINCREMENT, college_id INTEGER NOT NULL,
+                                   branch_code TEXT NOT NULL, branch_name TEXT NOT NULL, status TEXT,
+                                   created_at TIMESTAMP, updated_at TIMESTAMP, UNIQUE(college_id, branch_code));
+            CREATE TABLE cutoff_data (id INTEGER PRIMARY KEY AUTOINCREMENT, branch_id INTEGER NOT NULL,
+                                      stage TEXT NOT NULL, category TEXT NOT NULL, rank INTEGER NOT NULL,
+                                      percentage REAL NOT NULL, created_at TIMESTAMP,
+                                      UNIQUE(branch_id, stage, category));
+            CREATE INDEX idx_cutoff_eligibility_rank ON cutoff_data(category, stage, rank, percentage, branch_id);
+            INSERT INTO colleges (college_code, college_name) VALUES ('01002', 'Government College of Engineering, Amravati');
+            INSERT INTO branches (college_id, branch_code, branch_name, status) VALUES (1, '0100219110', 'Civil Engineering', 'Government');
+            INSERT INTO cutoff_data (branch_id, stage, category, rank, percentage) VALUES (1, 'I', 'GOPENS', 33717, 88.6037289);
+        ''')
+        conn.close()
+
+        db = CollegeDatabase(path)
+        assert db.get_admission_rounds() == [
+            {'academic_year': LEGACY_ACADEMIC_YEAR, 'cap_round': LEGACY_CAP_ROUND, 'cutoff_records': 1}]
+        assert db.find_eligible_branches("GOPENS", rank=30000)[0]['closing_rank'] == 33717
+        # Unlabelled data still replaces the latest round, as before
+        db.insert_cutoff_data(1, 'I', 'GOPENS', 34000, 88.1)
+        assert db.get_cutoff_history("01002")[0]['rank'] == 34000
+        db.close()
+        # Opening it again does not migrate twice
+        db = CollegeDatabase(path)
+        assert db.get_database_stats()['cutoff_records'] == 1
+        db.close()
+    print("✅ Unpartitioned databases are migrated in place")
+
+def test_round_from_pdf_header():
+    """The academic year and CAP round are read from the cutoff list header."""
+    parser = EnhancedCollegeParser()
+    header = ("Cut Off List for Maharashtra & Minority Seats of CAP Round - III for the Admission to the First Year "
+              "... Admissions A .Y. 2024-25Government of Maharashtra")
+    assert parser.admission_round_from_text(header) == {'academic_year': 2024, 'cap_round': 3}
+    assert parser.admission_round_from_text("CAP Round 1 A.Y. 2025-2026") == {'academic_year': 2025, 'cap_round': 1}
+    assert parser.admission_round_from_text("no header here") == {'academic_year': None, 'cap_round': None}
+    if os.path.exists("cutoff.pdf"):
+        assert parser.read_admission_round("cutoff.pdf") == {'academic_year': 2024, 'cap_round': 3}
+    print("✅ Academic year and CAP round read from the PDF header")
+
+def ingest_three_rounds(db):
+    """Add 2025 rounds 1 and 2 to the 2024 round 3 loaded by make_database."""
+    with open("full_pdf_parsed.json", "r", encoding="utf-8") as f:
+        parsed_data = json.load(f)
+    db.bulk_store_parsed_data(next_round(parsed_data, 2025, 1, 100))
+    db.bulk_store_parsed_data(next_round(parsed_data, 2025, 2, 250))
+
+def test_chat_cutoffs_for_named_round():
+    """A chat asking for a round (or year) gets that round's cutoffs, and the reply names it."""
+    import EDI_project_enhanced as server
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        original_db = server.db
+        server.db = make_database(tmp_dir)
+        try:
+            ingest_three_rounds(server.db)
+
+            def first_rank(**admission_round):
+                college = server.db.get_college_data(college_code="16006", categories=["GOPENS"], **admission_round)
+                branch = next(b for b in college['branches'] if b['branch_name'] == 'Civil Engineering')
+                return f"Rank: {branch['cutoff_data'][0]['rank']:,}"
+
+            response = server.answer_from_database("GOPENS cutoff for COEP civil in round 2")
+            assert "**CAP Round:** 2 (A.Y. 2025-26)" in response
+            assert first_rank(cap_round=2) in response and first_rank(cap_round=1) not in response
+
+            response = server.answer_from_database("GOPENS cutoff for COEP civil in round 1")
+            assert "**CAP Round:** 1 (A.Y. 2025-26)" in response and first_rank(cap_round=1) in response
+
+            response = server.answer_from_database("GOPENS cutoff for COEP civil in A.Y. 2024-25")
+            assert "**CAP Round:** 3 (A.Y. 2024-25)" in response and first_rank(academic_year=2024) in response
+
+            # Without a round the reply still says which one it shows: the latest
+            assert "**CAP Round:** 2 (A.Y. 2025-26)" in server.answer_from_database("COEP cutoff")
+        finally:
+            server.db.close()
+            server.db = original_db
+    print("✅ Chat cutoffs follow the CAP round and year asked for")
+
+def test_chat_rank_finds_eligible_branches():
+    """A chat with a rank or percentile and a category lists the branches it gets into."""
+    import EDI_project_enhanced as server
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        original_db = server.db
+        server.db = make_database(tmp_dir)
+        try:
+            ingest_three_rounds(server.db)
+
+            response = server.answer_from_database("rank 12000 GOPENS, which branches can I get?")
+            eligible = server.db.find_eligible_branches("GOPENS", rank=12000, limit=10)
+            assert eligible and all(branch['closing_rank'] >= 12000 for branch in eligible)
+            assert "**CAP Round:** 2 (A.Y. 2025-26)" in response
+            for branch in eligible:
+                assert f"{branch['college_name']}** ({branch['college_code']})" in response
+                assert f"Closing Rank: {branch['closing_rank']:,}" in response
+
+            response = server.answer_from_database("92.5 percentile LOBCS cap round 1")
+            eligible = server.db.find_eligible_branches("LOBCS", percentile=92.5, limit=10, cap_round=1)
+            assert eligible and "**CAP Round:** 1 (A.Y. 2025-26)" in response
+            assert all(f"Closing Rank: {branch['closing_rank']:,}" in response for branch in eligible)
+
+            # Without a category there is nothing to look up yet
+            assert "mention your category" in server.answer_from_database("rank 12000, which branches?")
+        finally:
+            server.db.close()
+            server.db = original_db
+    print("✅ Chat ranks and percentiles answered from eligible branches")
+
+if __name__ == "__main__":
+    print("🚀 Starting admission round tests...\n")
+    test_new_round_is_appended()
+    test_cutoff_history()
+    test_parse_pdf_keeps_rounds_apart()
+    test_round_reads_use_partition_index()
+    test_unpartitioned_database_is_migrated()
+    test_round_from_pdf_header()
+    test_chat_cutoffs_for_named_round()
+    test_chat_rank_finds_eligible_branches()
+    print("\n🎉 All admission round tests completed!")
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test script for the ASGI chat server (EDI_project_async.py): concurrent
+chats against the stub Ollama server, database answers identical to the
+Flask server, streaming, and the Flask endpoints mounted alongside.
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import httpx
+
+import EDI_project_async as async_server
+from llm_gateway import CohereProvider, OllamaProvider
+from llm_stub_server import StubOllamaServer
+
+class FakeAsyncCohereClient:
+    """Stands in for cohere.AsyncClient."""
+
+    def __init__(self, text):
+        self.text = text
+        self.calls = 0
+
+    async def chat(self, model, message, max_tokens, temperature, request_options=None):
+        self.calls += 1
+        return SimpleNamespace(text=self.text)
+
+@asynccontextmanager
+async def open_client(providers):
+    """An HTTP client wired to the ASGI app, with the gateway using the given providers."""
+    async_server.async_llm_gateway.providers = providers
+    async_server.response_cache.clear()
+    transport = httpx.ASGITransport(app=async_server.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            yield client
+    finally:
+        for provider in providers:
+            if isinstance(provider, OllamaProvider):
+                await provider.aclose()
+
+def test_concurrent_chats():
+    """Hundreds of chats waiting on a slow model are served together, not one by one."""
+    async def run():
+        with StubOllamaServer(response_text="Practice previous papers.", delay=0.5) as stub:
+            async with open_client([OllamaProvider(stub.url)]) as client:
+                start = time.perf_counter()
+                responses = await asyncio.gather(*[
+                    client.post('/chat', json={"message": f"how should I prepare, plan {i}"}) for i in range(300)
+                ])
+                return time.perf_counter() - start, responses
+
+    elapsed, responses = asyncio.run(run())
+    assert all(r.status_code == 200 for r in responses)
+    assert all(r.json()['response'] == "Practice previous papers." for r in responses)
+    # One after another this would take 150 seconds
+    assert elapsed < 15
+    print(f"✅ 300 concurrent chats against a 0.5s model answered in {elapsed:.2f}s")
+
+def test_database_answers_match_flask():
+    """Database-backed intents give the Flask server's answers, without any LLM call."""
+    queries = ["What is the cutoff for COEP Computer Science?", "Find colleges in Pune", "Tell me about PICT",
+               "GOPENS cutoff for COEP civil in round 1", "rank 12000 GOPENS, which branches?"]
+
+    async def run():
+        async with open_client([]) as client:
+            return [await client.post('/chat', json={"message": query}) for query in queries]
+
+    responses = asyncio.run(run())
+    for query, response in zip(queries, responses):
+        assert response.json()['response'] == async_server.flask_server.answer_from_database(query)
+    print("✅ Database answers match the Flask server")
+
+def test_parsing_runs_off_the_event_loop():
+    """Parsing and language detection, which may rebuild the gazetteer, run on the DB threads."""
+    threads = []
+    parse_user_query, detect_language = async_server.parse_user_query, async_server.detect_language
+
+    def recording(func):
+        def wrapper(*args):
+            threads.append(threading.current_thread().name)
+            return func(*args)
+        return wrapper
+
+    async_server.parse_user_query = recording(parse_user_query)
+    async_server.detect_language = recording(detect_language)
+    try:
+        response = asyncio.run(async_server.answer_from_database_async("Tell me about PICT"))
+    finally:
+        async_server.parse_user_query, async_server.detect_language = parse_user_query, detect_language
+    assert response == async_server.flask_server.answer_from_database("Tell me about PICT")
+    assert len(threads) == 2 and all(name.startswith('db') for name in threads), threads
+    print("✅ Query parsing runs on the database thread pool")
+
+def test_llm_college_extraction():
+    """An unknown college name is extracted through the async Cohere client."""
+    cohere = FakeAsyncCohereClient("COEP")
+
+    async def run():
+        async with open_client([CohereProvider(cohere)]) as client:
+            return await client.post('/chat', json={"message": "cutoff for the engineering college at Shivajinagar"})
+
+    response = asyncio.run(run())
+    assert cohere.calls == 1
+    assert "COEP" in response.json()['response']
+    print("✅ College name extracted through the async Cohere client")
+
+def test_streaming_and_mounted_endpoints():
+    """/chat/stream relays tokens; the Flask endpoints are served on the same app."""
+    async def run():
+        with StubOllamaServer(response_text="Start with NCERT books.") as stub:
+            async with open_client([OllamaProvider(stub.url)]) as client:
+                stream = await client.post('/chat/stream', json={"message": "how to study physics"})
+                colleges = await client.get('/colleges', params={"search": "COEP", "limit": 1})
+                stats = await client.get('/database-stats')
+                missing = [await client.post(path, json=body) for path in ('/chat', '/chat/stream')
+                           for body in ({}, [1], "hi", 5)]
+                return stream, colleges, stats, missing
+
+    stream, colleges, stats, missing = asyncio.run(run())
+    assert stream.headers['content-type'].startswith('text/event-stream')
+    assert stream.text.split('\n\n')[:-1] == [
+        'data: {"token": "Start "}', 'data: {"token": "with "}', 'data: {"token": "NCERT "}',
+        'data: {"token": "books."}', 'event: done\ndata: {}'
+    ]
+    assert colleges.status_code == 200 and len(colleges.json()['colleges']) == 1
+    assert stats.json()['llm']['providers']['ollama']['calls'] == 1
+    assert set(stats.json()) >= {'parse_cache', 'http_cache', 'response_cache', 'llm'}
+    # Bodies that are not a JSON object get the same 400 as Flask's /chat
+    assert [response.status_code for response in missing] == [400] * 8
+    print("✅ Streaming and mounted Flask endpoints work")
+
+if __name__ == "__main__":
+    print("🚀 Starting async server tests...\n")
+    test_concurrent_chats()
+    test_database_answers_match_flask()
+    test_parsing_runs_off_the_event_loop()
+    test_llm_college_extraction()
+    test_streaming_and_mounted_endpoints()
+    print("\n🎉 All async server tests completed!")
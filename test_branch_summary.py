@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-branch cutoff summaries: they agree with the raw
+cutoffs, are refreshed by every kind of ingest, and are read one indexed
+row per branch by the chat answers and college listings.
+"""
+
+import copy
+import json
+import os
+import tempfile
+import time
+from database import CollegeDatabase
+from test_database_queries import make_database
+
+def summarize(branch):
+    """The summary of a branch, aggregated from its raw cutoffs."""
+    cutoffs = branch['cutoff_data']
+    closing_ranks = {}
+    for cutoff in cutoffs:
+        closing_ranks[cutoff['category']] = max(closing_ranks.get(cutoff['category'], 0), cutoff['rank'])
+    return {
+        'branch_code': branch['branch_code'],
+        'branch_name': branch['branch_name'],
+        'status': branch['status'],
+        'cutoff_count': len(cutoffs),
+        'stage_count': len({cutoff['stage'] for cutoff in cutoffs}),
+        'best_percentage': max((cutoff['percentage'] for cutoff in cutoffs), default=None),
+        'worst_percentage': min((cutoff['percentage'] for cutoff in cutoffs), default=None),
+        'closing_ranks': closing_ranks
+    }
+
+def assert_summaries_match(db, **admission_round):
+    codes = [c['college_code'] for c in db.search_colleges("")]
+    summaries = db.get_branch_summaries(codes, **admission_round)
+    for code, college in db.get_colleges_data(codes, **admission_round).items():
+        assert summaries[code]['branches'] == [summarize(branch) for branch in college['branches']], code
+    return summaries
+
+def test_summaries_match_raw_cutoffs():
+    """Closing ranks, percentage range and counts equal the aggregates of the raw rows."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = make_database(tmp_dir)
+        summaries = assert_summaries_match(db)
+        branch = summaries['01002']['branches'][0]
+        # Categories keep the order they were printed in
+        assert list(branch['closing_ranks'])[:2] == ['GOPENS', 'GSCS']
+        assert (summaries['01002']['academic_year'], summaries['01002']['cap_round']) == (2024, 3)
+        assert db.get_branch_summaries(['99999']) == {'99999': None}
+
+        # The count-only projection reads the same counts
+        sql_db = CollegeDatabase(db.db_path, use_snapshot=False)
+        counts = sql_db.get_college_data(college_code="01002", include_cutoffs=False)
+        assert [b['cutoff_count'] for b in counts['branches']] == [b['cutoff_count'] for b in summaries['01002']['branches']]
+
+        with db.pool.connection() as conn:
+            plan = str(conn.execute('''
+                EXPLAIN QUERY PLAN SELECT cutoff_count FROM branch_cutoff_summary
+                WHERE academic_year = 2024 AND cap_round = 3 AND branch_id = 1
+            ''').fetchall())
+        assert "USING INDEX sqlite_autoindex_branch_cutoff_summary_1" in plan
+
+        codes = [c['college_code'] for c in db.search_colleges("")]
+        start_time = time.perf_counter()
+        sql_db.get_branch_summaries(codes)
+        elapsed = time.perf_counter() - start_time
+        sql_db.close()
+        db.close()
+    print("✅ Branch summaries match the raw cutoffs")
+    print(f"⏱️  Summaries of all {len(codes)} colleges: {elapsed * 1000:.1f} ms")
+
+def test_summaries_follow_ingests():
+    """Bulk, diff and single-row writes refresh only the summaries they touch."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = make_database(tmp_dir)
+        with open("full_pdf_parsed.json", "r", encoding="utf-8") as f:
+            parsed_data = json.load(f)
+
+        next_round = copy.deepcopy(parsed_data)
+        next_round['academic_year'], next_round['cap_round'] = 2025, 1
+        for college in next_round['colleges']:
+            for branch in college['branches']:
+                for cutoff in branch['cutoff_data']:
+                    cutoff['rank'] += 100
+        db.bulk_store_parsed_data(next_round)
+        assert_summaries_match(db)
+        assert_summaries_match(db, academic_year=2024, cap_round=3)
+
+        # A diff ingest drops a category and moves a rank
+        branch = next(b for b in next_round['colleges'][0]['branches'] if len(b['cutoff_data']) > 1)
+        dropped = branch['cutoff_data'].pop()
+        branch['cutoff_data'][0]['rank'] += 5000
+        db.diff_store_parsed_data(next_round)
+        summary = next(b for b in db.get_branch_summaries([next_round['colleges'][0]['college_code']])[
+            next_round['colleges'][0]['college_code']]['branches'] if b['branch_code'] == branch['branch_code'])
+        assert summary['cutoff_count'] == len(branch['cutoff_data'])
+        assert summary['closing_ranks'][branch['cutoff_data'][0]['category']] >= branch['cutoff_data'][0]['rank']
+        if all(c['category'] != dropped['category'] for c in branch['cutoff_data']):
+            assert dropped['category'] not in summary['closing_ranks']
+        assert_summaries_match(db)
+
+        # A single cutoff insert updates its branch's row
+        with db.pool.connection() as conn:
+            branch_id = conn.execute('SELECT id FROM branches WHERE branch_code = ?',
+                                     (summary['branch_code'],)).fetchone()[0]
+        db.insert_cutoff_data(branch_id, 'IX', 'TFWS', 1, 99.9)
+        assert_summaries_match(db)
+        db.close()
+    print("✅ Summaries are refreshed by bulk, diff and single-row ingests")
+
+def test_summaries_built_for_existing_database():
+    """A database without summaries gets them on open."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = make_database(tmp_dir)
+        expected = assert_summaries_match(db)
+        with db.pool.connection() as conn:
+            conn.execute('DELETE FROM branch_cutoff_summary')
+        db.close()
+
+        db = CollegeDatabase(os.path.join(tmp_dir, "queries.db"))
+        assert assert_summaries_match(db) == expected
+        db.close()
+    print("✅ Missing summaries are rebuilt when the database is opened")
+
+def test_listings_and_chat_use_summaries():
+    """/colleges?summary=true, /college/<code>/summary and the chat answers read the summaries."""
+    import EDI_project_enhanced as server
+    client = server.app.test_client()
+    colleges = client.get('/colleges?limit=3&summary=true').get_json()['colleges']
+    summaries = server.db.get_branch_summaries([c['college_code'] for c in colleges])
+    for college in colleges:
+        branches = summaries[college['college_code']]['branches']
+        assert college['branch_count'] == len(branches)
+        assert college['cutoff_count'] == sum(b['cutoff_count'] for b in branches)
+    assert 'branch_count' not in client.get('/colleges?limit=3').get_json()['colleges'][0]
+
+    summary = client.get('/college/01002/summary').get_json()
+    assert summary == server.db.get_branch_summaries(['01002'])['01002']
+    assert client.get('/college/99999/summary').status_code == 404
+
+    answer = server.process_cutoff_query("cutoff for Government College of Engineering, Amravati",
+                                         college_name="Government College of Engineering, Amravati")
+    first_branch = summary['branches'][0]
+    assert "**Closing Ranks:**" in answer
+    assert f"• GOPENS: {first_branch['closing_ranks']['GOPENS']:,}" in answer
+    # Filtered questions still list the matching raw cutoffs
+    filtered = server.process_cutoff_query("GOPENS cutoff", college_name="Government College of Engineering, Amravati",
+                                           category="GOPENS", stage="I")
+    assert "**Cutoff Information:**" in filtered
+    info = server.process_college_info_query("about", college_name="Government College of Engineering, Amravati")
+    assert f"{first_branch['cutoff_count']} entries across {first_branch['stage_count']} stage(s)" in info
+    print("✅ Listings and chat answers are served from the summaries")
+
+if __name__ == "__main__":
+    print("🚀 Starting branch summary tests...\n")
+    test_summaries_match_raw_cutoffs()
+    test_summaries_follow_ingests()
+    test_summaries_built_for_existing_database()
+    test_listings_and_chat_use_summaries()
+    print("\n🎉 All branch summary tests completed!")
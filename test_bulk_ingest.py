@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test script for the single-transaction bulk ingest path in CollegeDatabase.
+Compares it against the row-by-row store and times a full reload.
+"""
+
+import json
+import os
+import tempfile
+import time
+from database import CollegeDatabase
+
+def load_parsed_sample(limit=None):
+    """Load the parsed full PDF output, optionally limited to the first colleges."""
+    with open("full_pdf_parsed.json", "r", encoding="utf-8") as f:
+        parsed_data = json.load(f)
+    if limit:
+        parsed_data = dict(parsed_data, colleges=parsed_data["colleges"][:limit])
+    return parsed_data
+
+def dump_database(db):
+    """Return every college as a nested dict, keyed by college code."""
+    codes = [college['college_code'] for college in db.search_colleges('')]
+    return {code: db.get_college_data(college_code=code) for code in codes}
+
+def test_bulk_matches_row_by_row():
+    """Bulk ingest must produce exactly the same rows as the legacy path."""
+    parsed_data = load_parsed_sample(limit=40)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        legacy_db = CollegeDatabase(os.path.join(tmp_dir, "legacy.db"))
+        bulk_db = CollegeDatabase(os.path.join(tmp_dir, "bulk.db"))
+
+        assert legacy_db.store_parsed_data(parsed_data, bulk=False)
+        stats = bulk_db.bulk_store_parsed_data(parsed_data)
+
+        assert stats['success']
+        assert legacy_db.get_database_stats() == bulk_db.get_database_stats()
+        assert dump_database(legacy_db) == dump_database(bulk_db)
+        print(f"✅ Bulk ingest matches row-by-row ingest: {stats}")
+
+def test_bulk_reports_inserted_updated_skipped():
+    """A reload reports updates instead of inserts, and bad rows are skipped."""
+    parsed_data = load_parsed_sample(limit=40)
+    unique_codes = {college["college_code"] for college in parsed_data["colleges"]}
+    parsed_data["colleges"].append({"college_code": "", "college_name": "Missing code", "branches": []})
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = CollegeDatabase(os.path.join(tmp_dir, "bulk.db"))
+
+        first = db.bulk_store_parsed_data(parsed_data)
+        # The PDF repeats a college header on every page it spans
+        assert first['colleges']['inserted'] == len(unique_codes)
+        assert first['colleges']['updated'] == 40 - len(unique_codes)
+        assert first['colleges']['skipped'] == 1
+
+        second = db.bulk_store_parsed_data(parsed_data)
+        assert second['colleges']['inserted'] == 0
+        assert second['colleges']['updated'] == 40
+        assert second['cutoffs']['inserted'] == 0
+        assert db.get_database_stats()['colleges'] == len(unique_codes)
+        print(f"✅ Reload reported as updates: {second}")
+
+def test_bulk_full_reload_speed():
+    """Reload the full parsed PDF in one transaction."""
+    parsed_data = load_parsed_sample()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = CollegeDatabase(os.path.join(tmp_dir, "bulk.db"))
+
+        start_time = time.time()
+        stats = db.bulk_store_parsed_data(parsed_data)
+        elapsed = time.time() - start_time
+
+        assert stats['success']
+        unique_codes = {college["college_code"] for college in parsed_data["colleges"]}
+        assert stats['colleges']['inserted'] == len(unique_codes)
+        print(f"⏱️  Full bulk load: {elapsed:.2f} seconds ({stats})")
+
+def test_stream_store_matches_bulk():
+    """Storing colleges from an iterator in batches equals a one-shot bulk load."""
+    parsed_data = load_parsed_sample()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bulk_db = CollegeDatabase(os.path.join(tmp_dir, "bulk.db"))
+        stream_db = CollegeDatabase(os.path.join(tmp_dir, "stream.db"))
+
+        bulk_stats = bulk_db.bulk_store_parsed_data(parsed_data)
+        stream_stats = stream_db.store_college_stream(iter(parsed_data["colleges"]), batch_size=7)
+
+        assert stream_stats['success']
+        assert stream_stats['parsed']['colleges'] == parsed_data['total_colleges']
+        assert stream_stats['parsed']['cutoffs'] == parsed_data['total_cutoffs']
+        for table in ('colleges', 'branches', 'cutoffs'):
+            assert stream_stats[table] == bulk_stats[table]
+        assert dump_database(bulk_db) == dump_database(stream_db)
+        print(f"✅ Streamed ingest matches bulk ingest: {stream_stats}")
+
+if __name__ == "__main__":
+    print("🚀 Starting bulk ingest tests...\n")
+    test_bulk_matches_row_by_row()
+    test_bulk_reports_inserted_updated_skipped()
+    test_bulk_full_reload_speed()
+    test_stream_store_matches_bulk()
+    print("\n🎉 All bulk ingest tests completed!")
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared college endpoints (college_api.py): every Flask
+server registers the same views, and /batch answers colleges, searches and,
+on the chat servers, messages.
+"""
+
+import EDI_project
+import EDI_project_enhanced
+import simple_pdf_server
+
+SHARED_RULES = {'/colleges', '/colleges/match', '/college/<college_code>', '/college/<college_code>/summary',
+                '/college/<college_code>/history', '/batch'}
+
+def rules(app):
+    """URL rule -> view function of an app."""
+    return {rule.rule: app.view_functions[rule.endpoint] for rule in app.url_map.iter_rules()}
+
+def test_servers_share_the_views():
+    """The three servers serve the shared rules from their CollegeAPI blueprint."""
+    for server in (EDI_project, EDI_project_enhanced, simple_pdf_server):
+        views = rules(server.app)
+        assert SHARED_RULES <= set(views), server.__name__
+        for rule in SHARED_RULES:
+            # Cached views are HTTPCache wrappers around the bound method
+            view = getattr(views[rule], '__wrapped__', views[rule])
+            assert view.__self__ is server.college_api, (server.__name__, rule)
+        assert server.college_api.db is server.db
+    print("✅ Every server registers the shared college views")
+
+def test_batch_with_and_without_chat():
+    """/batch lines results up with inputs; messages only on the chat servers."""
+    body = {"colleges": ["01002", "99999", None], "searches": ["pune", {"limit": 2}], "messages": ["hello"],
+            "cutoffs": False}
+    for server in (EDI_project_enhanced, simple_pdf_server):
+        result = server.app.test_client().post('/batch', json=body).get_json()
+        assert [c.get('error') for c in result['colleges']] == [None, "College not found", "Invalid college code"]
+        assert result['colleges'][0]['college']['college_code'] == "01002"
+        assert result['searches'][0]['colleges'] and result['searches'][1]['error']
+        assert ('messages' in result) == (server is EDI_project_enhanced)
+
+    client = simple_pdf_server.app.test_client()
+    too_many = {"colleges": ["01002"] * (simple_pdf_server.college_api.max_batch_items + 1)}
+    assert client.post('/batch', json=too_many).status_code == 400
+    assert client.post('/batch', json={"colleges": "01002"}).status_code == 400
+    print("✅ /batch answers colleges, searches and chat messages")
+
+if __name__ == "__main__":
+    print("🚀 Starting college API tests...\n")
+    test_servers_share_the_views()
+    test_batch_with_and_without_chat()
+    print("\n🎉 All college API tests completed!")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script for the local college-name gazetteer: every official name, code
+and common alias resolves to the right college without an LLM, the index
+is rebuilt after ingest, and lookups take microseconds.
+"""
+
+import os
+import tempfile
+import time
+from college_gazetteer import CollegeGazetteer
+from database import CollegeDatabase
+from test_database_queries import make_database
+
+def test_official_names_and_codes():
+    """Each college is found by its full name or code inside a chat question."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = make_database(tmp_dir)
+        gazetteer = db.get_college_gazetteer()
+        assert gazetteer.generation == db.generation
+
+        for college_code, college_name in gazetteer.colleges:
+            match = gazetteer.find(f"What is the cutoff for {college_name}?")
+            assert match.college == (college_code, college_name), (college_name, match)
+            assert gazetteer.find(f"Tell me about {college_code}").college[0] == college_code
+            assert gazetteer.lookup(college_name) == ((college_code, college_name),)
+        print(f"✅ All {len(gazetteer.colleges)} official names and codes resolve: {gazetteer.get_stats()}")
+        db.close()
+
+def test_aliases():
+    """Acronyms and common short names resolve; shared ones and plain questions do not pick a college."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = make_database(tmp_dir)
+        gazetteer = db.get_college_gazetteer()
+
+        expected = {
+            "What is the cutoff for COEP Computer Science?": '16006',
+            "Tell me about PICT": '06271',
+            "VJTI IT cutoff": '03012',
+            "SPIT branches": '03215',
+            "DJ Sanghvi cutoff": '03199',
+            "walchand college cutoff": '06007',
+            "Thadomal Shahani details": '03182',
+            "Government College of Engineering Amravati cutoff": '01002'
+        }
+        for query, college_code in expected.items():
+            assert gazetteer.find(query).college[0] == college_code, query
+
+        shared = gazetteer.find("government college of engineering cutoff")
+        assert shared.college is None and len(shared.colleges) > 1
+        assert shared.alias == "government college of engineering"
+
+        for query in ["Find colleges in Pune", "what is the cutoff for computer engineering",
+                      "how to prepare for mht cet", "information technology branch details",
+                      "cutoff for the engineering college at Shivajinagar"]:
+            assert gazetteer.find(query) is None, query
+        print("✅ Acronyms and aliases resolve to the right college")
+        db.close()
+
+def test_gazetteer_rebuilt_after_ingest():
+    """A college added by an ingest is matched straight away."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = CollegeDatabase(os.path.join(tmp_dir, "gazetteer.db"))
+        before = db.get_college_gazetteer()
+        assert before.find("Gazetteer Test Institute of Robotics cutoff") is None
+
+        db.store_college_stream(iter([{
+            'college_code': '99001',
+            'college_name': 'Gazetteer Test Institute of Robotics, Nashik',
+            'branches': []
+        }]))
+
+        after = db.get_college_gazetteer()
+        assert after is not before and after.generation == db.generation
+        assert after.find("Gazetteer Test Institute of Robotics cutoff").college[0] == '99001'
+        assert after.find("GTIR cutoff").college[0] == '99001'
+        print("✅ Gazetteer rebuilt after ingest")
+        db.close()
+
+def test_match_speed():
+    """Matching a question takes microseconds, not an LLM round-trip."""
+    gazetteer = CollegeGazetteer([
+        ('06271', 'Pune Institute of Computer Technology'),
+        ('16006', 'COEP Technological University'),
+        ('03012', 'Veermata Jijabai Technological Institute(VJTI), Matunga, Mumbai')
+    ] + [(f'9{i:04d}', f'College Number {i} of Engineering, Town {i}') for i in range(2000)])
+    queries = ["What is the cutoff for PICT computer engineering in round 2?",
+               "Tell me about college number 1234 of engineering",
+               "How should I prepare for the exam?"]
+
+    start_time = time.perf_counter()
+    for _ in range(1000):
+        for query in queries:
+            gazetteer.find(query)
+    per_query = (time.perf_counter() - start_time) / (1000 * len(queries))
+    assert gazetteer.find(queries[0]).college[0] == '06271'
+    assert gazetteer.find(queries[1]).college[0] == '91234'
+    assert per_query < 0.001
+    print(f"⏱️  Gazetteer match: {per_query * 1e6:.1f} µs per query over {len(gazetteer.colleges)} colleges")
+
+if __name__ == "__main__":
+    print("🚀 Starting college gazetteer tests...\n")
+    test_official_names_and_codes()
+    test_aliases()
+    test_gazetteer_rebuilt_after_ingest()
+    test_match_speed()
+    print("\n🎉 All college gazetteer tests completed!")
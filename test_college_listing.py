@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test script for the paged /colleges listing: keyset cursors walk every
+college exactly once in each sort order, fields can be picked, and the
+ETag answers 304 until the data changes.
+"""
+
+import json
+import tempfile
+import time
+from database import MAX_PAGE_SIZE, CollegeDatabase
+from test_database_queries import make_database
+
+def walk(db, sort, limit, fields=None):
+    """Every page of a listing, following next_cursor to the end."""
+    pages = [db.list_colleges(limit=limit, sort=sort, fields=fields)]
+    while pages[-1]['next_cursor']:
+        pages.append(db.list_colleges(limit=limit, cursor=pages[-1]['next_cursor'], sort=sort, fields=fields))
+    return pages
+
+def test_cursor_walks_every_college_once():
+    """Pages follow each sort order with no college missed or repeated."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = make_database(tmp_dir)
+        with db.pool.connection() as conn:
+            stored = [tuple(row) for row in conn.execute('SELECT college_code, college_name FROM colleges')]
+
+        for sort, key, reverse in (('college_code', lambda c: c[0], False), ('-college_code', lambda c: c[0], True),
+                                   ('college_name', lambda c: (c[1], c[0]), False),
+                                   ('-college_name', lambda c: (c[1], c[0]), True)):
+            pages = walk(db, sort, limit=40)
+            listed = [(c['college_code'], c['college_name']) for page in pages for c in page['colleges']]
+            assert listed == sorted(stored, key=key, reverse=reverse), sort
+            assert [len(page['colleges']) for page in pages[:-1]] == [40] * (len(pages) - 1)
+            assert pages[-1]['next_cursor'] is None
+
+        # A page that ends exactly at the last college has no next cursor
+        assert walk(db, 'college_code', limit=len(stored))[0]['next_cursor'] is None
+        assert len(db.list_colleges(limit=10 ** 6)['colleges']) == min(MAX_PAGE_SIZE, len(stored))
+        db.close()
+    print(f"✅ Cursors walk all {len(stored)} colleges once in every sort order")
+
+def test_seeks_use_indexes():
+    """A deep page costs the same as the first one."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = make_database(tmp_dir)
+        with db.pool.connection() as conn:
+            by_name = str(conn.execute('''
+                EXPLAIN QUERY PLAN SELECT college_code, college_name FROM colleges
+                WHERE (college_name, college_code) < (?, ?) ORDER BY college_name DESC, college_code DESC LIMIT 51
+            ''', ('M', '0')).fetchall())
+        assert "USING COVERING INDEX idx_college_name" in by_name and "TEMP B-TREE" not in by_name
+
+        pages = walk(db, 'college_name', limit=5)
+        start_time = time.perf_counter()
+        for _ in range(200):
+            db.list_colleges(limit=5, sort='college_name')
+        first = (time.perf_counter() - start_time) / 200
+        start_time = time.perf_counter()
+        for _ in range(200):
+            db.list_colleges(limit=5, sort='college_name', cursor=pages[-2]['next_cursor'])
+        last = (time.perf_counter() - start_time) / 200
+        assert last < first * 3 + 0.0005
+        db.close()
+    print(f"⏱️  First page: {first * 1e6:.0f} µs, page {len(pages)}: {last * 1e6:.0f} µs")
+
+def test_fields_and_bad_arguments():
+    """Fields are projected and counted from the branch summaries; bad arguments raise ValueError."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = make_database(tmp_dir)
+        page = db.list_colleges(limit=5, fields=['college_code', 'branch_count', 'cutoff_count'])
+        summaries = db.get_branch_summaries([c['college_code'] for c in page['colleges']])
+        for college in page['colleges']:
+            assert set(college) == {'college_code', 'branch_count', 'cutoff_count'}
+            branches = summaries[college['college_code']]['branches']
+            assert college['branch_count'] == len(branches)
+            assert college['cutoff_count'] == sum(b['cutoff_count'] for b in branches)
+        # The cursor works even when the sort key is not among the fields
+        names = db.list_colleges(limit=5, sort='college_name', fields=['branch_count'])
+        assert db.list_colleges(limit=5, sort='college_name', cursor=names['next_cursor'])['colleges']
+
+        for arguments in ({'sort': 'rank'}, {'fields': ['college_code', 'password']},
+                          {'cursor': 'not-a-cursor'}, {'cursor': page['next_cursor'], 'sort': 'college_name'}):
+            try:
+                db.list_colleges(**arguments)
+                assert False, arguments
+            except ValueError:
+                pass
+        db.close()
+    print("✅ Field selection and argument checks")
+
+def test_endpoint_etag():
+    """The ETag follows the data version: 304 until an ingest, then a new page."""
+    import EDI_project_enhanced as server
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        original_db = server.db
+        server.db = server.http_cache.db = server.college_api.db = make_database(tmp_dir)
+        try:
+            client = server.app.test_client()
+            response = client.get('/colleges?limit=2&sort=-college_name')
+            body = response.get_json()
+            etag = response.headers['ETag']
+            assert response.status_code == 200 and len(body['colleges']) == 2 and body['next_cursor']
+            assert response.headers['Cache-Control'] == 'no-cache'
+
+            again = client.get('/colleges?limit=2&sort=-college_name', headers={'If-None-Match': etag})
+            assert again.status_code == 304 and again.data == b''
+            assert again.headers['ETag'] == etag
+            # Another page or projection has its own tag
+            other = client.get('/colleges?limit=3&sort=-college_name', headers={'If-None-Match': etag})
+            assert other.status_code == 200 and other.headers['ETag'] != etag
+
+            following = client.get('/colleges', query_string={'limit': 2, 'sort': '-college_name',
+                                                              'cursor': body['next_cursor']}).get_json()
+            assert following['colleges'][0]['college_name'] < body['colleges'][-1]['college_name']
+            assert client.get('/colleges?sort=rank').status_code == 400
+            assert client.get('/colleges?fields=college_code,secret').status_code == 400
+            assert client.get('/colleges?cursor=abc').status_code == 400
+            # Searches and offsets keep their ranked limit/offset paging
+            searched = client.get('/colleges?search=pune&limit=3&fields=college_name').get_json()
+            assert len(searched['colleges']) == 3 and list(searched['colleges'][0]) == ['college_name']
+            # A negative offset is the first page, as it is in SQLite
+            assert client.get('/colleges?search=pune&limit=3&offset=-5&fields=college_name').get_json() == searched
+
+            with open("full_pdf_parsed.json", "r", encoding="utf-8") as f:
+                server.db.bulk_store_parsed_data(json.load(f))
+            changed = client.get('/colleges?limit=2&sort=-college_name', headers={'If-None-Match': etag})
+            assert changed.status_code == 200 and changed.headers['ETag'] != etag
+        finally:
+            server.db.close()
+            server.db = server.http_cache.db = server.college_api.db = original_db
+    print("✅ /colleges ETag answers 304 until the next ingest")
+
+if __name__ == "__main__":
+    print("🚀 Starting college listing tests...\n")
+    test_cursor_walks_every_college_once()
+    test_seeks_use_indexes()
+    test_fields_and_bad_arguments()
+    test_endpoint_etag()
+    print("\n🎉 All college listing tests completed!")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test script for the pooled, WAL-mode connection layer in CollegeDatabase.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from database import CollegeDatabase
+
+def test_pool_pragmas_and_reuse():
+    """Pooled connections run in WAL mode and are reused across calls."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = CollegeDatabase(os.path.join(tmp_dir, "pool.db"), pool_size=2)
+
+        with db.pool.connection() as conn:
+            assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+            assert conn.execute('PRAGMA busy_timeout').fetchone()[0] == 5000
+
+        for _ in range(20):
+            db.get_database_stats()
+        assert len(db.pool._connections) == 1
+        db.close()
+        print("✅ Pool uses WAL and reuses a single connection for serial calls")
+
+def test_readers_not_blocked_by_ingest():
+    """Readers on other threads keep answering while a bulk ingest runs."""
+    with open("full_pdf_parsed.json", "r", encoding="utf-8") as f:
+        parsed_data = json.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = CollegeDatabase(os.path.join(tmp_dir, "pool.db"), pool_size=4)
+        db.bulk_store_parsed_data(parsed_data)
+
+        errors = []
+        reads = []
+        stop = threading.Event()
+
+        def reader():
+            while not stop.is_set():
+                start_time = time.time()
+                stats = db.get_database_stats()
+                reads.append(time.time() - start_time)
+                if not stats:
+                    errors.append("empty stats")
+
+        threads = [threading.Thread(target=reader) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for _ in range(3):
+            assert db.bulk_store_parsed_data(parsed_data)['success']
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        assert not errors
+        assert reads
+        print(f"✅ {len(reads)} concurrent reads during ingest, slowest {max(reads) * 1000:.1f} ms")
+        db.close()
+
+if __name__ == "__main__":
+    print("🚀 Starting connection pool tests...\n")
+    test_pool_pragmas_and_reuse()
+    test_readers_not_blocked_by_ingest()
+    print("\n🎉 All connection pool tests completed!")
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test script for the CollegeDatabase read paths (college details, projections).
+Loads the parsed full PDF into a temporary database.
+"""
+
+import json
+import os
+import tempfile
+from database import CollegeDatabase
+
+def make_database(tmp_dir):
+    """Create a temporary database loaded with full_pdf_parsed.json."""
+    with open("full_pdf_parsed.json", "r", encoding="utf-8") as f:
+        parsed_data = json.load(f)
+    db = CollegeDatabase(os.path.join(tmp_dir, "queries.db"))
+    assert db.bulk_store_parsed_data(parsed_data)['success']
+    return db
+
+def test_college_data_projection():
+    """Stage/category filters and the count-only projection agree with the full fetch."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = make_database(tmp_dir)
+
+        full = db.get_college_data(college_code="01002")
+        assert full['college_name'] == "Government College of Engineering, Amravati"
+        assert full['branches']
+
+        counts = db.get_college_data(college_code="01002", include_cutoffs=False)
+        assert [b['cutoff_count'] for b in counts['branches']] == [len(b['cutoff_data']) for b in full['branches']]
+        assert 'cutoff_data' not in counts['branches'][0]
+
+        filtered = db.get_college_data(college_code="01002", stages=["I"], categories=["GOPENS", "TFWS"])
+        assert len(filtered['branches']) == len(full['branches'])
+        for branch, full_branch in zip(filtered['branches'], full['branches']):
+            expected = [c for c in full_branch['cutoff_data'] if c['stage'] == "I" and c['category'] in ("GOPENS", "TFWS")]
+            assert branch['cutoff_data'] == expected
+
+        assert db.get_college_data(college_name="Amravati")['college_code']
+        assert db.get_college_data(college_code="99999") is None
+        assert db.get_college_data() is None
+        print("✅ College detail projections match the full fetch")
+        db.close()
+
+def test_colleges_data_batch():
+    """Set-based multi-college fetch matches get_college_data per code, with and without the snapshot."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        snapshot_db = make_database(tmp_dir)
+        sql_db = CollegeDatabase(snapshot_db.db_path, use_snapshot=False)
+        codes = [c['college_code'] for c in sql_db.search_colleges("")[:40]]
+        requested = codes + ["99999", codes[0]]
+
+        for db in (sql_db, snapshot_db):
+            for options in ({}, {"include_cutoffs": False}, {"stages": ["I"], "categories": ["GOPENS", "TFWS"]}):
+                batch = db.get_colleges_data(requested, **options)
+                assert list(batch) == list(dict.fromkeys(requested))
+                assert batch["99999"] is None
+                for code in codes:
+                    assert batch[code] == sql_db.get_college_data(college_code=code, **options)
+
+        # Chunking the IN list does not change the result
+        assert sql_db.get_colleges_data(codes, chunk_size=7) == sql_db.get_colleges_data(codes)
+        assert sql_db.get_colleges_data([]) == {}
+        print(f"✅ Batch college fetch matches single lookups for {len(codes)} colleges")
+        sql_db.close()
+        snapshot_db.close()
+
+def test_search_index():
+    """FTS5 search is ranked, prefix-aware, paginated and kept in sync on ingest."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = make_database(tmp_dir)
+        assert db.fts_enabled
+
+        # Prefix match on the name, and the code column outranks names
+        assert all("Amrav" in c['college_name'] for c in db.search_colleges("Amrav", limit=3))
+        assert db.search_colleges("01002")[0]['college_code'] == "01002"
+
+        # Branch names and status are searchable too
+        assert any(c['college_code'] == "01002" for c in db.search_colleges("Instrumentation"))
+
+        all_hits = db.search_colleges("engineering")
+        page = db.search_colleges("engineering", limit=5, offset=5)
+        assert page == all_hits[5:10]
+
+        # Mid-word substrings still fall back to LIKE
+        assert db.search_colleges("ngineering, Amravati")
+        assert len(db.search_colleges("")) == db.get_database_stats()['colleges']
+
+        db.bulk_store_parsed_data({
+            "parsing_success": True,
+            "colleges": [{"college_code": "99001", "college_name": "Zylophone Institute of Testing", "branches": []}]
+        })
+        assert [c['college_code'] for c in db.search_colleges("zylo")] == ["99001"]
+        print("✅ FTS5 college search works")
+        db.close()
+
+def test_eligible_branches():
+    """Eligibility matches a brute-force scan and uses the composite index."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = make_database(tmp_dir)
+
+        results = db.find_eligible_branches("gopens", rank=15000, stage="I", limit=1000)
+        assert results
+        assert all(r['closing_rank'] >= 15000 and r['category'] == "GOPENS" for r in results)
+        assert [r['closing_rank'] for r in results] == sorted(r['closing_rank'] for r in results)
+
+        with db.pool.connection() as conn:
+            expected = conn.execute(
+                "SELECT COUNT(*) FROM cutoff_data WHERE category = 'GOPENS' AND stage = 'I' AND rank >= 15000"
+            ).fetchone()[0]
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT branch_id FROM cutoff_data "
+                "WHERE academic_year = 2024 AND cap_round = 3 AND category = 'GOPENS' AND stage = 'I' AND rank >= 15000"
+            ).fetchall()
+        assert len(results) == expected
+        assert "idx_cutoff_eligibility_rank" in str(plan)
+
+        by_percentile = db.find_eligible_branches("TFWS", percentile=95.0, limit=20)
+        assert all(r['percentage'] <= 95.0 for r in by_percentile)
+        assert db.find_eligible_branches("GOPENS") == []
+        print(f"✅ Eligibility query returned {len(results)} branches for rank 15000 GOPENS")
+        db.close()
+
+if __name__ == "__main__":
+    print("🚀 Starting database query tests...\n")
+    test_college_data_projection()
+    test_colleges_data_batch()
+    test_search_index()
+    test_eligible_branches()
+    print("\n🎉 All database query tests completed!")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test script for diff-based re-ingest: only changed rows are written, the
+changeset lists added, removed and changed cutoffs, and the stored data
+ends up the same as a fresh load of the new parse.
+"""
+
+import copy
+import json
+import os
+import tempfile
+from database import CollegeDatabase
+
+def load_parsed():
+    with open("full_pdf_parsed.json", "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def all_colleges(db):
+    codes = [c['college_code'] for c in db.search_colleges("")]
+    return db.get_colleges_data(codes)
+
+def row_writes(db):
+    """Rows changed so far on the single pooled connection."""
+    return db.pool._connections[0].total_changes
+
+def corrected(parsed_data, share=0.02):
+    """A corrected reprint: every 1/share-th cutoff moved, one removed and one added."""
+    fixed = copy.deepcopy(parsed_data)
+    cutoffs = [cutoff for college in fixed['colleges'] for branch in college['branches']
+               for cutoff in branch['cutoff_data']]
+    step = int(1 / share)
+    for cutoff in cutoffs[::step]:
+        cutoff['rank'] += 7
+    branches = [branch for college in fixed['colleges'] for branch in college['branches'] if branch['cutoff_data']]
+    removed = branches[3]['cutoff_data'].pop()
+    branches[-1]['cutoff_data'].append({'stage': 'IX', 'category': 'GOPENS', 'rank': 99999, 'percentage': 1.5})
+    return fixed, removed
+
+def test_diff_matches_fresh_load():
+    """Diff ingest into an empty or stale database gives the same data as a fresh bulk load."""
+    parsed_data = load_parsed()
+    fixed, _ = corrected(parsed_data)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        diff_db = CollegeDatabase(os.path.join(tmp_dir, "diff.db"))
+        first = diff_db.diff_store_parsed_data(parsed_data)
+        assert first['success'] and first['cutoffs']['deleted'] == 0
+        fresh_db = CollegeDatabase(os.path.join(tmp_dir, "fresh.db"))
+        fresh_db.bulk_store_parsed_data(parsed_data)
+        assert all_colleges(diff_db) == all_colleges(fresh_db)
+
+        diff_db.diff_store_parsed_data(fixed)
+        fixed_db = CollegeDatabase(os.path.join(tmp_dir, "fixed.db"))
+        fixed_db.bulk_store_parsed_data(fixed)
+        assert all_colleges(diff_db) == all_colleges(fixed_db)
+
+        # The stream mode with small batches writes the same result
+        stream_db = CollegeDatabase(os.path.join(tmp_dir, "stream.db"))
+        stream_db.store_college_stream(iter(parsed_data['colleges']), batch_size=7, diff=True)
+        stats = stream_db.store_college_stream(iter(fixed['colleges']), batch_size=7, diff=True)
+        assert stats['success'] and stats['cutoffs']['deleted'] == 1
+        assert all_colleges(stream_db) == all_colleges(fixed_db)
+        for db in (diff_db, fresh_db, fixed_db, stream_db):
+            db.close()
+    print("✅ Diff ingest gives the same data as a fresh load")
+
+def test_changeset_and_write_work():
+    """A 2% correction writes about 2% of the rows and reports exactly what changed."""
+    parsed_data = load_parsed()
+    fixed, removed = corrected(parsed_data)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = CollegeDatabase(os.path.join(tmp_dir, "diff.db"), pool_size=1)
+        full_writes = row_writes(db)
+        db.diff_store_parsed_data(parsed_data)
+        full_writes = row_writes(db) - full_writes
+
+        # Identical re-upload: nothing written, caches keep their generation
+        generation = db.generation
+        before = row_writes(db)
+        same = db.diff_store_parsed_data(parsed_data)
+        assert row_writes(db) == before
+        assert db.generation == generation
+        assert same['changeset'] == {'added': [], 'removed': [], 'changed': [], 'truncated': False}
+        assert same['colleges']['unchanged'] == 354
+
+        before = row_writes(db)
+        stats = db.diff_store_parsed_data(fixed)
+        writes = row_writes(db) - before
+        changeset = stats['changeset']
+        assert len(changeset['removed']) == 1 and changeset['removed'][0]['rank'] == removed['rank']
+        last_college = fixed['colleges'][-1]
+        assert changeset['added'] == [{'college_code': last_college['college_code'],
+                                       'branch_code': last_college['branches'][-1]['branch_code'],
+                                       'stage': 'IX', 'category': 'GOPENS', 'rank': 99999, 'percentage': 1.5}]
+        assert changeset['changed'] and all(c['rank'] == c['previous_rank'] + 7 for c in changeset['changed'])
+        assert stats['cutoffs']['updated'] == len(changeset['changed'])
+        assert stats['colleges']['inserted'] == stats['branches']['inserted'] == 0
+        assert db.generation == generation + 1
+        # Changed cutoffs plus one content hash per touched college
+        assert writes <= 0.05 * full_writes, (writes, full_writes)
+        db.close()
+    print(f"✅ 2% correction: {writes} row writes vs {full_writes} for the full load, "
+          f"{len(changeset['changed'])} changed cutoffs reported")
+
+def test_other_writes_invalidate_hashes():
+    """An upsert after a diff ingest does not leave stale hashes behind."""
+    parsed_data = load_parsed()
+    fixed, _ = corrected(parsed_data)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = CollegeDatabase(os.path.join(tmp_dir, "diff.db"))
+        db.diff_store_parsed_data(parsed_data)
+        expected = all_colleges(db)
+        db.bulk_store_parsed_data(fixed)
+        assert all_colleges(db) != expected
+
+        stats = db.diff_store_parsed_data(parsed_data)
+        assert stats['cutoffs']['updated'] > 0
+        # The cutoff added by the upsert is still extra; everything else is back
+        assert stats['cutoffs']['deleted'] == 1
+        assert all_colleges(db) == expected
+
+        # Renaming a branch changes the content of every round that lists it
+        renamed = copy.deepcopy(parsed_data)
+        renamed['colleges'][0]['branches'][0]['branch_name'] = "Civil and Infrastructure Engineering"
+        stats = db.diff_store_parsed_data(renamed)
+        assert stats['branches']['updated'] == 1
+        assert db.search_colleges("Infrastructure")[0]['college_code'] == renamed['colleges'][0]['college_code']
+        db.close()
+    print("✅ Upserts and renames invalidate stored content hashes")
+
+if __name__ == "__main__":
+    print("🚀 Starting diff ingest tests...\n")
+    test_diff_matches_fresh_load()
+    test_changeset_and_write_work()
+    test_other_writes_invalidate_hashes()
+    print("\n🎉 All diff ingest tests completed!")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test script for typo-tolerant name matching: the trigram index finds
+misspelt college and branch names with scores, and answers in well under a
+millisecond for thousands of names.
+"""
+
+import tempfile
+import time
+from fuzzy_index import TrigramIndex, trigrams
+from test_database_queries import make_database
+
+def test_trigrams_and_scores():
+    """Scores are the share of the query's trigrams found in a name."""
+    assert trigrams("PICT") == {'$pi', 'pic', 'ict', 'ct$'}
+    assert trigrams("") == set()
+
+    index = TrigramIndex([('a', 'Walchand College of Engineering'), ('b', 'Walchand Institute of Technology'),
+                          ('c', 'College of Engineering')])
+    assert index.search("Walchand College of Engineering")[0] == ('a', 'Walchand College of Engineering', 100.0)
+    # Same score: the shorter name overlapping more of itself comes first
+    assert [key for key, _, _ in index.search("college of engineering")] == ['c', 'a']
+    assert index.search("walchand", limit=1)[0][0] == 'a'
+    assert index.search("xyz qqq") == []
+    assert index.search("Walchand", limit=0) == []
+    print("✅ Trigram scores and ordering")
+
+def test_misspelt_names():
+    """Typos that full-text search misses still find the right college or branch."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = make_database(tmp_dir)
+        expected = {
+            "Walchnd Colege": '06007',
+            "pune institue of computr technolgy": '06271',
+            "goverment colege of engg amravati": '01002',
+            "Veermata Jijabai Technologcal": '03012'
+        }
+        for name, college_code in expected.items():
+            assert db.search_colleges(name) == []
+            matches = db.match_names(name)
+            assert matches['colleges'][0]['college_code'] == college_code, (name, matches)
+            assert matches['colleges'][0]['score'] >= 75
+
+        assert db.match_names("informaton technology")['branches'][0]['branch_name'] == "Information Technology"
+        assert db.match_names("artifical intelligence")['branches'][0]['score'] > 90
+        assert db.match_names("xyz qqq") == {'colleges': [], 'branches': []}
+        print("✅ Misspelt college and branch names are matched")
+        db.close()
+
+def test_match_speed():
+    """Top-k matching over several years of college names stays sub-millisecond."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = make_database(tmp_dir)
+        colleges = db.get_college_gazetteer().colleges
+        db.close()
+
+    # Four admission years of names, as the database will hold once rounds are kept per year
+    entries = [(f'{year}-{code}', f'{name} {year}') for year in range(2022, 2026) for code, name in colleges]
+    index = TrigramIndex(entries)
+    queries = ["Walchnd Colege", "pune institue of computr technolgy", "sinhgad colege of engg", "coep technological univ"]
+
+    start_time = time.perf_counter()
+    for _ in range(200):
+        for query in queries:
+            index.search(query, limit=5)
+    per_query = (time.perf_counter() - start_time) / (200 * len(queries))
+    assert per_query < 0.001
+    print(f"⏱️  Trigram match: {per_query * 1e6:.0f} µs per query over {len(index)} names")
+
+if __name__ == "__main__":
+    print("🚀 Starting fuzzy index tests...\n")
+    test_trigrams_and_scores()
+    test_misspelt_names()
+    test_match_speed()
+    print("\n🎉 All fuzzy index tests completed!")
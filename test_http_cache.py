@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test script for the HTTP caching layer: ETags follow the data version,
+If-None-Match gets a 304 without running the view, and serialized and
+gzip-compressed bodies are served from a bounded cache.
+"""
+
+import gzip
+import json
+import tempfile
+import time
+from flask import Flask, jsonify
+from http_cache import HTTPCache
+from test_database_queries import make_database
+
+class VersionedData:
+    """Stands in for CollegeDatabase: only data_version is read."""
+    data_version = 'test.0'
+
+def make_app(max_entries=8):
+    app = Flask(__name__)
+    data = VersionedData()
+    cache = HTTPCache(data, max_entries=max_entries, min_compress_bytes=200)
+    calls = []
+
+    @app.route('/items/<name>')
+    @cache.cached
+    def item(name):
+        calls.append(name)
+        if name == 'missing':
+            return jsonify({"error": "Item not found"}), 404
+        return jsonify({"name": name, "size": len(name), "padding": "x" * (10 if name == 'small' else 1000)})
+
+    return app.test_client(), data, cache, calls
+
+def test_etag_and_not_modified():
+    """A repeat request is served from the cache, and a matching ETag gets an empty 304."""
+    client, data, cache, calls = make_app()
+    first = client.get('/items/pune')
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and first.get_json()['name'] == 'pune'
+    assert etag.startswith('W/"test.0-')
+    assert first.headers['Cache-Control'] == 'no-cache' and 'Accept-Encoding' in first.headers['Vary']
+
+    assert client.get('/items/pune').data == first.data
+    not_modified = client.get('/items/pune', headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304 and not_modified.data == b''
+    assert not_modified.headers['ETag'] == etag
+    assert calls == ['pune']
+    assert cache.get_stats()['not_modified'] == 1
+
+    # Another path has its own tag; an ingest changes every tag
+    assert client.get('/items/nagpur', headers={'If-None-Match': etag}).status_code == 200
+    data.data_version = 'test.1'
+    changed = client.get('/items/pune', headers={'If-None-Match': etag})
+    assert changed.status_code == 200 and changed.headers['ETag'] != etag
+    assert calls == ['pune', 'nagpur', 'pune']
+    print("✅ ETags follow the data version and If-None-Match gets 304")
+
+def test_compressed_bodies():
+    """Clients accepting gzip get the compressed body, made once and cached."""
+    client, _, _, calls = make_app()
+    plain = client.get('/items/pune')
+    compressed = client.get('/items/pune', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.data) == plain.data
+    assert len(compressed.data) < len(plain.data) / 4
+    assert compressed.headers['ETag'] == plain.headers['ETag']
+    assert client.get('/items/pune', headers={'Accept-Encoding': 'gzip'}).data == compressed.data
+
+    # Small bodies are not worth compressing
+    small = client.get('/items/small', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers and small.get_json()['name'] == 'small'
+    assert client.get('/items/pune', headers={'Accept-Encoding': 'identity'}).data == plain.data
+    assert calls == ['pune', 'small']
+    print("✅ gzip bodies are compressed once and cached")
+
+def test_errors_and_bounds():
+    """Errors are never cached, and the cache holds at most max_entries bodies."""
+    client, _, cache, calls = make_app(max_entries=4)
+    for _ in range(2):
+        missing = client.get('/items/missing')
+        assert missing.status_code == 404 and 'ETag' not in missing.headers
+    assert calls == ['missing', 'missing']
+
+    for i in range(20):
+        client.get(f'/items/college{i}', headers={'Accept-Encoding': 'gzip'})
+    stats = cache.get_stats()
+    assert stats['entries'] <= 4 and stats['evictions'] > 0
+    print("✅ Errors pass through and the body cache stays bounded")
+
+def test_server_read_endpoints():
+    """/college, /colleges and the summaries answer repeat visits without touching the database."""
+    import EDI_project_enhanced as server
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        original_db = server.db
+        server.db = server.http_cache.db = server.college_api.db = make_database(tmp_dir)
+        try:
+            client = server.app.test_client()
+            headers = {'Accept-Encoding': 'gzip'}
+            for path in ('/college/01002', '/college/01002/summary', '/college/01002/history', '/colleges?limit=100'):
+                first = client.get(path, headers=headers)
+                assert first.status_code == 200, path
+                assert json.loads(gzip.decompress(first.data)) == client.get(path).get_json()
+                assert client.get(path, headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+            assert client.get('/college/99999').status_code == 404
+
+            server.http_cache.clear()
+            start_time = time.perf_counter()
+            client.get('/college/01002', headers=headers)
+            miss = time.perf_counter() - start_time
+            start_time = time.perf_counter()
+            for _ in range(50):
+                client.get('/college/01002', headers=headers)
+            hit = (time.perf_counter() - start_time) / 50
+
+            # The database counts are kept per generation; cache counters stay live
+            stats = client.get('/database-stats').get_json()
+            assert stats['http_cache']['not_modified'] >= 4 and stats['colleges'] == 354
+            with open("full_pdf_parsed.json", "r", encoding="utf-8") as f:
+                parsed_data = json.load(f)
+            parsed_data['academic_year'], parsed_data['cap_round'] = 2025, 1
+            server.db.bulk_store_parsed_data(parsed_data)
+            assert len(client.get('/database-stats').get_json()['admission_rounds']) == 2
+        finally:
+            server.db.close()
+            server.db = server.http_cache.db = server.college_api.db = original_db
+    print("✅ Read endpoints are served through the HTTP cache")
+    print(f"⏱️  /college/01002: {miss * 1000:.2f} ms uncached, {hit * 1000:.2f} ms cached")
+
+if __name__ == "__main__":
+    print("🚀 Starting HTTP cache tests...\n")
+    test_etag_and_not_modified()
+    test_compressed_bodies()
+    test_errors_and_bounds()
+    test_server_read_endpoints()
+    print("\n🎉 All HTTP cache tests completed!")
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Test script for the background PDF ingestion job queue.
+"""
+
+import os
+import tempfile
+import threading
+import time
+from database import CollegeDatabase
+from ingest_jobs import IngestJobQueue
+from pdf_parser import EnhancedCollegeParser
+from test_stream_parser import SAMPLE_TEXT
+
+class SamplePageParser(EnhancedCollegeParser):
+    """Parser that serves SAMPLE_TEXT as a few pages instead of reading a PDF."""
+
+    def count_pages(self, pdf_path):
+        return 3
+
+    def iter_page_texts(self, pdf_path, start_page=0, end_page=None):
+        third = len(SAMPLE_TEXT) // 3
+        yield SAMPLE_TEXT[:third]
+        yield SAMPLE_TEXT[third:2 * third]
+        yield SAMPLE_TEXT[2 * third:]
+
+class CountingPageParser(SamplePageParser):
+    """SamplePageParser that counts, across instances, how often each upload is opened."""
+
+    lock = threading.Lock()
+    opened = {}
+
+    def count_pages(self, pdf_path):
+        with self.lock:
+            self.opened[pdf_path] = self.opened.get(pdf_path, 0) + 1
+        time.sleep(0.05)
+        return super().count_pages(pdf_path)
+
+class CorruptPDFParser(SamplePageParser):
+    """Parser that fails on the upload the way PyPDF2 does on a corrupt file."""
+
+    def count_pages(self, pdf_path):
+        raise ValueError("EOF marker not found")
+
+def write_upload(tmp_dir, name="cutoff.pdf"):
+    path = os.path.join(tmp_dir, name)
+    with open(path, 'wb') as f:
+        f.write(b"%PDF sample")
+    return path
+
+def wait_for(jobs, job_id, timeout=10):
+    """Poll a job until it finishes."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = jobs.get(job_id)
+        if job['status'] in ('completed', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job_id} did not finish in {timeout}s")
+
+def test_job_runs_in_background():
+    """A submitted job is parsed and stored by a worker and reports progress."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = CollegeDatabase(os.path.join(tmp_dir, "jobs.db"))
+        jobs = IngestJobQueue(db, SamplePageParser())
+        jobs.start()
+
+        upload = write_upload(tmp_dir)
+        job_id = jobs.submit(upload, "cutoff.pdf")
+        job = wait_for(jobs, job_id)
+        jobs.stop()
+
+        assert job['status'] == 'completed', job
+        assert job['pages_processed'] == job['total_pages'] == 3
+        assert job['colleges_stored'] == job['result']['stored_colleges'] == 2
+        assert job['progress'] == 1.0 and job['eta_seconds'] == 0
+        assert job['result']['parsed']['colleges'] == 2
+        assert 'filepath' not in job
+        assert not os.path.exists(upload)
+        assert db.get_college_data(college_code="01005")['college_name'].startswith("Sant Gadge Baba")
+        print(f"✅ Background job completed: {job['pages_processed']} pages, {job['colleges_stored']} colleges")
+
+def age_heartbeat(db, job_id, seconds):
+    """Move a job's last heartbeat into the past."""
+    with db.pool.connection() as conn:
+        conn.execute('UPDATE ingest_jobs SET updated_at = ? WHERE id = ?', (time.time() - seconds, job_id))
+
+def test_unfinished_jobs_resume_after_restart():
+    """Jobs queued, or running with a stale heartbeat, when the server stopped are picked up on start()."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "jobs.db")
+        upload = write_upload(tmp_dir)
+
+        # Simulate a server that queued a job and one that died mid-job
+        db = CollegeDatabase(db_path)
+        queued_id = IngestJobQueue(db, SamplePageParser()).submit(upload, "cutoff.pdf")
+        running_upload = write_upload(tmp_dir, "running.pdf")
+        running_id = IngestJobQueue(db, SamplePageParser()).submit(running_upload, "running.pdf")
+        db.update_ingest_job(running_id, status='running', started_at=time.time(), total_pages=3, pages_processed=1)
+        age_heartbeat(db, running_id, 600)
+        # A job another live server is running keeps its owner
+        live_upload = write_upload(tmp_dir, "live.pdf")
+        live_id = IngestJobQueue(db, SamplePageParser()).submit(live_upload, "live.pdf")
+        assert db.claim_ingest_job(live_id, "other-server", stale_after=300)
+        db.close()
+
+        restarted_db = CollegeDatabase(db_path)
+        jobs = IngestJobQueue(restarted_db, SamplePageParser())
+        jobs.start()
+        queued = wait_for(jobs, queued_id)
+        running = wait_for(jobs, running_id)
+        jobs.stop()
+
+        assert queued['status'] == 'completed'
+        assert running['status'] == 'completed'
+        assert restarted_db.get_database_stats()['colleges'] == 2
+        live = restarted_db.get_ingest_job(live_id)
+        assert live['status'] == 'running' and live['owner'] == "other-server" and os.path.exists(live_upload)
+        print("✅ Queued and interrupted jobs resumed after restart; a live server's job was left alone")
+
+def test_each_job_runs_once_across_servers():
+    """Two queues on one database (two server processes) never run the same job twice."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "jobs.db")
+        first_db, second_db = CollegeDatabase(db_path), CollegeDatabase(db_path)
+        uploads = [write_upload(tmp_dir, f"cutoff{i}.pdf") for i in range(4)]
+        job_ids = [IngestJobQueue(first_db, SamplePageParser()).submit(upload) for upload in uploads]
+
+        CountingPageParser.opened.clear()
+        queues = [IngestJobQueue(first_db, CountingPageParser(), workers=2),
+                  IngestJobQueue(second_db, CountingPageParser(), workers=2)]
+        for jobs in queues:
+            jobs.start()
+        finished = [wait_for(queues[0], job_id) for job_id in job_ids]
+        for jobs in queues:
+            jobs.stop()
+
+        assert [job['status'] for job in finished] == ['completed'] * 4, finished
+        assert CountingPageParser.opened == {upload: 1 for upload in uploads}
+        assert not any(os.path.exists(upload) for upload in uploads)
+        first_db.close()
+        second_db.close()
+        print("✅ Each job was claimed and run by exactly one of two queues")
+
+def test_missing_upload_fails_job():
+    """A job whose upload has disappeared is marked failed with an error."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = CollegeDatabase(os.path.join(tmp_dir, "jobs.db"))
+        jobs = IngestJobQueue(db, SamplePageParser())
+        jobs.start()
+
+        job_id = jobs.submit(os.path.join(tmp_dir, "gone.pdf"))
+        job = wait_for(jobs, job_id)
+        jobs.stop()
+
+        assert job['status'] == 'failed'
+        assert job['error'] == "Uploaded file is missing"
+        assert jobs.get("unknown") is None
+        print(f"✅ Missing upload reported: {job['error']}")
+
+def test_failed_job_removes_upload():
+    """A job that fails while parsing still deletes its upload."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = CollegeDatabase(os.path.join(tmp_dir, "jobs.db"))
+        jobs = IngestJobQueue(db, CorruptPDFParser())
+        jobs.start()
+
+        upload = write_upload(tmp_dir)
+        job = wait_for(jobs, jobs.submit(upload, "cutoff.pdf"))
+        jobs.stop()
+
+        assert job['status'] == 'failed' and "EOF marker" in job['error']
+        assert job['colleges_stored'] == 0
+        assert not os.path.exists(upload)
+        print(f"✅ Failed job removed its upload: {job['error']}")
+
+if __name__ == "__main__":
+    print("🚀 Starting ingest job tests...\n")
+    test_job_runs_in_background()
+    test_unfinished_jobs_resume_after_restart()
+    test_each_job_runs_once_across_servers()
+    test_missing_upload_fails_job()
+    test_failed_job_removes_upload()
+    print("\n🎉 All ingest job tests completed!")
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Test script for the LLM gateway: deadlines, circuit breakers, hedged
+fallback and token streaming, against the local Ollama stub server and a
+fake Cohere client.
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+from llm_gateway import AsyncLLMGateway, CircuitBreaker, CohereProvider, LLMGateway, OllamaProvider
+from llm_stub_server import StubOllamaServer
+
+class FakeCohereClient:
+    """Stands in for cohere.Client; answers after an optional delay."""
+
+    def __init__(self, text="Cohere answer.", delay=0.0, fail=False):
+        self.text = text
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.request_options = None
+
+    def chat(self, model, message, max_tokens, temperature, request_options=None):
+        self.calls += 1
+        self.request_options = request_options
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("cohere unavailable")
+        return SimpleNamespace(text=self.text)
+
+def test_circuit_breaker():
+    """The breaker opens after the threshold, then lets one trial call through."""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+    assert breaker.allow() and breaker.state == 'closed'
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == 'open' and not breaker.allow()
+
+    time.sleep(0.12)
+    assert breaker.state == 'half_open'
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial at a time
+    breaker.record_failure()
+    assert breaker.state == 'open'
+
+    time.sleep(0.12)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed' and breaker.allow()
+    print("✅ Circuit breaker opens, half-opens and closes")
+
+def test_ollama_provider():
+    """Requests go to /api/generate over the pooled session."""
+    with StubOllamaServer(response_text="Hello from the stub.") as stub:
+        gateway = LLMGateway([OllamaProvider(stub.url, model="test-model")])
+        assert gateway.generate("Say hello", max_tokens=50, temperature=0.2) == "Hello from the stub."
+        assert gateway.generate("Again") == "Hello from the stub."
+        assert stub.requests[0]['model'] == "test-model"
+        assert stub.requests[0]['options'] == {'num_predict': 50, 'temperature': 0.2}
+        assert stub.requests[0]['stream'] is False
+
+        stats = gateway.get_stats()
+        assert stats['answered'] == 2
+        assert stats['providers']['ollama'] == {'state': 'closed', 'calls': 2, 'failures': 0, 'last_error': None}
+        gateway.close()
+    print("✅ Ollama provider answers through the gateway")
+
+def test_deadline():
+    """A hung provider cannot hold the caller past the deadline."""
+    with StubOllamaServer(delay=5.0) as stub:
+        gateway = LLMGateway([OllamaProvider(stub.url)], deadline=0.3)
+        start = time.perf_counter()
+        assert gateway.generate("Slow question") is None
+        elapsed = time.perf_counter() - start
+        assert elapsed < 1.0
+        assert gateway.get_stats()['timeouts'] == 1
+        gateway.close()
+
+    # Cohere gets the remaining time as its SDK timeout, without SDK retries
+    cohere = FakeCohereClient()
+    gateway = LLMGateway([CohereProvider(cohere)], deadline=2.5)
+    assert gateway.generate("Question") == "Cohere answer."
+    assert cohere.request_options == {'timeout_in_seconds': 3, 'max_retries': 0}
+    gateway.close()
+    print(f"✅ Deadline returned after {elapsed:.2f}s against a 5s provider")
+
+def test_breaker_skips_failing_provider():
+    """Once Ollama's breaker opens it is no longer called until the reset timeout."""
+    with StubOllamaServer(status=500) as stub:
+        ollama = OllamaProvider(stub.url, breaker=CircuitBreaker(failure_threshold=3, reset_timeout=0.3))
+        cohere = FakeCohereClient()
+        gateway = LLMGateway([ollama, CohereProvider(cohere)], hedge_delay=5.0)
+
+        for _ in range(3):
+            assert gateway.generate("Question") == "Cohere answer."
+        assert len(stub.requests) == 3 and ollama.breaker.state == 'open'
+
+        # Open breaker: straight to Cohere, Ollama is not contacted
+        start = time.perf_counter()
+        assert gateway.generate("Question") == "Cohere answer."
+        assert len(stub.requests) == 3
+        assert time.perf_counter() - start < 0.1
+
+        # After the reset timeout a healthy Ollama closes the breaker again
+        time.sleep(0.35)
+        stub.status = 200
+        assert gateway.generate("Question") == "Stub answer."
+        assert ollama.breaker.state == 'closed'
+        assert cohere.calls == 4
+        gateway.close()
+    print("✅ Open breaker skips the failing provider and recovers")
+
+def test_hedged_fallback():
+    """A slow Ollama is hedged with Cohere; a down Ollama hands over immediately."""
+    with StubOllamaServer(delay=2.0) as stub:
+        gateway = LLMGateway([OllamaProvider(stub.url), CohereProvider(FakeCohereClient())], hedge_delay=0.1)
+        start = time.perf_counter()
+        assert gateway.generate("Question") == "Cohere answer."
+        hedged_time = time.perf_counter() - start
+        assert hedged_time < 1.0
+        assert gateway.get_stats()['hedged'] == 1
+        gateway.close()
+
+    # Nothing listening on the stub's old port: the connection is refused
+    gateway = LLMGateway([OllamaProvider(stub.url), CohereProvider(FakeCohereClient())], hedge_delay=5.0)
+    start = time.perf_counter()
+    assert gateway.generate("Question") == "Cohere answer."
+    assert time.perf_counter() - start < 1.0
+
+    # Every provider failing gives None, and providers= restricts the call
+    gateway = LLMGateway([OllamaProvider(stub.url), CohereProvider(FakeCohereClient(fail=True))])
+    assert gateway.generate("Question") is None
+    assert LLMGateway([CohereProvider(FakeCohereClient())]).generate("Question", providers=['ollama']) is None
+    print(f"✅ Hedged fallback answered in {hedged_time:.2f}s against a 2s provider")
+
+def test_streaming():
+    """Ollama tokens are relayed as they arrive; failures before the first token fall through."""
+    with StubOllamaServer(response_text="One two three four five.", token_delay=0.2) as stub:
+        gateway = LLMGateway([OllamaProvider(stub.url), CohereProvider(FakeCohereClient())])
+        start = time.perf_counter()
+        arrivals = []
+        tokens = []
+        for token in gateway.stream("Count to five"):
+            arrivals.append(time.perf_counter() - start)
+            tokens.append(token)
+        assert tokens == ["One ", "two ", "three ", "four ", "five."]
+        assert stub.requests[-1]['stream'] is True
+        # The first token is not held back until the answer is complete
+        assert arrivals[0] < 0.15 and arrivals[-1] >= 0.8
+        assert gateway.get_stats()['answered'] == 1
+
+        # A broken Ollama hands the whole answer over to Cohere
+        stub.status = 500
+        assert list(gateway.stream("Count to five")) == ["Cohere answer."]
+        assert gateway.providers[0].failures == 1
+
+        # Closing the stream early counts neither against Ollama nor for it
+        stub.status = 200
+        stream = gateway.stream("Count to five")
+        assert next(stream) == "One "
+        stream.close()
+        assert gateway.providers[0].breaker.failures == 1
+        assert gateway.providers[0].breaker._trial_in_flight is False
+        gateway.close()
+
+    gateway = LLMGateway([CohereProvider(FakeCohereClient(delay=2.0))], deadline=0.2)
+    assert list(gateway.stream("Question")) == []
+    print(f"✅ Streaming relayed the first token after {arrivals[0] * 1000:.0f}ms of {arrivals[-1] * 1000:.0f}ms")
+
+def test_async_gateway():
+    """agenerate/astream follow the same deadline, hedging and breaker rules on the event loop."""
+    async def run():
+        with StubOllamaServer(response_text="Async stub answer.", delay=0.3) as stub:
+            ollama = OllamaProvider(stub.url)
+            gateway = AsyncLLMGateway([ollama], deadline=0.1)
+            timed_out = await gateway.agenerate("Question")
+            assert ollama.failures == 1 and ollama.breaker._trial_in_flight is False
+
+            gateway = AsyncLLMGateway([ollama, CohereProvider(FakeCohereClient())], hedge_delay=0.05)
+            hedged = await gateway.agenerate("Question")
+            hedge_count = gateway.hedged
+
+            stub.delay = 0.0
+            stub.token_delay = 0.05
+            tokens = [token async for token in gateway.astream("Question")]
+            await gateway.aclose()
+            gateway = AsyncLLMGateway([ollama])
+            answers = await asyncio.gather(*[gateway.agenerate(f"Question {i}") for i in range(50)])
+            await gateway.aclose()
+            return timed_out, hedged, hedge_count, tokens, answers
+
+    timed_out, hedged, hedge_count, tokens, answers = asyncio.run(run())
+    assert timed_out is None
+    assert hedged == "Cohere answer." and hedge_count == 1
+    assert tokens == ["Async ", "stub ", "answer."]
+    assert answers == ["Async stub answer."] * 50
+    print("✅ Async gateway times out, hedges and streams")
+
+if __name__ == "__main__":
+    print("🚀 Starting LLM gateway tests...\n")
+    test_circuit_breaker()
+    test_ollama_provider()
+    test_deadline()
+    test_breaker_skips_failing_provider()
+    test_hedged_fallback()
+    test_streaming()
+    test_async_gateway()
+    print("\n🎉 All LLM gateway tests completed!")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test script for the content-hash parse cache used by EnhancedCollegeParser.
+"""
+
+import os
+import tempfile
+import threading
+from parse_cache import ParseCache
+from pdf_parser import EnhancedCollegeParser
+from test_stream_parser import SAMPLE_TEXT
+
+class CountingParser(EnhancedCollegeParser):
+    """Parser that reads SAMPLE_TEXT instead of a real PDF and counts parses of the whole document."""
+
+    def __init__(self, cache=None):
+        super().__init__(cache=cache)
+        self.parse_count = 0
+
+    def iter_page_texts(self, pdf_path, start_page=0, end_page=None):
+        # Reading the first page for the admission round header is not a parse
+        if end_page is None:
+            self.parse_count += 1
+        yield SAMPLE_TEXT
+
+def write_file(path, content):
+    with open(path, 'wb') as f:
+        f.write(content)
+    return path
+
+def test_cache_hit_skips_parsing():
+    """A second parse of the same bytes is served from the cache."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = ParseCache(os.path.join(tmp_dir, "cache"))
+        parser = CountingParser(cache=cache)
+        pdf_path = write_file(os.path.join(tmp_dir, "cutoff.pdf"), b"%PDF sample")
+
+        first = parser.parse_pdf(pdf_path)
+        second = parser.parse_pdf(pdf_path)
+        streamed = list(parser.parse_pdf_stream(pdf_path))
+
+        assert first['parsing_success']
+        assert parser.parse_count == 1
+        assert second == first
+        assert streamed == first['colleges']
+        assert cache.get_stats()['hits'] == 2
+        print(f"✅ Cache hit skips parsing: {cache.get_stats()}")
+
+def test_cache_bypass_and_stream_fill():
+    """cache=False always parses, and a fully consumed stream fills the cache."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = ParseCache(os.path.join(tmp_dir, "cache"))
+        parser = CountingParser(cache=cache)
+        pdf_path = write_file(os.path.join(tmp_dir, "cutoff.pdf"), b"%PDF sample")
+
+        parser.parse_pdf(pdf_path, cache=False)
+        assert not cache.contains(pdf_path, parser.parser_version)
+
+        colleges = list(parser.parse_pdf_stream(pdf_path))
+        assert cache.contains(pdf_path, parser.parser_version)
+        assert list(parser.parse_pdf_stream(pdf_path)) == colleges
+        assert parser.parse_count == 2
+        print("✅ cache=False bypasses the cache; streamed parse fills it")
+
+def test_key_depends_on_bytes_and_version():
+    """Different PDF bytes or a new parser version never share an entry."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = ParseCache(os.path.join(tmp_dir, "cache"))
+        first = write_file(os.path.join(tmp_dir, "a.pdf"), b"%PDF one")
+        same = write_file(os.path.join(tmp_dir, "b.pdf"), b"%PDF one")
+        other = write_file(os.path.join(tmp_dir, "c.pdf"), b"%PDF two")
+
+        assert cache.key_for(first, "1") == cache.key_for(same, "1")
+        assert cache.key_for(first, "1") != cache.key_for(other, "1")
+        assert cache.key_for(first, "1") != cache.key_for(first, "2")
+        print("✅ Cache key covers file bytes and parser version")
+
+def test_interrupted_parse_leaves_no_entry():
+    """Abandoning a stream part-way must not publish a partial result."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = ParseCache(os.path.join(tmp_dir, "cache"))
+        parser = CountingParser(cache=cache)
+        pdf_path = write_file(os.path.join(tmp_dir, "cutoff.pdf"), b"%PDF sample")
+
+        stream = parser.parse_pdf_stream(pdf_path)
+        next(stream)
+        stream.close()
+
+        assert not cache.contains(pdf_path, parser.parser_version)
+        assert os.listdir(cache.cache_dir) == []
+        print("✅ Interrupted parse leaves no cache entry")
+
+def test_lru_eviction():
+    """The least recently used entry is evicted once max_bytes is exceeded."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = ParseCache(os.path.join(tmp_dir, "cache"))
+        parser = CountingParser(cache=cache)
+        paths = [write_file(os.path.join(tmp_dir, f"{i}.pdf"), f"%PDF {i}".encode()) for i in range(3)]
+
+        parser.parse_pdf(paths[0])
+        entry_size = cache.get_stats()['bytes']
+        cache.max_bytes = entry_size * 2 + entry_size // 2
+
+        parser.parse_pdf(paths[1])
+        os.utime(cache._path(cache.key_for(paths[0], parser.parser_version)), (0, 0))
+        parser.parse_pdf(paths[2])
+
+        assert not cache.contains(paths[0], parser.parser_version)
+        assert cache.contains(paths[1], parser.parser_version)
+        assert cache.contains(paths[2], parser.parser_version)
+        assert cache.get_stats()['bytes'] <= cache.max_bytes
+        print(f"✅ LRU eviction keeps the cache under {cache.max_bytes} bytes")
+
+def test_stats_during_eviction():
+    """get_stats() can run while other threads fill and evict the cache."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = ParseCache(os.path.join(tmp_dir, "cache"), max_bytes=1)
+        parser = CountingParser(cache=cache)
+        paths = [write_file(os.path.join(tmp_dir, f"{i}.pdf"), f"%PDF {i}".encode()) for i in range(20)]
+        errors = []
+
+        def fill():
+            try:
+                for path in paths:
+                    parser.parse_pdf(path)
+            except Exception as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=fill)
+        thread.start()
+        reads = 0
+        while thread.is_alive():
+            try:
+                cache.get_stats()
+                reads += 1
+            except Exception as e:
+                errors.append(e)
+        thread.join()
+        assert errors == [] and cache.get_stats()['bytes'] <= cache.max_bytes
+        print(f"✅ {reads} stats reads during eviction, none failed")
+
+if __name__ == "__main__":
+    print("🚀 Starting parse cache tests...\n")
+    test_cache_hit_skips_parsing()
+    test_cache_bypass_and_stream_fill()
+    test_key_depends_on_bytes_and_version()
+    test_interrupted_parse_leaves_no_entry()
+    test_lru_eviction()
+    test_stats_during_eviction()
+    print("\n🎉 All parse cache tests completed!")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test script for the single-pass query parser: intent keywords match whole
+words, categories, CAP stages, ranks and percentiles come out of the same
+pass, and the labelled corpus stays accurate and fast.
+"""
+
+import tempfile
+import time
+from benchmark_query_parser import load_corpus, predict_parser, score
+from query_parser import QueryParser
+from test_database_queries import make_database
+
+parser = QueryParser()
+
+def test_intent_word_boundaries():
+    """Keywords no longer fire inside other words."""
+    assert parser.parse("should devs learn DSA first").intent == 'general_query'
+    assert parser.parse("frankly, is engineering hard?").intent == 'general_query'
+    assert parser.parse("COEP vs VJTI").intent == 'comparison_query'
+    # "in" stays part of "engineering" in the search terms
+    parsed = parser.parse("search engineering colleges in kolhapur")
+    assert parsed.intent == 'college_search'
+    assert parsed.search_terms == 'engineering kolhapur'
+    print("✅ Intent keywords match whole words")
+
+def test_values_extracted():
+    """Category, stage, CAP round, academic year, rank and percentile come out of one pass."""
+    parsed = parser.parse("GOPEN cutoff for COEP CS in cap round 2, my rank is 12,500")
+    assert parsed.intent == 'cutoff_query'
+    assert (parsed.category, parsed.stage, parsed.cap_round, parsed.rank) == ('GOPENS', None, 2, 12500)
+    assert parsed.branch == 'Computer Science'
+    # A CAP round is not a stage within it
+    parsed = parser.parse("round iii stage 2 cutoff")
+    assert (parsed.stage, parsed.cap_round) == ('II', 3)
+
+    parsed = parser.parse("98.5 percentile lobcs stage iii")
+    assert (parsed.percentile, parsed.category, parsed.stage) == (98.5, 'LOBCS', 'III')
+    assert parsed.intent == 'cutoff_query'
+
+    # The academic year is the one the admission year starts in; a rank is never read as a year
+    assert parser.parse("LOBCS cutoff A.Y. 2024-25").academic_year == 2024
+    assert parser.parse("2025-2026 round 1 cutoff").academic_year == 2025
+    parsed = parser.parse("rank 2024 gopens")
+    assert (parsed.rank, parsed.academic_year) == (2024, None)
+    # A year alone is not a cutoff question
+    assert parser.parse("is it worth doing engineering in 2025").intent == 'general_query'
+
+    # Acronyms only count in capitals
+    assert parser.parse("is it worth it").branch is None
+    assert parser.parse("PICT IT cutoff").branch == 'Information Technology'
+    assert parser.parse("civil engineering colleges").branch == 'Civil Engineering'
+    print("✅ Categories, stages, ranks and percentiles extracted")
+
+def test_college_from_gazetteer():
+    """With a gazetteer the college is resolved in the same call."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = make_database(tmp_dir)
+        gazetteer = db.get_college_gazetteer()
+        parsed = parser.parse("VJTI mechanical cutoff", gazetteer)
+        assert parsed.college_code == '03012'
+        assert parsed.branch == 'Mechanical Engineering'
+        assert parser.parse("tell me a joke", gazetteer).college is None
+        db.close()
+    print("✅ College resolved from the gazetteer")
+
+def test_corpus_accuracy_and_speed():
+    """The labelled corpus stays accurate, and parsing takes microseconds."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = make_database(tmp_dir)
+        gazetteer = db.get_college_gazetteer()
+        corpus = load_corpus()
+        accuracy = score(corpus, predict_parser(db, corpus, parser, gazetteer))
+        assert accuracy['intent'] >= 0.95, accuracy
+        assert accuracy['branch'] >= 0.95, accuracy
+        assert accuracy['all'] >= 0.85, accuracy
+
+        queries = [example['query'] for example in corpus]
+        start_time = time.perf_counter()
+        for _ in range(20):
+            for query in queries:
+                parser.parse(query, gazetteer)
+        per_query = (time.perf_counter() - start_time) / (20 * len(queries))
+        assert per_query < 0.001
+        db.close()
+    print(f"✅ Corpus accuracy: intent {accuracy['intent']:.0%}, all fields {accuracy['all']:.0%}")
+    print(f"⏱️  Parse: {per_query * 1e6:.0f} µs per query")
+
+if __name__ == "__main__":
+    print("🚀 Starting query parser tests...\n")
+    test_intent_word_boundaries()
+    test_values_extracted()
+    test_college_from_gazetteer()
+    test_corpus_accuracy_and_speed()
+    print("\n🎉 All query parser tests completed!")
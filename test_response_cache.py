@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test script for the /chat response cache and the database generation counter.
+"""
+
+import os
+import tempfile
+import time
+from database import CollegeDatabase
+from response_cache import ResponseCache, normalize_query
+from test_stream_parser import SAMPLE_TEXT
+from pdf_parser import EnhancedCollegeParser
+
+def test_normalize_query():
+    """Case, whitespace and trailing punctuation do not change the key."""
+    assert normalize_query("  COEP   Cutoff? ") == normalize_query("coep cutoff")
+    assert normalize_query("Find colleges in Pune!!") == "find colleges in pune"
+    assert normalize_query("AI/ML cutoff for VIT") != normalize_query("AIML cutoff for VIT")
+    print("✅ Query normalization folds case, whitespace and trailing punctuation")
+
+def test_lru_and_size_limits():
+    """Least recently used entries go first, by count and by bytes."""
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"
+    cache.put("c", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+
+    sized = ResponseCache(max_entries=100, max_bytes=10)
+    sized.put("x", "12345")
+    sized.put("y", "67890")
+    sized.put("z", "abc")
+    assert sized.get("x") is None
+    assert sized.get_stats()['bytes'] <= 10
+    sized.put("huge", "x" * 11)
+    assert sized.get("huge") is None
+
+    stats = cache.get_stats()
+    assert stats['evictions'] == 1 and stats['hits'] == 3 and stats['misses'] == 1
+    print(f"✅ LRU eviction by count and bytes: {stats}")
+
+def test_ttl_expiry():
+    """Entries older than the TTL are treated as misses."""
+    cache = ResponseCache(ttl_seconds=0.05)
+    cache.put("coep cutoff", "answer")
+    assert cache.get("coep cutoff") == "answer"
+    time.sleep(0.1)
+    assert cache.get("coep cutoff") is None
+    assert cache.get_stats()['expirations'] == 1
+    print("✅ Expired entries are dropped")
+
+def test_generation_bumps_on_ingest():
+    """Every ingest path bumps db.generation, so old cache keys stop matching."""
+    colleges = EnhancedCollegeParser().extract_colleges(SAMPLE_TEXT)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = CollegeDatabase(os.path.join(tmp_dir, "cache.db"))
+        cache = ResponseCache()
+        key = (normalize_query("Tell me about Amravati"), db.generation)
+        cache.put(key, "old answer")
+
+        db.bulk_store_parsed_data({"colleges": colleges, "parsing_success": True})
+        after_bulk = db.generation
+        db.store_college_stream(iter(colleges))
+        after_stream = db.generation
+        db.store_parsed_data({"colleges": colleges, "parsing_success": True}, bulk=False)
+
+        assert 0 < after_bulk < after_stream < db.generation
+        assert cache.get((normalize_query("Tell me about Amravati"), db.generation)) is None
+        print(f"✅ Ingest bumped generation to {db.generation}")
+
+def test_generation_shared_across_processes():
+    """Another CollegeDatabase's ingest on the same file reaches this one's caches within the check interval."""
+    colleges = EnhancedCollegeParser().extract_colleges(SAMPLE_TEXT)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "shared.db")
+        server = CollegeDatabase(path, generation_check_interval=0.2)
+        worker = CollegeDatabase(path)
+        version, snapshot, stats = server.data_version, server.get_snapshot(), server.get_database_stats()
+        assert worker.data_version == version and stats['colleges'] == 0
+
+        # Reads between checks come from memory, without touching the pool
+        connection = server.pool.connection
+        server.pool.connection = None
+        for _ in range(1000):
+            assert server.generation == 0
+        server.pool.connection = connection
+
+        worker.bulk_store_parsed_data({"colleges": colleges, "parsing_success": True})
+        assert worker.generation > 0
+        time.sleep(0.25)
+        assert server.generation == worker.generation
+        assert server.data_version == worker.data_version != version
+        assert server.get_snapshot() is not snapshot
+        assert server.get_database_stats()['colleges'] == len(colleges)
+
+        # This process's own ingests are seen straight away
+        before = server.generation
+        server.store_college_stream(iter(colleges))
+        assert server.generation > before
+        server.close()
+        worker.close()
+        print("✅ Another process's ingest moves the generation and rebuilds the caches")
+
+def test_cached_lookup_speed():
+    """A cache hit costs microseconds."""
+    cache = ResponseCache()
+    key = (normalize_query("COEP cutoff"), 1)
+    cache.put(key, "answer" * 200)
+
+    runs = 10000
+    start_time = time.perf_counter()
+    for _ in range(runs):
+        cache.get((normalize_query("COEP cutoff"), 1))
+    per_lookup = (time.perf_counter() - start_time) / runs
+    assert per_lookup < 0.001
+    print(f"⏱️  Cached lookup: {per_lookup * 1e6:.1f} µs")
+
+if __name__ == "__main__":
+    print("🚀 Starting response cache tests...\n")
+    test_normalize_query()
+    test_lru_and_size_limits()
+    test_ttl_expiry()
+    test_generation_bumps_on_ingest()
+    test_generation_shared_across_processes()
+    test_cached_lookup_speed()
+    print("\n🎉 All response cache tests completed!")
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Test script for the in-memory read snapshot: it must answer exactly like the
+SQLite queries and be rebuilt after every ingest.
+"""
+
+import os
+import random
+import re
+import tempfile
+import time
+from cutoff_snapshot import like_matcher, tokenize
+from database import CollegeDatabase
+from test_database_queries import make_database
+
+def open_pair(tmp_dir):
+    """The loaded database with snapshots on, and a SQL-only handle on the same file."""
+    snapshot_db = make_database(tmp_dir)
+    sql_db = CollegeDatabase(snapshot_db.db_path, use_snapshot=False)
+    return snapshot_db, sql_db
+
+def test_tokenize_and_like():
+    """Tokenizer and LIKE matcher follow SQLite's rules."""
+    assert tokenize("Pune's Institute_of Tech (Élite)") == ["pune", "s", "institute", "of", "tech", "elite"]
+    assert like_matcher("%coep%")("College of Engineering, COEP Pune")
+    assert like_matcher("%a_c%")("xabcx") and not like_matcher("%a_c%")("xacx")
+    assert not like_matcher("%é%")("É")
+    print("✅ Tokenizer and LIKE matcher behave like SQLite")
+
+def test_snapshot_matches_sql():
+    """Search, college details and eligibility agree with SQLite on the full dataset."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        snapshot_db, sql_db = open_pair(tmp_dir)
+        assert snapshot_db.get_snapshot() is not None
+        assert sql_db.get_snapshot() is None
+
+        names = [college['college_name'] for college in sql_db.search_colleges('')]
+        words = sorted({word for name in names for word in re.findall(r'\w+', name)})
+        rng = random.Random(42)
+        queries = ['', 'coep', 'Amrav', 'computer pune', 'Government College', '01002', 'xyzzy', 'mech eng', 'Pune%']
+        queries += [rng.choice(words)[:rng.randint(1, 6)] for _ in range(100)]
+        for query in queries:
+            assert snapshot_db.search_colleges(query) == sql_db.search_colleges(query), query
+            assert snapshot_db.search_colleges(query, limit=5, offset=2) == sql_db.search_colleges(query, limit=5, offset=2)
+            assert snapshot_db.search_colleges(query, limit=5, offset=-5) == sql_db.search_colleges(query, limit=5, offset=-5)
+
+        for college in sql_db.search_colleges('')[::7]:
+            code = college['college_code']
+            for projection in ({}, {'include_cutoffs': False}, {'stages': ['I']},
+                               {'categories': ['GOPENS', 'TFWS'], 'include_cutoffs': False}):
+                assert snapshot_db.get_college_data(college_code=code, **projection) == \
+                    sql_db.get_college_data(college_code=code, **projection)
+        for name in ('Amravati', 'pune', 'zzz'):
+            assert snapshot_db.get_college_data(college_name=name) == sql_db.get_college_data(college_name=name)
+
+        for _ in range(100):
+            category = rng.choice(['GOPENS', 'gscs', 'TFWS', 'LOPENH', 'NONE'])
+            params = {'rank': rng.randint(1, 150000)} if rng.random() < 0.5 else {'percentile': rng.uniform(40, 100)}
+            params.update(stage=rng.choice([None, 'I', 'II', 'VII']), limit=rng.choice([10, 200]), offset=rng.choice([0, 5, -5]))
+            assert snapshot_db.find_eligible_branches(category, **params) == \
+                sql_db.find_eligible_branches(category, **params), (category, params)
+        print(f"✅ Snapshot matches SQLite on {len(queries)} searches, details and eligibility")
+
+def test_snapshot_rebuilt_after_ingest():
+    """An ingest swaps in a new snapshot that includes the new rows."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = CollegeDatabase(os.path.join(tmp_dir, "snapshot.db"))
+        before = db.get_snapshot()
+        assert db.search_colleges('') == []
+
+        db.store_college_stream(iter([{
+            'college_code': '99001',
+            'college_name': 'Snapshot Test College',
+            'branches': [{'branch_code': '9900110110', 'branch_name': 'Computer Engineering', 'status': 'Test',
+                          'cutoff_data': [{'stage': 'I', 'category': 'GOPENS', 'rank': 1200, 'percentage': 99.1}]}]
+        }]))
+
+        after = db.get_snapshot()
+        assert after is not before and after.generation == db.generation
+        assert db.search_colleges('snapshot')[0]['college_code'] == '99001'
+        assert db.find_eligible_branches('GOPENS', rank=1000)[0]['closing_rank'] == 1200
+        assert db.get_college_data(college_code='99001')['branches'][0]['cutoff_data'][0]['rank'] == 1200
+        print(f"✅ Snapshot rebuilt after ingest: {after.get_stats()}")
+
+def test_snapshot_read_speed():
+    """Snapshot reads are faster than the SQLite queries they replace."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        snapshot_db, sql_db = open_pair(tmp_dir)
+        reads = [
+            ('search', lambda db: db.search_colleges('computer pune', limit=10)),
+            ('details', lambda db: db.get_college_data(college_code='01002')),
+            ('eligibility', lambda db: db.find_eligible_branches('GOPENS', rank=15000))
+        ]
+        for name, read in reads:
+            timings = {}
+            for label, db in (('sqlite', sql_db), ('snapshot', snapshot_db)):
+                read(db)
+                start_time = time.perf_counter()
+                for _ in range(100):
+                    read(db)
+                timings[label] = (time.perf_counter() - start_time) / 100
+            print(f"⏱️  {name}: sqlite {timings['sqlite'] * 1e6:.0f} µs, snapshot {timings['snapshot'] * 1e6:.0f} µs")
+
+def random_students(count, seed=7):
+    rng = random.Random(seed)
+    students = []
+    for _ in range(count):
+        student = {'category': rng.choice(['GOPENS', 'gscs', 'TFWS', 'LOBCS', 'NONE'])}
+        if rng.random() < 0.6:
+            student['rank'] = rng.randint(1, 150000)
+        else:
+            student['percentile'] = round(rng.uniform(40, 100), 4)
+        students.append(student)
+    return students
+
+def test_batch_eligibility_matches_single():
+    """Each batch result equals the single-student query, with and without a stage."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        snapshot_db, sql_db = open_pair(tmp_dir)
+        students = random_students(300)
+        # Fractional ranks just either side of real closing ranks compare like SQL's <=
+        closing = [branch['closing_rank'] for branch in sql_db.find_eligible_branches('GOPENS', rank=1, limit=20)]
+        students += [{'category': 'GOPENS', 'rank': rank + delta} for rank in closing for delta in (-0.1, 0.9)]
+        for stage in (None, 'I'):
+            batch = snapshot_db.find_eligible_branches_batch(students, stage=stage, limit=10)
+            sql_batch = sql_db.find_eligible_branches_batch(students, stage=stage, limit=10)
+            assert len(batch) == len(students)
+            for student, branches, sql_branches in zip(students, batch, sql_batch):
+                single = snapshot_db.find_eligible_branches(student['category'], rank=student.get('rank'),
+                                                            percentile=student.get('percentile'), stage=stage, limit=10)
+                assert branches == single == sql_branches, student
+        assert snapshot_db.find_eligible_branches_batch([]) == []
+        print(f"✅ Batch eligibility matches single queries for {len(students)} students")
+
+def test_batch_eligibility_speed():
+    """A report for thousands of students runs in one vectorized call."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        snapshot_db, sql_db = open_pair(tmp_dir)
+        students = random_students(5000, seed=11)
+
+        start_time = time.perf_counter()
+        batch = snapshot_db.find_eligible_branches_batch(students, limit=10)
+        batch_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        for student in students[:500]:
+            sql_db.find_eligible_branches(student['category'], rank=student.get('rank'),
+                                          percentile=student.get('percentile'), limit=10)
+        sql_time = (time.perf_counter() - start_time) * len(students) / 500
+
+        assert sum(len(branches) for branches in batch) > 0
+        print(f"⏱️  {len(students)} students: batch {batch_time * 1000:.0f} ms, "
+              f"SQLite one by one ~{sql_time * 1000:.0f} ms")
+
+def test_batch_eligibility_endpoint():
+    """String ranks are read as numbers, and bad values or oversized batches get a 400."""
+    import EDI_project_enhanced as server
+    client = server.app.test_client()
+    as_number = client.post('/eligibility/batch', json={'students': [{'category': 'GOPENS', 'rank': 15000}]})
+    as_string = client.post('/eligibility/batch', json={'students': [{'category': 'GOPENS', 'rank': '15000'}]})
+    assert as_string.status_code == 200
+    branches = as_string.get_json()['results'][0]['eligible_branches']
+    assert branches == as_number.get_json()['results'][0]['eligible_branches']
+    assert branches and all(branch['closing_rank'] >= 15000 for branch in branches)
+
+    whole = client.post('/eligibility/batch', json={'students': [{'category': 'GOPENS', 'rank': 15000.0}]})
+    assert whole.get_json()['results'][0]['eligible_branches'] == branches
+
+    for body in ({'students': [{'category': 'GOPENS', 'rank': 'first'}]},
+                 {'students': [{'category': 'GOPENS', 'rank': 15000.9}]},
+                 {'students': [{'category': 'GOPENS', 'percentile': [90]}]},
+                 {'students': [{'category': 'GOPENS', 'rank': 1}], 'limit': 'all'},
+                 {'students': [{'category': 'GOPENS', 'rank': 1}] * (server.MAX_BATCH_ITEMS + 1)}):
+        assert client.post('/eligibility/batch', json=body).status_code == 400
+    huge = client.post('/eligibility/batch', json={'students': [{'category': 'GOPENS', 'rank': 1}], 'limit': 10 ** 9})
+    assert len(huge.get_json()['results'][0]['eligible_branches']) <= server.MAX_PAGE_SIZE
+    print("✅ /eligibility/batch validates ranks, limit and batch size")
+
+if __name__ == "__main__":
+    print("🚀 Starting snapshot tests...\n")
+    test_tokenize_and_like()
+    test_snapshot_matches_sql()
+    test_snapshot_rebuilt_after_ingest()
+    test_snapshot_read_speed()
+    test_batch_eligibility_matches_single()
+    test_batch_eligibility_speed()
+    test_batch_eligibility_endpoint()
+    print("\n🎉 All snapshot tests completed!")
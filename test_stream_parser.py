@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test script for the streaming, page-by-page parse mode of EnhancedCollegeParser.
+"""
+
+import os
+import random
+from pdf_parser import EnhancedCollegeParser, clamp_workers
+
+SAMPLE_TEXT = """
+01002 - Government College of Engineering, Amravati
+0100219110 - Civil Engineering
+Status: Government Autonomous
+State Level
+Stage GOPENS GSCS GNT3S GSEBCS
+I 33717 61041 67451 83123
+(88.6037289) (78.5613347) (76.1358545) (69.7604398)
+01005 - Sant Gadge Baba Amravati University,Amravati
+0100550310 - Food Technology
+Status: University Department
+State Level
+Stage GOPENS GSCS GOBCS TFWS
+I 41234 71234 51234 21234
+(85.1234567) (74.1234567) (80.1234567) (93.1234567)
+"""
+
+def test_iter_lines_matches_split():
+    """Lines streamed across arbitrary chunk boundaries equal a plain split."""
+    rng = random.Random(7)
+    for _ in range(50):
+        cuts = sorted(rng.sample(range(len(SAMPLE_TEXT)), 6))
+        chunks = [SAMPLE_TEXT[a:b] for a, b in zip([0] + cuts, cuts + [len(SAMPLE_TEXT)])]
+        assert list(EnhancedCollegeParser.iter_lines(chunks)) == SAMPLE_TEXT.split('\n')
+    print("✅ iter_lines stitches lines across chunk boundaries")
+
+def test_stream_matches_batch_parse_on_sample():
+    """Streaming colleges from chunks gives the same records as extract_colleges."""
+    parser = EnhancedCollegeParser()
+    expected = parser.extract_colleges(SAMPLE_TEXT)
+    chunks = [SAMPLE_TEXT[i:i + 37] for i in range(0, len(SAMPLE_TEXT), 37)]
+    streamed = list(parser.iter_colleges_from_lines(parser.iter_lines(chunks)))
+
+    assert [c['college_code'] for c in expected] == ["01002", "01005"]
+    assert streamed == expected
+    print("✅ Streaming parse matches batch parse on sample text")
+
+def test_stream_matches_batch_parse_on_pdf_pages():
+    """On real PDF pages, page-by-page parsing equals parsing the joined text."""
+    if not os.path.exists("cutoff.pdf"):
+        print("⚠️  cutoff.pdf not found, skipping")
+        return
+
+    parser = EnhancedCollegeParser()
+    pages = list(parser.iter_page_texts("cutoff.pdf", 0, 40))
+    expected = parser.extract_colleges("".join(pages))
+    streamed = list(parser.iter_colleges_from_lines(parser.iter_lines(iter(pages))))
+
+    assert expected
+    assert streamed == expected
+    print(f"✅ Streaming parse matches batch parse on {len(pages)} pages ({len(expected)} colleges)")
+
+def test_parallel_matches_serial_on_pdf_pages():
+    """Parallel page-range parsing stitches boundary colleges back exactly."""
+    if not os.path.exists("cutoff.pdf"):
+        print("⚠️  cutoff.pdf not found, skipping")
+        return
+
+    parser = EnhancedCollegeParser()
+    expected = parser.extract_colleges("".join(parser.iter_page_texts("cutoff.pdf", 0, 30)))
+
+    # Small ranges force many college sections across range boundaries
+    for chunk_pages in (1, 4, 30):
+        parallel = list(parser.iter_colleges_parallel("cutoff.pdf", workers=2, chunk_pages=chunk_pages, end_page=30))
+        assert parallel == expected
+    print(f"✅ Parallel parse matches serial parse ({len(expected)} colleges)")
+
+def test_worker_count_is_clamped():
+    """Client-supplied worker counts stay within 1..min(CPU count, ceiling)."""
+    cpus = os.cpu_count() or 1
+    assert clamp_workers(0) == clamp_workers(-5) == 1
+    assert clamp_workers(10 ** 6) == clamp_workers(None) == cpus
+    assert clamp_workers(10 ** 6, ceiling=2) == min(2, cpus)
+    assert clamp_workers(None, ceiling=1) == 1
+
+    # A negative count parses serially in one worker instead of failing
+    parser = EnhancedCollegeParser()
+    if os.path.exists("cutoff.pdf"):
+        assert list(parser.iter_colleges_parallel("cutoff.pdf", workers=-3, end_page=2)) == \
+            parser.extract_colleges("".join(parser.iter_page_texts("cutoff.pdf", 0, 2)))
+    print("✅ Worker counts are clamped")
+
+def test_offset_segmenter_matches_line_segmenter():
+    """The single-pass offset segmenter agrees with line-by-line header matching."""
+    parser = EnhancedCollegeParser()
+    tricky = SAMPLE_TEXT + "  01006 - Padded Name  \n01007 -   \n01008-Tight\r\n\x0c01009 - Form Feed\n"
+    by_offset = parser.extract_colleges(tricky)
+    by_line = list(parser.iter_colleges_from_lines(tricky.split('\n')))
+
+    assert by_offset == by_line
+    assert [c['college_code'] for c in by_offset] == ["01002", "01005", "01006", "01008", "01009"]
+    print("✅ Offset segmenter matches line segmenter")
+
+if __name__ == "__main__":
+    print("🚀 Starting streaming parser tests...\n")
+    test_iter_lines_matches_split()
+    test_stream_matches_batch_parse_on_sample()
+    test_offset_segmenter_matches_line_segmenter()
+    test_stream_matches_batch_parse_on_pdf_pages()
+    test_parallel_matches_serial_on_pdf_pages()
+    test_worker_count_is_clamped()
+    print("\n🎉 All streaming parser tests completed!")